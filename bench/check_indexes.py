@@ -0,0 +1,164 @@
+"""EXPLAIN every hot crud / read-path query and fail on full table scans.
+
+Runs the read functions the endpoints use (crud, crud-side probes, sync,
+schedule, analytics, search) against a migrated database, captures each
+SELECT they send, and EXPLAINs it with the same parameters:
+
+  SQLite  EXPLAIN QUERY PLAN; "SCAN <table>" without an index is a full scan
+  MySQL   EXPLAIN; type=ALL on a table is a full scan
+
+    alembic upgrade head && python bench/seed.py --scale tiny
+    python bench/check_indexes.py [--verbose]
+
+Exits 1 when a query scans a table it isn't allowed to (see ALLOWED_SCANS).
+Nothing is written: the session is rolled back at the end. Use a database with
+some rows in it (bench/seed.py), since MySQL plans depend on table statistics.
+"""
+import argparse
+import os
+import re
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from sqlalchemy import event, select  # noqa: E402
+
+from sql_app import analytics, conditional, crud, models, schedule, schemas, search, sync  # noqa: E402
+from sql_app.database import SessionLocal, engine  # noqa: E402
+from sql_app.pagination import PageParams  # noqa: E402
+
+TABLES = set(models.Base.metadata.tables)
+
+# check name -> tables it may scan in full, and why
+ALLOWED_SCANS = {
+    # The MOH directory pages through every midwife in id order (LIMIT-bounded)
+    "crud.get_midwives": {"midwives"},
+    # count(*) / max(updated_at) over the whole (small) midwives table
+    "conditional.midwives_version": {"midwives"},
+}
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def _sample(db):
+    mother = db.scalars(select(models.Mother).order_by(models.Mother.id).limit(1)).first()
+    if mother is None:
+        raise SystemExit("No mothers in the database; seed it first (bench/seed.py --scale tiny)")
+    midwife = db.get(models.Midwife, mother.midwife_id)
+    moh = db.scalars(select(models.MOHOfficer).limit(1)).first()
+    return midwife, mother, moh
+
+
+def checks(db):
+    midwife, mother, moh = _sample(db)
+    page = PageParams(limit=20)
+    area = midwife.assigned_moh_area or (moh.moh_area if moh else "")
+    today = date(2026, 1, 1)
+    registration = schemas.MidwifeRegistration(
+        username=midwife.username, password="x", full_name="x", nic=midwife.nic or midwife.username,
+        date_of_birth=date(1990, 1, 1), phone_number=midwife.phone_number or "0", email=midwife.email,
+        residential_address="x", slmc_reg_no="x", assigned_moh_area=area,
+    )
+    yield "crud.get_midwife_by_username", lambda: crud.get_midwife_by_username(db, midwife.username)
+    yield "crud.get_midwife", lambda: crud.get_midwife(db, midwife.id, with_mothers=True)
+    yield "crud.get_midwives", lambda: crud.get_midwives(db, page=page)
+    # Conflicts with an existing midwife, so it only runs the lookup
+    yield "crud.register_full_midwife", lambda: crud.register_full_midwife(db, registration)
+    if moh is not None:
+        yield "crud.get_moh_officer_by_username", lambda: crud.get_moh_officer_by_username(db, moh.username)
+    yield "crud.get_mother", lambda: crud.get_mother(db, mother.id)
+    yield "crud.get_mother_by_nic", lambda: crud.get_mother_by_nic(db, mother.nic, with_records=True)
+    yield "crud.get_mothers_by_midwife", lambda: crud.get_mothers_by_midwife(db, midwife.id, page=page)
+    yield "crud.get_health_records_for_mother", lambda: crud.get_health_records_for_mother(db, mother.id, page)
+    yield "crud.get_pregnancy_records_for_mother", lambda: crud.get_pregnancy_records_for_mother(db, mother.id, page)
+    yield "crud.get_delivery_records_for_mother", lambda: crud.get_delivery_records_for_mother(db, mother.id, page)
+    yield "crud.get_antenatal_plans_for_mother", lambda: crud.get_antenatal_plans_for_mother(db, mother.id, page)
+    yield "crud.get_owned_mother_ids", lambda: crud.get_owned_mother_ids(db, midwife.id, [mother.id, mother.id + 1])
+    yield "crud.get_idempotent_response", lambda: crud.get_idempotent_response(db, midwife.id, "check")
+    yield "conditional.rows_version", lambda: conditional.probe(
+        db, *conditional.rows_version(models.HealthRecord, models.HealthRecord.mother_id == mother.id)
+    )
+    yield "conditional.midwives_version", lambda: conditional.probe(db, *conditional.midwives_version())
+    yield "conditional.global_change_version", lambda: conditional.probe(db, *conditional.global_change_version())
+    yield "sync.changes_for_midwife", lambda: sync.changes_for_midwife(db, midwife.id, since=0, limit=50)
+    yield "schedule.upcoming (midwife)", lambda: schedule.upcoming(
+        db, today, today + timedelta(days=7), midwife_id=midwife.id, page=page
+    )
+    yield "schedule.upcoming (area)", lambda: schedule.upcoming(
+        db, today, today + timedelta(days=7), moh_area=area, page=page
+    )
+    yield "analytics.area_stats", lambda: analytics.area_stats(db, area, date(2025, 1, 1), date(2026, 12, 1))
+    yield "search.search_mothers (name)", lambda: search.search_mothers(db, mother.full_name.split()[0],
+                                                                        midwife_id=midwife.id)
+    yield "search.search_mothers (nic)", lambda: search.search_mothers(db, mother.nic[:6], midwife_id=midwife.id)
+
+
+def capture(db, fn):
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    connection = db.connection()
+    event.listen(connection, "before_cursor_execute", before)
+    try:
+        fn()
+    finally:
+        event.remove(connection, "before_cursor_execute", before)
+    return statements
+
+
+def full_scans(db, statement, parameters):
+    connection = db.connection()
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        plan = [row[3] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+        scans = {m.group(1) for m in map(_SQLITE_SCAN.match, plan) if m and m.group(1) in TABLES}
+    elif dialect == "mysql":
+        rows = [dict(row._mapping) for row in connection.exec_driver_sql("EXPLAIN " + statement, parameters)]
+        plan = [f"{r['table']}: type={r['type']} key={r['key']} rows={r['rows']}" for r in rows]
+        scans = {r["table"] for r in rows if r["type"] == "ALL" and r["table"] in TABLES}
+    else:
+        raise SystemExit(f"Don't know how to EXPLAIN on {dialect}")
+    return scans, plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--verbose", action="store_true", help="print every plan, not just the failures")
+    args = parser.parse_args()
+
+    failures = 0
+    db = SessionLocal()
+    try:
+        # Flush nothing: the checks must not change the data
+        db.autoflush = False
+        for name, fn in checks(db):
+            statements = capture(db, fn)
+            bad = []
+            for statement, parameters in statements:
+                scans, plan = full_scans(db, statement, parameters)
+                scans -= ALLOWED_SCANS.get(name, set())
+                if scans or args.verbose:
+                    bad.append((scans, statement, plan))
+            failed = any(scans for scans, _, _ in bad)
+            failures += failed
+            print(f"{'FAIL' if failed else 'ok  '} {name} ({len(statements)} queries)")
+            for scans, statement, plan in bad:
+                if scans:
+                    print(f"     full scan of {', '.join(sorted(scans))} in: {' '.join(statement.split())[:300]}")
+                for line in plan:
+                    print(f"       {line}")
+    finally:
+        db.rollback()
+        db.close()
+
+    print(f"{failures} failing check(s) on {engine.dialect.name}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compare two bench/run.py results and flag regressions.
+
+    python bench/compare.py bench/results/before.json bench/results/after.json \\
+        [--threshold 10] [--fail-on-regression] [--metric p99_ms ...]
+
+Prints one row per (endpoint, metric) present in both files. A latency
+percentile or queries/request that grew by more than --threshold percent, or
+throughput that fell by more than that, is marked REGRESSION; with
+--fail-on-regression the exit status is 1 when any row is. --metric limits the
+rows to the metrics named (e.g. p99 only, for a --login-burst comparison).
+"""
+import argparse
+import json
+import sys
+
+# metric -> True when higher is better
+METRICS = {
+    "throughput_rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "queries_per_request": False,
+}
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def change_percent(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(baseline, candidate, threshold, metrics=None):
+    rows = []
+    sections = [("summary", baseline["summary"], candidate["summary"])]
+    sections += [
+        (name, result, candidate["endpoints"][name])
+        for name, result in baseline["endpoints"].items()
+        if name in candidate["endpoints"]
+    ]
+    for name, old, new in sections:
+        for metric, higher_is_better in METRICS.items():
+            if metrics and metric not in metrics:
+                continue
+            change = change_percent(old.get(metric), new.get(metric))
+            regression = change is not None and (-change if higher_is_better else change) > threshold
+            rows.append({
+                "endpoint": name, "metric": metric, "baseline": old.get(metric), "candidate": new.get(metric),
+                "change_percent": None if change is None else round(change, 1), "regression": regression,
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10, help="percent change that counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print the rows as JSON")
+    parser.add_argument("--metric", action="append", choices=METRICS, help="only these metrics (repeatable)")
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    for key in ("scenario", "concurrency", "dialect", "dataset"):
+        if baseline["meta"].get(key) != candidate["meta"].get(key):
+            print(f"warning: runs differ in {key}: {baseline['meta'].get(key)} vs {candidate['meta'].get(key)}",
+                  file=sys.stderr)
+
+    rows = compare(baseline, candidate, args.threshold, args.metric)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'endpoint':<34} {'metric':<20} {'baseline':>10} {'candidate':>10} {'change':>8}")
+        for row in rows:
+            change = "" if row["change_percent"] is None else f"{row['change_percent']:+.1f}%"
+            flag = "  REGRESSION" if row["regression"] else ""
+            print(f"{row['endpoint']:<34} {row['metric']:<20} {str(row['baseline']):>10} "
+                  f"{str(row['candidate']):>10} {change:>8}{flag}")
+
+    if args.fail_on_regression and any(row["regression"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
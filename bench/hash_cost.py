@@ -0,0 +1,109 @@
+"""Measure password hashing cost: hashes/sec per scheme and cost setting.
+
+Each configuration is timed hashing and verifying for --seconds, on one
+thread and on --threads threads (bcrypt and argon2 release the GIL, so the
+second figure is what one worker's hashing pool can do with
+PASSWORD_HASH_WORKERS=--threads). Verify throughput is roughly the login
+capacity of one worker; multiply by the gunicorn worker count.
+
+    python bench/hash_cost.py
+    python bench/hash_cost.py --bcrypt-rounds 10 11 12 --argon2 2:19456:1 3:65536:4 --threads 2
+
+--argon2 takes time_cost:memory_cost_kib:parallelism. The results map onto
+PASSWORD_HASH_SCHEME, BCRYPT_ROUNDS and ARGON2_* (see sql_app/crud.py).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from sql_app import crud  # noqa: E402
+
+PASSWORD = "bench-password"
+
+
+# (calls per second over all threads, seconds per call)
+def _rate(fn, seconds, threads):
+    started = time.perf_counter()
+
+    def loop():
+        count = 0
+        while time.perf_counter() - started < seconds:
+            fn()
+            count += 1
+        return count
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        calls = sum(pool.map(lambda _: loop(), range(threads)))
+    elapsed = time.perf_counter() - started
+    return calls / elapsed, elapsed / calls * threads
+
+
+def measure(label, context, seconds, threads):
+    stored = context.hash(PASSWORD)
+    result = {"config": label, "hash_length": len(stored)}
+    for name, fn in (("hash", lambda: context.hash(PASSWORD)), ("verify", lambda: context.verify(PASSWORD, stored))):
+        for thread_count in sorted({1, threads}):
+            per_second, latency = _rate(fn, seconds, thread_count)
+            result[f"{name}_per_sec_{thread_count}t"] = round(per_second, 1)
+            if thread_count == 1:
+                result[f"{name}_ms"] = round(latency * 1000, 1)
+    return result
+
+
+def configs(args):
+    for rounds in args.bcrypt_rounds:
+        yield f"bcrypt rounds={rounds}", crud.make_pwd_context("bcrypt", bcrypt_rounds=rounds)
+    for spec in args.argon2:
+        time_cost, memory_cost, parallelism = (int(part) for part in spec.split(":"))
+        yield (
+            f"argon2id t={time_cost} m={memory_cost} p={parallelism}",
+            crud.make_pwd_context("argon2", argon2_time_cost=time_cost, argon2_memory_cost=memory_cost,
+                                  argon2_parallelism=parallelism),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bcrypt-rounds", type=int, nargs="*", default=[10, 11, 12])
+    parser.add_argument("--argon2", nargs="*", default=["1:19456:1", "2:19456:1", "3:65536:1"],
+                        help="time_cost:memory_cost_kib:parallelism")
+    parser.add_argument("--seconds", type=float, default=2.0, help="per measurement")
+    parser.add_argument("--threads", type=int, default=int(os.getenv("PASSWORD_HASH_WORKERS", "2")))
+    parser.add_argument("--out", help="write the JSON result here instead of stdout")
+    args = parser.parse_args()
+
+    results = []
+    for label, context in configs(args):
+        try:
+            results.append(measure(label, context, args.seconds, args.threads))
+        except Exception as e: # e.g. argon2-cffi not installed
+            results.append({"config": label, "error": str(e)})
+        print(json.dumps(results[-1]), file=sys.stderr)
+
+    text = json.dumps({
+        "meta": {
+            "threads": args.threads,
+            "seconds": args.seconds,
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        },
+        "results": results,
+    }, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+"""Drive mixed workloads against the API and report latency / throughput / queries.
+
+Seed a database first (bench/seed.py), then point DATABASE_URL at it:
+
+    DATABASE_URL=sqlite:///./bench.db python bench/run.py --scenario mixed \\
+        --duration 30 --concurrency 16 --out bench/results/before.json
+
+Scenarios (one "operation" is what one simulated user does in one go):
+
+  login_burst      midwife / mother password logins (bcrypt-bound)
+  portal_polling   a mother's app refreshing her profile and record lists,
+                   with If-None-Match like the app sends
+  portal_snapshot  the same refresh as one GET /mothers/me/portal
+  clinic_sync      a midwife's tablet pulling GET /sync, then uploading a
+                   batch of visit records with an Idempotency-Key
+  moh_directory    the MOH portal: midwife directory, analytics, schedule
+  mixed            all of the above, weighted like a clinic day
+  sync_db          one mother with all her records (GET /mothers/me/'s read)
+                   through a def handler on the sync Session
+  async_db         the same read through an async def handler on the
+                   AsyncSession
+
+sync_db and async_db use two bench-only routes mounted on the in-process app
+(not available with --url) and skip auth, so they differ only in the DB path.
+Their summary throughput_rps is the sync-vs-async requests/sec; above 40
+users the def handler also queues for AnyIO's threadpool:
+
+    python bench/run.py --scenario sync_db --concurrency 200 --out bench/results/sync.json
+    python bench/run.py --scenario async_db --concurrency 200 --out bench/results/async.json
+    python bench/compare.py bench/results/sync.json bench/results/async.json --metric throughput_rps
+
+--login-burst N adds N more simulated users doing nothing but login_burst
+for the whole run, on top of --concurrency. Comparing a run with it against
+one without shows what a login burst does to login p99 and to the p99 of
+every other route:
+
+    python bench/run.py --scenario mixed --out bench/results/quiet.json
+    python bench/run.py --scenario mixed --login-burst 16 --out bench/results/burst.json
+    python bench/compare.py bench/results/quiet.json bench/results/burst.json --metric p99_ms
+
+By default the app runs in-process behind httpx's ASGITransport (no network,
+one worker, client and server share the CPU). --url sends the same traffic to
+a running server (e.g. gunicorn) instead; DATABASE_URL must still point at the
+same database, which is read for the seeded ids.
+
+Queries per request come from the app's own GET /metrics counters, scraped
+before and after the measured window (with OPS_TOKEN, "bench" by default). The JSON written to --out (or stdout)
+can be compared with bench/compare.py.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+# Every simulated user comes from one IP; the login rate limits would turn
+# login_burst into a test of the 429 path (set RATE_LIMIT_ENABLED=1 for that).
+# Only affects the in-process app; a --url server uses its own settings.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+# GET /metrics needs the ops token; with --url, export the server's OPS_TOKEN
+os.environ.setdefault("OPS_TOKEN", "bench")
+
+import httpx  # noqa: E402
+from prometheus_client.parser import text_string_to_metric_families  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+import seed  # noqa: E402
+from sql_app import database, models  # noqa: E402
+from sql_app.database import SessionLocal, engine  # noqa: E402
+
+# Users taking part in a run (tokens are minted up front, outside the timing)
+SAMPLE_MIDWIVES = 200
+SAMPLE_MOTHERS = 2000
+BATCH_SIZE_RANGE = (1, 8)
+
+MIXED_WEIGHTS = {
+    "portal_polling": 60,
+    "clinic_sync": 25,
+    "moh_directory": 10,
+    "login_burst": 5,
+}
+
+
+# --- Dataset / users ---
+class Users:
+    def __init__(self, rng, token_for):
+        with SessionLocal() as db:
+            midwife_ids = db.scalars(select(models.Midwife.id).order_by(models.Midwife.id)).all()
+            moh_ids = db.scalars(select(models.MOHOfficer.id).order_by(models.MOHOfficer.id)).all()
+            mother_count = db.scalar(select(func.count()).select_from(models.Mother))
+            if not midwife_ids or not moh_ids or not mother_count:
+                raise SystemExit("No seeded data found; run bench/seed.py first")
+            self.midwife_ids = rng.sample(midwife_ids, min(SAMPLE_MIDWIVES, len(midwife_ids)))
+            self.moh_ids = moh_ids
+            self.mother_ids = rng.sample(range(1, mother_count + 1), min(SAMPLE_MOTHERS, mother_count))
+            self.caseloads = defaultdict(list)
+            rows = db.execute(
+                select(models.Mother.id, models.Mother.midwife_id).where(models.Mother.midwife_id.in_(self.midwife_ids))
+            )
+            for mother_id, midwife_id in rows:
+                self.caseloads[midwife_id].append(mother_id)
+        self.midwife_tokens = {i: token_for(seed.midwife_username(i)) for i in self.midwife_ids}
+        self.mother_tokens = {i: token_for(seed.mother_nic(i)) for i in self.mother_ids}
+        self.moh_tokens = {i: token_for(seed.moh_username(i)) for i in self.moh_ids}
+        self.counts = {"midwives": len(midwife_ids), "moh_officers": len(moh_ids), "mothers": mother_count}
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+# --- Recording ---
+class Recorder:
+    def __init__(self, client):
+        self.client = client
+        self.samples = defaultdict(list)  # name -> [(seconds, status)]
+        self.recording = False
+
+    async def request(self, name, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, 0
+        if self.recording:
+            self.samples[name].append((time.perf_counter() - started, status))
+        # Back off like the apps do when turned away (429 / 503 from the login routes)
+        if response is not None and status in (429, 503) and "retry-after" in response.headers:
+            await asyncio.sleep(float(response.headers["retry-after"]))
+        return response
+
+
+# --- Scenarios: each coroutine is one user operation ---
+class Workload:
+    def __init__(self, recorder, users, rng):
+        self.r = recorder
+        self.users = users
+        self.rng = rng
+        self.etags = {}
+        self.sync_tokens = {}
+
+    async def login_burst(self):
+        if self.rng.random() < 0.7:
+            username = seed.midwife_username(self.rng.choice(self.users.midwife_ids))
+            await self.r.request("POST /token", "POST", "/token",
+                                 data={"username": username, "password": seed.BENCH_PASSWORD})
+        else:
+            nic = seed.mother_nic(self.rng.choice(self.users.mother_ids))
+            await self.r.request("POST /mother/token", "POST", "/mother/token",
+                                 data={"username": nic, "password": seed.BENCH_PASSWORD})
+
+    async def _conditional_get(self, name, url, token):
+        headers = _auth(token)
+        etag = self.etags.get((token, url))
+        if etag:
+            headers["If-None-Match"] = etag
+        response = await self.r.request(name, "GET", url, headers=headers)
+        if response is not None and response.headers.get("etag"):
+            self.etags[(token, url)] = response.headers["etag"]
+
+    async def portal_polling(self):
+        token = self.users.mother_tokens[self.rng.choice(self.users.mother_ids)]
+        await self._conditional_get("GET /mothers/me/", "/mothers/me/", token)
+        for path in ("/my-pregnancy-records/", "/my-antenatal-plans/", "/my-delivery-records/"):
+            await self._conditional_get(f"GET {path}", path, token)
+
+    async def portal_snapshot(self):
+        token = self.users.mother_tokens[self.rng.choice(self.users.mother_ids)]
+        await self._conditional_get("GET /mothers/me/portal", "/mothers/me/portal", token)
+
+    async def clinic_sync(self):
+        midwife_id = self.rng.choice(self.users.midwife_ids)
+        token = self.users.midwife_tokens[midwife_id]
+        since = self.sync_tokens.get(midwife_id, "")
+        while True:
+            response = await self.r.request("GET /sync", "GET", "/sync", params={"since": since},
+                                            headers=_auth(token))
+            if response is None or response.status_code != 200:
+                break
+            feed = response.json()
+            since = feed["next_token"]
+            if not feed["has_more"]:
+                break
+        self.sync_tokens[midwife_id] = since
+
+        caseload = self.users.caseloads.get(midwife_id)
+        if not caseload:
+            return
+        visit = datetime(2026, 1, 1, 9) + timedelta(days=self.rng.randint(0, 60))
+        operations = [
+            {"type": "health_record", "mother_id": self.rng.choice(caseload),
+             "data": {"visit_date": visit.isoformat(), "weight_kg": self.rng.randint(50, 80), "blood_pressure": "120/80"}}
+            for _ in range(self.rng.randint(*BATCH_SIZE_RANGE))
+        ]
+        await self.r.request("POST /mothers/records/batch", "POST", "/mothers/records/batch",
+                             json={"operations": operations},
+                             headers=dict(_auth(token), **{"Idempotency-Key": uuid.uuid4().hex}))
+
+    async def moh_directory(self):
+        token = self.users.moh_tokens[self.rng.choice(self.users.moh_ids)]
+        await self._conditional_get("GET /midwives/", "/midwives/?limit=50", token)
+        await self._conditional_get("GET /midwives/?expand=mothers", "/midwives/?expand=mothers&limit=5", token)
+        await self.r.request("GET /moh/analytics", "GET", "/moh/analytics",
+                             params={"start": "2025-06-01", "end": "2026-06-01"}, headers=_auth(token))
+        start = date(2026, 1, 1) + timedelta(days=self.rng.randint(-20, 20))
+        await self.r.request("GET /moh/schedule", "GET", "/moh/schedule",
+                             params={"start": start.isoformat(), "end": (start + timedelta(days=7)).isoformat()},
+                             headers=_auth(token))
+
+    async def sync_db(self):
+        mother_id = self.rng.choice(self.users.mother_ids)
+        await self.r.request("GET /bench/sync/mothers/{mother_id}", "GET", f"/bench/sync/mothers/{mother_id}")
+
+    async def async_db(self):
+        mother_id = self.rng.choice(self.users.mother_ids)
+        await self.r.request("GET /bench/async/mothers/{mother_id}", "GET", f"/bench/async/mothers/{mother_id}")
+
+    async def mixed(self):
+        names = list(MIXED_WEIGHTS)
+        name = self.rng.choices(names, weights=[MIXED_WEIGHTS[n] for n in names])[0]
+        await getattr(self, name)()
+
+
+SCENARIOS = ("login_burst", "portal_polling", "portal_snapshot", "clinic_sync", "moh_directory", "mixed",
+             "sync_db", "async_db")
+DB_PATH_SCENARIOS = ("sync_db", "async_db")
+
+
+# --- Bench-only twin routes for sync_db / async_db ---
+def mount_db_path_routes(app):
+    from fastapi import Depends
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+
+    from sql_app import crud, crud_async, schemas, serialization
+    from sql_app.main import get_async_read_db, get_read_db
+
+    @app.get("/bench/sync/mothers/{mother_id}", include_in_schema=False)
+    def sync_mother(mother_id: int, db: Session = Depends(get_read_db)):
+        stmt = select(models.Mother).where(models.Mother.id == mother_id).options(*crud.MOTHER_RECORD_LOADERS)
+        return serialization.respond(schemas.Mother, db.scalars(stmt).first())
+
+    @app.get("/bench/async/mothers/{mother_id}", include_in_schema=False)
+    async def async_mother(mother_id: int, db: AsyncSession = Depends(get_async_read_db)):
+        return serialization.respond(schemas.Mother, await crud_async.get_mother(db, mother_id, with_records=True))
+
+
+# --- Queries per request, from the app's /metrics ---
+async def scrape_sql_statements(client):
+    response = await client.get("/metrics", headers=_auth(os.environ["OPS_TOKEN"]))
+    if response.status_code != 200:
+        raise SystemExit(f"GET /metrics answered {response.status_code}; is OPS_TOKEN the server's?")
+    totals = defaultdict(lambda: [0.0, 0.0])  # route -> [sum, count]
+    for family in text_string_to_metric_families(response.text):
+        if family.name != "http_request_sql_statements":
+            continue
+        for sample in family.samples:
+            if sample.name.endswith("_sum"):
+                totals[sample.labels["route"]][0] += sample.value
+            elif sample.name.endswith("_count"):
+                totals[sample.labels["route"]][1] += sample.value
+    return totals
+
+
+def queries_per_request(before, after, route):
+    statements = after[route][0] - before[route][0]
+    requests = after[route][1] - before[route][1]
+    return round(statements / requests, 2) if requests else None
+
+
+# --- Reporting ---
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def summarize(samples, seconds):
+    latencies = sorted(latency for latency, _ in samples)
+    statuses = defaultdict(int)
+    for _, status in samples:
+        statuses[str(status)] += 1
+    errors = sum(n for status, n in statuses.items() if status == "0" or status.startswith("5"))
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "statuses": dict(sorted(statuses.items())),
+        "throughput_rps": round(len(samples) / seconds, 2) if seconds else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --- Driver ---
+async def run(args):
+    rng = random.Random(args.seed)
+    if args.url:
+        if args.scenario in DB_PATH_SCENARIOS:
+            raise SystemExit(f"--scenario {args.scenario} runs against the in-process app only")
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+        from sql_app.main import create_access_token
+    else:
+        from sql_app.main import app, create_access_token
+        if args.scenario in DB_PATH_SCENARIOS:
+            mount_db_path_routes(app)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    users = Users(rng, lambda subject: create_access_token(data={"sub": subject}))
+    recorder = Recorder(client)
+    # One Workload per simulated user so ETags / sync tokens are kept per client
+    workloads = [Workload(recorder, users, random.Random(rng.random())) for _ in range(args.concurrency)]
+    burst = [Workload(recorder, users, random.Random(rng.random())) for _ in range(args.login_burst)]
+
+    async def user_loop(operation, stop_at):
+        while time.perf_counter() < stop_at:
+            await operation()
+
+    def user_loops(stop_at):
+        loops = [user_loop(getattr(w, args.scenario), stop_at) for w in workloads]
+        return loops + [user_loop(w.login_burst, stop_at) for w in burst]
+
+    async with client:
+        if args.warmup > 0:
+            stop_at = time.perf_counter() + args.warmup
+            await asyncio.gather(*user_loops(stop_at))
+
+        before = await scrape_sql_statements(client)
+        recorder.recording = True
+        started = time.perf_counter()
+        stop_at = started + args.duration
+        await asyncio.gather(*user_loops(stop_at))
+        elapsed = time.perf_counter() - started
+        recorder.recording = False
+        after = await scrape_sql_statements(client)
+    # aiosqlite / aiomysql connections must be closed on this loop, or exit hangs
+    await database.dispose_async_engines()
+
+    endpoints = {}
+    for name, samples in sorted(recorder.samples.items()):
+        result = summarize(samples, elapsed)
+        route = name.split(" ", 1)[1].split("?", 1)[0]
+        result["queries_per_request"] = queries_per_request(before, after, route)
+        endpoints[name] = result
+
+    everything = [sample for samples in recorder.samples.values() for sample in samples]
+    summary = summarize(everything, elapsed)
+    total_statements = sum(after[r][0] - before[r][0] for r in after if r != "/metrics")
+    summary["queries_per_request"] = round(total_statements / len(everything), 2) if everything else None
+
+    return {
+        "meta": {
+            "scenario": args.scenario,
+            "concurrency": args.concurrency,
+            "login_burst": args.login_burst,
+            "duration_s": round(elapsed, 2),
+            "warmup_s": args.warmup,
+            "seed": args.seed,
+            "target": args.url or "asgi",
+            "dialect": engine.dialect.name,
+            "dataset": users.counts,
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        },
+        "summary": summary,
+        "endpoints": endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=SCENARIOS, default="mixed")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before that")
+    parser.add_argument("--concurrency", type=int, default=16, help="simulated users in flight")
+    parser.add_argument("--login-burst", type=int, default=0, metavar="N",
+                        help="extra simulated users logging in throughout the run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", help="base URL of a running server instead of the in-process app")
+    parser.add_argument("--out", help="write the JSON result here instead of stdout")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    text = json.dumps(result, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Per-request CPU of the JSON serialization paths for big record lists.
+
+Runs the same list of DeliveryRecord rows (the widest record model) through
+three tiny routes and reports CPU milliseconds per request:
+
+  default   response_model + FastAPI's own serialization (json.dumps)
+  orjson    response_model + ORJSONResponse
+  adapter   serialization.respond (TypeAdapter.dump_json, no response_model pass)
+
+    python bench/serialization.py [--sizes 100,1000,10000] [--repeat 20]
+
+No database is needed (the rows are transient ORM objects) but importing
+sql_app still reads DATABASE_URL, so point it at SQLite when running locally.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import ORJSONResponse  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import Boolean  # noqa: E402
+
+from sql_app import models, schemas, serialization  # noqa: E402
+
+
+def make_rows(n):
+    start = datetime(2025, 1, 1, 8, 30)
+    # Column defaults only apply on INSERT, so fill the flags in by hand
+    flags = {c.name: False for c in models.DeliveryRecord.__table__.columns if isinstance(c.type, Boolean)}
+    return [
+        models.DeliveryRecord(
+            **flags,
+            id=i + 1, mother_id=i // 3 + 1, created_at=start, delivery_date=start + timedelta(hours=i),
+            delivery_mode="SVD", maternal_complications="none noted",
+            birth_weight=Decimal("2.95"), poa_at_birth=39, apgar_score=9, abnormalities=None,
+            special_notes="routine discharge", discharge_date=start + timedelta(days=2),
+        )
+        for i in range(n)
+    ]
+
+
+def build_app(rows):
+    app = FastAPI()
+
+    @app.get("/default", response_model=List[schemas.DeliveryRecord])
+    def default_path():
+        return rows
+
+    @app.get("/orjson", response_model=List[schemas.DeliveryRecord], response_class=ORJSONResponse)
+    def orjson_path():
+        return rows
+
+    @app.get("/adapter", response_model=List[schemas.DeliveryRecord])
+    def adapter_path():
+        return serialization.respond(List[schemas.DeliveryRecord], rows)
+
+    return app
+
+
+def cpu_ms_per_request(client, path, repeat):
+    body = client.get(path).content  # warm-up (adapter build, route compile)
+    started = time.process_time()
+    for _ in range(repeat):
+        client.get(path)
+    return (time.process_time() - started) * 1000 / repeat, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        client = TestClient(build_app(make_rows(size)))
+        bodies = {}
+        for path in ("default", "orjson", "adapter"):
+            ms, length = cpu_ms_per_request(client, "/" + path, args.repeat)
+            bodies[path] = json.loads(client.get("/" + path).content)
+            results.append({"rows": size, "path": path, "cpu_ms_per_request": round(ms, 3), "bytes": length})
+        assert bodies["default"] == bodies["adapter"] == bodies["orjson"], "serializers disagree"
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
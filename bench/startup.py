@@ -0,0 +1,183 @@
+"""Measure how long a worker takes to start: imports, then first response.
+
+  import          `python -X importtime -c "import sql_app.main"` in a fresh
+                  interpreter, --runs times; the median total plus the
+                  slowest modules (cumulative, and self time)
+  first response  spawn the server (uvicorn, or gunicorn with --gunicorn) and
+                  poll GET /health/pool until it answers, --runs times
+                  (the server gets OPS_TOKEN, "bench" unless already set)
+
+    python bench/startup.py --runs 5
+    python bench/startup.py --gunicorn --workers 4 --preload --out bench/results/startup.json
+
+Run from the repository root (the app mounts ./static). DATABASE_URL defaults
+to the bench SQLite database; the app doesn't touch it until a request needs it.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP = "sql_app.main:app"
+FIRST_RESPONSE_TIMEOUT = 60
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+    env.setdefault("OPS_TOKEN", "bench")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+# --- Imports ---
+# -X importtime lines: "import time: self [us] | cumulative | imported package"
+def _parse_importtime(stderr):
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # A module can show up more than once (e.g. re-imported by a subinterpreter); keep the first
+        modules.setdefault(name.strip(), (int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure_imports(runs, top):
+    totals = []
+    cumulative = defaultdict(list)
+    self_time = defaultdict(list)
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import sql_app.main"],
+            cwd=ROOT, env=_env(), capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise SystemExit(f"import sql_app.main failed:\n{proc.stderr[-2000:]}")
+        modules = _parse_importtime(proc.stderr)
+        totals.append(modules["sql_app.main"][1])
+        for name, (self_us, cumulative_us) in modules.items():
+            self_time[name].append(self_us)
+            cumulative[name].append(cumulative_us)
+
+    def slowest(samples):
+        medians = {name: statistics.median(values) for name, values in samples.items()}
+        ranked = sorted(medians.items(), key=lambda item: item[1], reverse=True)[:top]
+        return [{"module": name, "ms": round(us / 1000, 1)} for name, us in ranked]
+
+    # Only the top-level packages for cumulative times, otherwise the list is
+    # just the same import chain at every depth
+    top_level = {name: values for name, values in cumulative.items() if "." not in name or name.startswith("sql_app.")}
+    return {
+        "runs": runs,
+        "median_ms": round(statistics.median(totals) / 1000, 1),
+        "min_ms": round(min(totals) / 1000, 1),
+        "slowest_cumulative": slowest(top_level),
+        "slowest_self": slowest(self_time),
+    }
+
+
+# --- First response ---
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _server_command(args, port):
+    if args.gunicorn:
+        command = [
+            sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", APP,
+            "-w", str(args.workers), "-k", "uvicorn.workers.UvicornWorker", "--bind", f"127.0.0.1:{port}",
+        ]
+        if args.preload:
+            command.append("--preload")
+        return command
+    return [sys.executable, "-m", "uvicorn", APP, "--port", str(port), "--log-level", "warning"]
+
+
+def _wait_for_response(url, proc):
+    request = urllib.request.Request(url, headers={"Authorization": f"Bearer {_env()['OPS_TOKEN']}"})
+    while True:
+        if proc.poll() is not None:
+            raise SystemExit(f"server exited with {proc.returncode} before answering")
+        try:
+            with urllib.request.urlopen(request, timeout=1) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            pass
+        time.sleep(0.01)
+
+
+def measure_first_response(args):
+    timings = []
+    for _ in range(args.runs):
+        port = _free_port()
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            _server_command(args, port), cwd=ROOT, env=_env(),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_for_response(f"http://127.0.0.1:{port}/health/pool", proc)
+            timings.append(time.perf_counter() - started)
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(FIRST_RESPONSE_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+    return {
+        "runs": args.runs,
+        "server": "gunicorn" if args.gunicorn else "uvicorn",
+        "workers": args.workers if args.gunicorn else 1,
+        "preload": bool(args.gunicorn and args.preload),
+        "median_ms": round(statistics.median(timings) * 1000, 1),
+        "min_ms": round(min(timings) * 1000, 1),
+        "max_ms": round(max(timings) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="how many of the slowest modules to list")
+    parser.add_argument("--gunicorn", action="store_true", help="time gunicorn (gunicorn.conf.py) instead of uvicorn")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--preload", action="store_true", help="pass --preload to gunicorn")
+    parser.add_argument("--skip-server", action="store_true", help="only measure imports")
+    parser.add_argument("--out", help="write the JSON result here instead of stdout")
+    args = parser.parse_args()
+
+    result = {
+        "meta": {
+            "python": platform.python_version(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        },
+        "imports": measure_imports(args.runs, args.top),
+    }
+    if not args.skip_server:
+        result["first_response"] = measure_first_response(args)
+
+    text = json.dumps(result, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
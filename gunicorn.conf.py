@@ -0,0 +1,35 @@
+import os
+import shutil
+
+# gunicorn reads this file from the working directory (see Procfile).
+#
+# Prometheus multiprocess mode: every worker writes its metrics to mmap'ed
+# files in PROMETHEUS_MULTIPROC_DIR and /metrics sums them up. The directory
+# is emptied when gunicorn starts so counters from a previous run don't linger,
+# and a worker's live gauges are dropped when it exits.
+
+_multiproc_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+
+
+def on_starting(server):
+    shutil.rmtree(_multiproc_dir, ignore_errors=True)
+    os.makedirs(_multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+# --preload (PRELOAD_APP=1, or on the command line) imports the app once in the
+# master so the workers share its memory copy-on-write. Importing opens no
+# connections, but start every worker with empty pools regardless.
+preload_app = os.getenv("PRELOAD_APP") == "1"
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from sql_app import database
+
+        database.dispose_after_fork()
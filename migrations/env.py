@@ -0,0 +1,58 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from sql_app import models
+from sql_app.database import engine
+
+# --- Alembic environment ---
+# Runs against the same DATABASE_URL as the app (sql_app/database.py), with
+# the app's models as the target for `alembic revision --autogenerate`.
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = models.Base.metadata
+
+
+# Keep autogenerate away from objects the models don't describe on this dialect:
+# SQLite's FTS5 tables (raw DDL) and the MySQL-only FULLTEXT index
+def include_object(obj, name, type_, reflected, compare_to):
+    if type_ == "table" and name.startswith("mothers_fts"):
+        return False
+    if type_ == "index" and name == "ix_mothers_full_name_fulltext":
+        return context.get_context().dialect.name == "mysql"
+    return True
+
+
+def run_migrations_offline():
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=engine.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            # SQLite can't ALTER most things in place; batch mode rebuilds the table
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,188 @@
+"""Baseline: the schema the app created with create_all before migrations
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-17
+
+Databases created by create_all already have these tables, and no
+alembic_version table: `alembic upgrade head` (the Procfile's release step)
+skips every table that exists, so on those this revision only records
+itself. Tables are never altered here; 0002 onwards bring them up to date.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _missing(table):
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade():
+    if _missing("midwives"):
+        op.create_table("midwives",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("username", sa.String(length=255), nullable=False),
+            sa.Column("hashed_password", sa.String(length=255), nullable=False),
+            sa.Column("full_name", sa.String(length=255), nullable=True),
+            sa.Column("nic", sa.String(length=20), nullable=True),
+            sa.Column("date_of_birth", sa.Date(), nullable=True),
+            sa.Column("phone_number", sa.String(length=20), nullable=True),
+            sa.Column("email", sa.String(length=255), nullable=True),
+            sa.Column("residential_address", sa.TEXT(), nullable=True),
+            sa.Column("slmc_reg_no", sa.String(length=50), nullable=True),
+            sa.Column("service_grade", sa.String(length=50), nullable=True),
+            sa.Column("assigned_moh_area", sa.String(length=100), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index(op.f("ix_midwives_id"), "midwives", ["id"], unique=False)
+        op.create_index(op.f("ix_midwives_username"), "midwives", ["username"], unique=True)
+
+    if _missing("moh_officers"):
+        op.create_table("moh_officers",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("username", sa.String(length=255), nullable=False),
+            sa.Column("hashed_password", sa.String(length=255), nullable=False),
+            sa.Column("full_name", sa.String(length=255), nullable=True),
+            sa.Column("moh_area", sa.String(length=100), nullable=True),
+            sa.Column("email", sa.String(length=255), nullable=True),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index(op.f("ix_moh_officers_id"), "moh_officers", ["id"], unique=False)
+        op.create_index(op.f("ix_moh_officers_username"), "moh_officers", ["username"], unique=True)
+
+    if _missing("mothers"):
+        op.create_table("mothers",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("full_name", sa.String(length=255), nullable=False),
+            sa.Column("nic", sa.String(length=20), nullable=True),
+            sa.Column("address", sa.TEXT(), nullable=True),
+            sa.Column("contact_number", sa.String(length=20), nullable=True),
+            sa.Column("hashed_password", sa.String(length=255), nullable=False),
+            sa.Column("midwife_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["midwife_id"], ["midwives.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("nic")
+        )
+        op.create_index(op.f("ix_mothers_id"), "mothers", ["id"], unique=False)
+
+    if _missing("antenatal_plans"):
+        op.create_table("antenatal_plans",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("mother_id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DATETIME(), nullable=True),
+            sa.Column("next_clinic_date", sa.DATETIME(), nullable=True),
+            sa.Column("class_1st_date", sa.DATETIME(), nullable=True),
+            sa.Column("class_1st_husband", sa.Boolean(), nullable=True),
+            sa.Column("class_1st_wife", sa.Boolean(), nullable=True),
+            sa.Column("class_1st_other", sa.String(length=100), nullable=True),
+            sa.Column("class_2nd_date", sa.DATETIME(), nullable=True),
+            sa.Column("class_2nd_husband", sa.Boolean(), nullable=True),
+            sa.Column("class_2nd_wife", sa.Boolean(), nullable=True),
+            sa.Column("class_2nd_other", sa.String(length=100), nullable=True),
+            sa.Column("class_3rd_date", sa.DATETIME(), nullable=True),
+            sa.Column("class_3rd_husband", sa.Boolean(), nullable=True),
+            sa.Column("class_3rd_wife", sa.Boolean(), nullable=True),
+            sa.Column("class_3rd_other", sa.String(length=100), nullable=True),
+            sa.Column("book_antenatal_issued", sa.DATETIME(), nullable=True),
+            sa.Column("book_antenatal_returned", sa.DATETIME(), nullable=True),
+            sa.Column("book_breastfeeding_issued", sa.DATETIME(), nullable=True),
+            sa.Column("book_breastfeeding_returned", sa.DATETIME(), nullable=True),
+            sa.Column("book_eccd_issued", sa.DATETIME(), nullable=True),
+            sa.Column("book_eccd_returned", sa.DATETIME(), nullable=True),
+            sa.Column("leaflet_fp_issued", sa.DATETIME(), nullable=True),
+            sa.Column("leaflet_fp_returned", sa.DATETIME(), nullable=True),
+            sa.Column("emergency_contact_name", sa.String(length=255), nullable=True),
+            sa.Column("emergency_contact_address", sa.TEXT(), nullable=True),
+            sa.Column("emergency_contact_phone", sa.String(length=20), nullable=True),
+            sa.Column("moh_office_phone", sa.String(length=20), nullable=True),
+            sa.Column("phm_phone", sa.String(length=20), nullable=True),
+            sa.Column("grama_niladari_div", sa.String(length=255), nullable=True),
+            sa.ForeignKeyConstraint(["mother_id"], ["mothers.id"], ),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index(op.f("ix_antenatal_plans_id"), "antenatal_plans", ["id"], unique=False)
+
+    if _missing("delivery_records"):
+        op.create_table("delivery_records",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("mother_id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DATETIME(), nullable=True),
+            sa.Column("delivery_date", sa.DATETIME(), nullable=True),
+            sa.Column("delivery_mode", sa.String(length=50), nullable=True),
+            sa.Column("episiotomy", sa.Boolean(), nullable=True),
+            sa.Column("temp_normal", sa.Boolean(), nullable=True),
+            sa.Column("vaginal_exam_done", sa.Boolean(), nullable=True),
+            sa.Column("maternal_complications", sa.TEXT(), nullable=True),
+            sa.Column("wound_infection", sa.Boolean(), nullable=True),
+            sa.Column("family_planning_discussed", sa.Boolean(), nullable=True),
+            sa.Column("danger_signals_explained", sa.Boolean(), nullable=True),
+            sa.Column("breast_feeding_established", sa.Boolean(), nullable=True),
+            sa.Column("birth_weight", sa.DECIMAL(precision=5, scale=2), nullable=True),
+            sa.Column("poa_at_birth", sa.Integer(), nullable=True),
+            sa.Column("apgar_score", sa.Integer(), nullable=True),
+            sa.Column("abnormalities", sa.TEXT(), nullable=True),
+            sa.Column("vitamin_a_given", sa.Boolean(), nullable=True),
+            sa.Column("rubella_given", sa.Boolean(), nullable=True),
+            sa.Column("anti_d_given", sa.Boolean(), nullable=True),
+            sa.Column("diagnosis_card_given", sa.Boolean(), nullable=True),
+            sa.Column("chdr_completed", sa.Boolean(), nullable=True),
+            sa.Column("prescription_given", sa.Boolean(), nullable=True),
+            sa.Column("referred_to_phm", sa.Boolean(), nullable=True),
+            sa.Column("special_notes", sa.TEXT(), nullable=True),
+            sa.Column("discharge_date", sa.DATETIME(), nullable=True),
+            sa.ForeignKeyConstraint(["mother_id"], ["mothers.id"], ),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index(op.f("ix_delivery_records_id"), "delivery_records", ["id"], unique=False)
+
+    if _missing("health_records"):
+        op.create_table("health_records",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("visit_date", sa.DATETIME(), nullable=False),
+            sa.Column("weight_kg", sa.DECIMAL(precision=5, scale=2), nullable=True),
+            sa.Column("blood_pressure", sa.String(length=20), nullable=True),
+            sa.Column("notes", sa.TEXT(), nullable=True),
+            sa.Column("mother_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["mother_id"], ["mothers.id"], ),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index(op.f("ix_health_records_id"), "health_records", ["id"], unique=False)
+
+    if _missing("pregnancy_records"):
+        op.create_table("pregnancy_records",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("mother_id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DATETIME(), nullable=True),
+            sa.Column("blood_group", sa.String(length=10), nullable=True),
+            sa.Column("bmi", sa.DECIMAL(precision=5, scale=2), nullable=True),
+            sa.Column("height_cm", sa.DECIMAL(precision=5, scale=2), nullable=True),
+            sa.Column("allergies", sa.TEXT(), nullable=True),
+            sa.Column("consanguinity", sa.Boolean(), nullable=True),
+            sa.Column("rubella_immunization", sa.Boolean(), nullable=True),
+            sa.Column("pre_pregnancy_screening", sa.Boolean(), nullable=True),
+            sa.Column("folic_acid", sa.Boolean(), nullable=True),
+            sa.Column("subfertility_history", sa.Boolean(), nullable=True),
+            sa.Column("identified_risks", sa.TEXT(), nullable=True),
+            sa.Column("gravidity", sa.Integer(), nullable=True),
+            sa.Column("parity", sa.Integer(), nullable=True),
+            sa.Column("living_children", sa.Integer(), nullable=True),
+            sa.Column("youngest_child_age", sa.String(length=50), nullable=True),
+            sa.Column("lrmp", sa.DATETIME(), nullable=True),
+            sa.Column("edd", sa.DATETIME(), nullable=True),
+            sa.Column("us_corrected_edd", sa.DATETIME(), nullable=True),
+            sa.Column("poa_at_registration", sa.String(length=50), nullable=True),
+            sa.ForeignKeyConstraint(["mother_id"], ["mothers.id"], ),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index(op.f("ix_pregnancy_records_id"), "pregnancy_records", ["id"], unique=False)
+
+def downgrade():
+    for table in ("pregnancy_records", "health_records", "delivery_records", "antenatal_plans", "mothers",
+                  "moh_officers", "midwives"):
+        op.drop_table(table)
@@ -0,0 +1,207 @@
+"""Tables and columns added while create_all was still the schema tool
+
+Revision ID: 0002_sync_analytics_outbox
+Revises: 0001_baseline
+Create Date: 2026-10-17
+
+create_all created the new tables on boot but never added columns or indexes
+to existing ones, so tables are only created here when missing. Columns and
+indexes are also skipped when present, for databases create_all built from
+the current models (DB_CREATE_ALL=1). Existing
+rows get change_seq numbers (parents first) and the sync counter starts after
+them. Rebuild the dashboard counters afterwards:
+    python -m sql_app.analytics
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision = "0002_sync_analytics_outbox"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+PRECISE_DATETIME = sa.DATETIME().with_variant(mysql.DATETIME(fsp=6), "mysql")
+
+# In delta-sync order: parents before children
+TRACKED_TABLES = ("mothers", "health_records", "pregnancy_records", "delivery_records", "antenatal_plans")
+
+SCHEDULE_INDEXES = {
+    "pregnancy_records": ("edd", "us_corrected_edd"),
+    "antenatal_plans": ("next_clinic_date", "class_1st_date", "class_2nd_date", "class_3rd_date"),
+}
+
+MOTHERS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS mothers_fts USING fts5("
+    "full_name, content='mothers', content_rowid='id', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS mothers_fts_ai AFTER INSERT ON mothers BEGIN "
+    "INSERT INTO mothers_fts(rowid, full_name) VALUES (new.id, new.full_name); END",
+    "CREATE TRIGGER IF NOT EXISTS mothers_fts_ad AFTER DELETE ON mothers BEGIN "
+    "INSERT INTO mothers_fts(mothers_fts, rowid, full_name) VALUES ('delete', old.id, old.full_name); END",
+    "CREATE TRIGGER IF NOT EXISTS mothers_fts_au AFTER UPDATE OF full_name ON mothers BEGIN "
+    "INSERT INTO mothers_fts(mothers_fts, rowid, full_name) VALUES ('delete', old.id, old.full_name); "
+    "INSERT INTO mothers_fts(rowid, full_name) VALUES (new.id, new.full_name); END",
+    "INSERT INTO mothers_fts(mothers_fts) VALUES ('rebuild')",
+)
+
+
+def _missing(table):
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def _missing_column(table, column):
+    return column not in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _missing_index(table, name):
+    return name not in {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _add_column(table, column):
+    if _missing_column(table, column.name):
+        op.add_column(table, column)
+
+
+def _create_index(name, table, columns, **kw):
+    if _missing_index(table, name):
+        op.create_index(name, table, columns, **kw)
+
+
+def _create_new_tables():
+    if _missing("email_outbox"):
+        op.create_table("email_outbox",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("to_email", sa.String(length=255), nullable=False),
+            sa.Column("subject", sa.String(length=255), nullable=False),
+            sa.Column("body", sa.TEXT(), nullable=True),
+            sa.Column("status", sa.String(length=20), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("next_attempt_at", sa.DATETIME(), nullable=False),
+            sa.Column("last_error", sa.TEXT(), nullable=True),
+            sa.Column("created_at", sa.DATETIME(), nullable=True),
+            sa.Column("sent_at", sa.DATETIME(), nullable=True),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index("ix_email_outbox_id", "email_outbox", ["id"])
+        op.create_index("ix_email_outbox_status_next_attempt", "email_outbox", ["status", "next_attempt_at"])
+
+    if _missing("idempotency_keys"):
+        op.create_table("idempotency_keys",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("midwife_id", sa.Integer(), nullable=False),
+            sa.Column("key", sa.String(length=100), nullable=False),
+            sa.Column("response", sa.TEXT(), nullable=False),
+            sa.Column("created_at", sa.DATETIME(), nullable=False),
+            sa.ForeignKeyConstraint(["midwife_id"], ["midwives.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("midwife_id", "key", name="uq_idempotency_keys_midwife_key")
+        )
+        op.create_index("ix_idempotency_keys_id", "idempotency_keys", ["id"])
+        op.create_index("ix_idempotency_keys_created_at", "idempotency_keys", ["created_at"])
+
+    if _missing("sync_counter"):
+        op.create_table("sync_counter",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("value", sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.execute("INSERT INTO sync_counter (id, value) VALUES (1, 0)")
+
+    if _missing("sync_tombstones"):
+        op.create_table("sync_tombstones",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("table_name", sa.String(length=50), nullable=False),
+            sa.Column("row_id", sa.Integer(), nullable=False),
+            sa.Column("midwife_id", sa.Integer(), nullable=False),
+            sa.Column("change_seq", sa.BigInteger(), nullable=False),
+            sa.Column("deleted_at", sa.DATETIME(), nullable=False),
+            sa.ForeignKeyConstraint(["midwife_id"], ["midwives.id"]),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index("ix_sync_tombstones_id", "sync_tombstones", ["id"])
+        op.create_index("ix_sync_tombstones_midwife_id_change_seq", "sync_tombstones", ["midwife_id", "change_seq"])
+
+    if _missing("area_monthly_stats"):
+        op.create_table("area_monthly_stats",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("moh_area", sa.String(length=100), nullable=False),
+            sa.Column("month", sa.Date(), nullable=False),
+            sa.Column("metric", sa.String(length=50), nullable=False),
+            sa.Column("dimension", sa.String(length=50), nullable=False),
+            sa.Column("value", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("moh_area", "month", "metric", "dimension", name="uq_area_monthly_stats_key")
+        )
+        op.create_index("ix_area_monthly_stats_id", "area_monthly_stats", ["id"])
+
+
+def _backfill_change_seq():
+    bind = op.get_bind()
+    now = datetime.utcnow()
+    seq = bind.execute(sa.text("SELECT value FROM sync_counter WHERE id = 1")).scalar() or 0
+    for table in TRACKED_TABLES:
+        last_id = bind.execute(sa.text(f"SELECT MAX(id) FROM {table}")).scalar()
+        if last_id is None:
+            continue
+        bind.execute(
+            sa.text(f"UPDATE {table} SET change_seq = id + :offset, updated_at = :now WHERE change_seq IS NULL"),
+            {"offset": seq, "now": now},
+        )
+        seq += last_id
+    bind.execute(sa.text("UPDATE sync_counter SET value = :seq WHERE id = 1"), {"seq": seq})
+
+
+def upgrade():
+    _create_new_tables()
+
+    _add_column("midwives", sa.Column("updated_at", PRECISE_DATETIME, nullable=True))
+    _add_column("mothers", sa.Column("created_at", sa.DATETIME(), nullable=True))
+    for table in TRACKED_TABLES:
+        _add_column(table, sa.Column("updated_at", sa.DATETIME(), nullable=True))
+        _add_column(table, sa.Column("change_seq", sa.BigInteger(), nullable=True))
+        _create_index(f"ix_{table}_change_seq", table, ["change_seq"])
+    _create_index("ix_mothers_midwife_id_change_seq", "mothers", ["midwife_id", "change_seq"])
+
+    for table, columns in SCHEDULE_INDEXES.items():
+        for column in columns:
+            _create_index(f"ix_{table}_{column}_mother_id", table, [column, "mother_id"])
+
+    # Name search (sql_app/search.py)
+    dialect = op.get_bind().dialect.name
+    if dialect == "mysql":
+        _create_index("ix_mothers_full_name_fulltext", "mothers", ["full_name"],
+                      mysql_prefix="FULLTEXT", mysql_with_parser="ngram")
+    elif dialect == "sqlite":
+        for statement in MOTHERS_FTS_DDL:
+            op.execute(statement)
+
+    _backfill_change_seq()
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "mysql":
+        op.drop_index("ix_mothers_full_name_fulltext", table_name="mothers")
+    elif dialect == "sqlite":
+        for trigger in ("mothers_fts_ai", "mothers_fts_ad", "mothers_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS mothers_fts")
+
+    for table, columns in SCHEDULE_INDEXES.items():
+        for column in columns:
+            op.drop_index(f"ix_{table}_{column}_mother_id", table_name=table)
+    op.drop_index("ix_mothers_midwife_id_change_seq", table_name="mothers")
+    for table in TRACKED_TABLES:
+        op.drop_index(f"ix_{table}_change_seq", table_name=table)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("change_seq")
+            batch.drop_column("updated_at")
+            if table == "mothers":
+                batch.drop_column("created_at")
+    with op.batch_alter_table("midwives") as batch:
+        batch.drop_column("updated_at")
+
+    for table in ("area_monthly_stats", "sync_tombstones", "sync_counter", "idempotency_keys", "email_outbox"):
+        op.drop_table(table)
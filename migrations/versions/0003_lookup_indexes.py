@@ -0,0 +1,60 @@
+"""Indexes for the hot lookup columns
+
+Revision ID: 0003_lookup_indexes
+Revises: 0002_sync_analytics_outbox
+Create Date: 2026-10-17
+
+- midwives: nic / email / phone_number (the conflict check in
+  crud.register_full_midwife, one index per OR branch) and assigned_moh_area
+  (MOH-area scoping: search, schedule, analytics).
+- mothers.midwife_id: a midwife's caseload, paged by id.
+- health_records (mother_id, visit_date): a mother's visits, paged by
+  (visit_date, id). The other record tables are paged by id, so mother_id alone.
+
+Indexes that already exist (a database create_all built from the current
+models) are skipped.
+
+On MySQL the index the server added implicitly for each mother_id /
+midwife_id foreign key is dropped by the server once these exist, so the
+downgrade leaves those in place there.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_lookup_indexes"
+down_revision = "0002_sync_analytics_outbox"
+branch_labels = None
+depends_on = None
+
+# index name -> (table, columns)
+INDEXES = {
+    "ix_midwives_nic": ("midwives", ["nic"]),
+    "ix_midwives_email": ("midwives", ["email"]),
+    "ix_midwives_phone_number": ("midwives", ["phone_number"]),
+    "ix_midwives_assigned_moh_area": ("midwives", ["assigned_moh_area"]),
+    "ix_mothers_midwife_id": ("mothers", ["midwife_id"]),
+    "ix_health_records_mother_id_visit_date": ("health_records", ["mother_id", "visit_date"]),
+    "ix_pregnancy_records_mother_id": ("pregnancy_records", ["mother_id"]),
+    "ix_delivery_records_mother_id": ("delivery_records", ["mother_id"]),
+    "ix_antenatal_plans_mother_id": ("antenatal_plans", ["mother_id"]),
+}
+# Back a foreign key (the only index on its column once the implicit one is gone)
+FOREIGN_KEY_INDEXES = {
+    "ix_mothers_midwife_id", "ix_health_records_mother_id_visit_date", "ix_pregnancy_records_mother_id",
+    "ix_delivery_records_mother_id", "ix_antenatal_plans_mother_id",
+}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, (table, columns) in INDEXES.items():
+        if name not in {i["name"] for i in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    mysql = op.get_bind().dialect.name == "mysql"
+    for name, (table, _) in INDEXES.items():
+        if mysql and name in FOREIGN_KEY_INDEXES:
+            continue
+        op.drop_index(name, table_name=table)
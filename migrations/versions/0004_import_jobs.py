@@ -0,0 +1,44 @@
+"""Bulk import jobs
+
+Revision ID: 0004_import_jobs
+Revises: 0003_lookup_indexes
+Create Date: 2026-10-18
+
+POST /mothers/import now runs in the background and reports through this
+table. Skipped when the table exists (a database create_all built from the
+current models).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_import_jobs"
+down_revision = "0003_lookup_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("import_jobs"):
+        return
+    op.create_table("import_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("midwife_id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=50), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("total_rows", sa.Integer(), nullable=False),
+        sa.Column("inserted", sa.Integer(), nullable=False),
+        sa.Column("failed", sa.Integer(), nullable=False),
+        sa.Column("report", sa.TEXT(), nullable=True),
+        sa.Column("error", sa.TEXT(), nullable=True),
+        sa.Column("created_at", sa.DATETIME(), nullable=False),
+        sa.Column("started_at", sa.DATETIME(), nullable=True),
+        sa.Column("finished_at", sa.DATETIME(), nullable=True),
+        sa.ForeignKeyConstraint(["midwife_id"], ["midwives.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_import_jobs_id", "import_jobs", ["id"])
+    op.create_index("ix_import_jobs_midwife_id", "import_jobs", ["midwife_id"])
+
+
+def downgrade():
+    op.drop_table("import_jobs")
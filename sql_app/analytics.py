@@ -0,0 +1,302 @@
+import os
+from collections import Counter
+from datetime import date, datetime
+
+from sqlalchemy import delete, event, inspect, insert, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import models
+
+# --- MOH-area dashboard counters ---
+# area_monthly_stats holds one counter per (moh_area, month, metric, dimension).
+# Every flush that inserts, edits or deletes a mother / pregnancy record /
+# delivery record adds +1/-1 deltas to the counters it affects (an UPSERT in
+# the same transaction), so the dashboard reads O(areas x months) rows and
+# never scans the record tables.
+#
+# The counters follow the area of the mother's midwife. A flush that moves
+# rows between areas (a mother to another midwife, a record to another
+# mother, a midwife to another area) recounts the areas involved from the
+# base tables instead of applying deltas. On an existing database, build them
+# all once:
+#     python -m sql_app.analytics
+
+LOW_BIRTH_WEIGHT_KG = float(os.getenv("LOW_BIRTH_WEIGHT_KG", "2.5"))
+LOW_APGAR_SCORE = int(os.getenv("LOW_APGAR_SCORE", "7"))
+
+_stats = models.AreaMonthlyStat.__table__
+
+
+def _month(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+# --- What each row counts towards: list of (metric, dimension, month) ---
+# `row` is anything with the model's attributes (ORM object or a values dict wrapper)
+def _mother_keys(row):
+    return [("mothers_registered", "", _month(row.created_at))]
+
+
+def _pregnancy_keys(row):
+    keys = [("pregnancies_registered", "", _month(row.created_at))]
+    if row.identified_risks and row.identified_risks.strip():
+        keys.append(("high_risk_pregnancies", "", _month(row.created_at)))
+    # Bucketed by the due month, so future months show upcoming EDDs
+    keys.append(("edd_due", "", _month(row.us_corrected_edd or row.edd)))
+    return keys
+
+
+def _delivery_keys(row):
+    month = _month(row.delivery_date or row.created_at)
+    keys = [("deliveries", (row.delivery_mode or "unknown")[:50], month)]
+    if row.birth_weight is not None and float(row.birth_weight) < LOW_BIRTH_WEIGHT_KG:
+        keys.append(("low_birth_weight", "", month))
+    if row.apgar_score is not None and row.apgar_score < LOW_APGAR_SCORE:
+        keys.append(("low_apgar_score", "", month))
+    return keys
+
+
+KEY_FUNCTIONS = {
+    models.Mother: _mother_keys,
+    models.PregnancyRecord: _pregnancy_keys,
+    models.DeliveryRecord: _delivery_keys,
+}
+
+
+class _Values:
+    # Attribute access over a plain dict (bulk import rows, old values from history)
+    def __init__(self, values):
+        self.__dict__.update(values)
+
+    def __getattr__(self, name):
+        return None
+
+
+def _keys(model, row):
+    return [key for key in KEY_FUNCTIONS[model](row) if key[2] is not None]
+
+
+def _old_values(obj):
+    # Pre-flush values of an updated object: history.deleted holds the replaced value
+    state = inspect(obj)
+    values = {}
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if history.deleted:
+            values[attr.key] = history.deleted[0]
+        else:
+            values[attr.key] = getattr(obj, attr.key)
+    return _Values(values)
+
+
+def _midwife_ids(connection, model, rows):
+    # row -> midwife id (records go through their mother)
+    if model is models.Mother:
+        return {id(row): row.midwife_id for row in rows}
+    mother_ids = {row.mother_id for row in rows if row.mother_id is not None}
+    owners = {}
+    if mother_ids:
+        owners = dict(connection.execute(
+            select(models.Mother.id, models.Mother.midwife_id).where(models.Mother.id.in_(mother_ids))
+        ).all())
+    return {id(row): owners.get(row.mother_id) for row in rows}
+
+
+def _areas(connection, midwife_ids):
+    midwife_ids = {m for m in midwife_ids if m is not None}
+    if not midwife_ids:
+        return {}
+    return dict(connection.execute(
+        select(models.Midwife.id, models.Midwife.assigned_moh_area).where(models.Midwife.id.in_(midwife_ids))
+    ).all())
+
+
+# --- Applying deltas ---
+def _upsert(connection, deltas):
+    rows = [
+        {"moh_area": area, "month": month, "metric": metric, "dimension": dimension, "value": value}
+        for (area, month, metric, dimension), value in deltas.items() if value
+    ]
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(_stats)
+        connection.execute(stmt.on_duplicate_key_update(value=_stats.c.value + stmt.inserted.value), rows)
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(_stats)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=["moh_area", "month", "metric", "dimension"],
+            set_={"value": _stats.c.value + stmt.excluded.value},
+        ), rows)
+    else:
+        for row in rows:
+            key = (
+                (_stats.c.moh_area == row["moh_area"]) & (_stats.c.month == row["month"])
+                & (_stats.c.metric == row["metric"]) & (_stats.c.dimension == row["dimension"])
+            )
+            updated = connection.execute(update(_stats).where(key).values(value=_stats.c.value + row["value"]))
+            if updated.rowcount == 0:
+                connection.execute(insert(_stats), row)
+
+
+def _collect(connection, model, changes, deltas):
+    # changes: list of (row, sign)
+    owners = _midwife_ids(connection, model, [row for row, _ in changes])
+    areas = _areas(connection, owners.values())
+    for row, sign in changes:
+        area = areas.get(owners.get(id(row)))
+        if not area:
+            continue
+        for metric, dimension, month in _keys(model, row):
+            deltas[(area, month, metric, dimension)] += sign
+
+
+# The flush hook needs each changed column's previous value, also when the
+# object was expired (e.g. by a commit) before the assignment: load it then
+def _keep_history(target, value, oldvalue, initiator):
+    pass
+
+
+_TRACKED_ATTRIBUTES = [
+    getattr(model, column.key)
+    for model in KEY_FUNCTIONS for column in model.__table__.columns if column.name != "hashed_password"
+]
+for _attribute in _TRACKED_ATTRIBUTES + [models.Midwife.assigned_moh_area]:
+    event.listen(_attribute, "set", _keep_history, active_history=True)
+
+
+# Mothers belong to a midwife, records to a mother
+def _owner(model, row):
+    return row.midwife_id if model is models.Mother else row.mother_id
+
+
+def _moved_areas(connection, model, old, new):
+    if model is models.Mother:
+        return set(_areas(connection, [old.midwife_id, new.midwife_id]).values())
+    owners = _midwife_ids(connection, model, [old, new])
+    return set(_areas(connection, owners.values()).values())
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_flush(session, flush_context):
+    changes = {model: [] for model in KEY_FUNCTIONS}
+    moves = [] # (model, old values, object) whose owner changed
+    moved_areas = set()
+    for obj in session.new:
+        if type(obj) in changes:
+            changes[type(obj)].append((obj, 1))
+    for obj in session.dirty:
+        if isinstance(obj, models.Midwife):
+            history = inspect(obj).attrs.assigned_moh_area.history
+            if history.deleted:
+                moved_areas.update([history.deleted[0], obj.assigned_moh_area])
+            continue
+        if type(obj) in changes and session.is_modified(obj, include_collections=False):
+            old = _old_values(obj)
+            if _owner(type(obj), old) != _owner(type(obj), obj):
+                moves.append((type(obj), old, obj))
+                continue
+            if _keys(type(obj), old) == _keys(type(obj), obj):
+                continue # edit doesn't touch any counted field
+            changes[type(obj)].append((old, -1))
+            changes[type(obj)].append((obj, 1))
+    for obj in session.deleted:
+        if type(obj) in changes:
+            changes[type(obj)].append((obj, -1))
+    if not any(changes.values()) and not moves and not moved_areas:
+        return
+
+    connection = session.connection()
+    for model, old, obj in moves:
+        moved_areas |= _moved_areas(connection, model, old, obj)
+    moved_areas.discard(None)
+    moved_areas.discard("")
+
+    deltas = Counter()
+    for model, model_changes in changes.items():
+        if model_changes:
+            _collect(connection, model, model_changes, deltas)
+    if moved_areas:
+        # Everything is flushed, so the recount already includes this flush's
+        # other changes in those areas: drop their deltas
+        deltas = Counter({key: value for key, value in deltas.items() if key[0] not in moved_areas})
+        connection.execute(delete(_stats).where(_stats.c.moh_area.in_(moved_areas)))
+        _upsert(connection, count_rows(connection, moved_areas))
+    _upsert(connection, deltas)
+
+
+# Hook for Core bulk INSERTs (bulk_import.py), which skip the flush events
+def rows_inserted(db: Session, model, rows):
+    if model not in KEY_FUNCTIONS or not rows:
+        return
+    connection = db.connection()
+    deltas = Counter()
+    _collect(connection, model, [(_Values(row), 1) for row in rows], deltas)
+    _upsert(connection, deltas)
+
+
+# --- Dashboard read ---
+def area_stats(db: Session, moh_area: str, start: date, end: date, metrics=None):
+    stmt = select(_stats.c.month, _stats.c.metric, _stats.c.dimension, _stats.c.value).where(
+        _stats.c.moh_area == moh_area,
+        _stats.c.month >= _month(start),
+        _stats.c.month <= _month(end),
+        _stats.c.value != 0,
+    )
+    if metrics:
+        stmt = stmt.where(_stats.c.metric.in_(metrics))
+    stmt = stmt.order_by(_stats.c.month, _stats.c.metric, _stats.c.dimension)
+    return [dict(row._mapping) for row in db.execute(stmt)]
+
+
+# --- Recounting from the base tables ---
+# Counters for every area, or only for `moh_areas`, straight from the rows
+def count_rows(connection, moh_areas=None, batch_size: int = 1000):
+    midwives = select(models.Midwife.id, models.Midwife.assigned_moh_area)
+    if moh_areas is not None:
+        midwives = midwives.where(models.Midwife.assigned_moh_area.in_(moh_areas))
+    areas = dict(connection.execute(midwives).all())
+    mother_owner = {}
+    totals = Counter()
+    for model in KEY_FUNCTIONS:
+        columns = [c for c in model.__table__.columns if c.name != "hashed_password"]
+        stmt = select(*columns)
+        if moh_areas is not None:
+            mothers = select(models.Mother.id).where(models.Mother.midwife_id.in_(list(areas)))
+            stmt = stmt.where(models.Mother.midwife_id.in_(list(areas)) if model is models.Mother
+                              else model.mother_id.in_(mothers))
+        result = connection.execute(stmt.execution_options(yield_per=batch_size))
+        for row in result:
+            if model is models.Mother:
+                mother_owner[row.id] = row.midwife_id
+                area = areas.get(row.midwife_id)
+            else:
+                area = areas.get(mother_owner.get(row.mother_id))
+            if not area:
+                continue
+            for metric, dimension, month in _keys(model, row):
+                totals[(area, month, metric, dimension)] += 1
+    return totals
+
+
+# Full rebuild (backfill an existing database)
+def rebuild(db: Session, batch_size: int = 1000):
+    totals = count_rows(db.connection(), batch_size=batch_size)
+    db.execute(delete(_stats))
+    _upsert(db.connection(), totals)
+    db.commit()
+    return len(totals)
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    with SessionLocal() as session:
+        print(f"[ANALYTICS] Rebuilt {rebuild(session)} area/month counters")
@@ -0,0 +1,417 @@
+import codecs
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from . import analytics, crud, models, record_cache, schemas, sync
+from .database import SessionLocal
+
+# --- Bulk import of mothers / clinic records (CSV or JSON lines) ---
+# Rows are read one at a time from the uploaded file, validated with the
+# normal *Create schemas, and inserted with one executemany INSERT per chunk,
+# each chunk in its own transaction. A bad row never sinks the whole upload:
+# it is reported by line number and skipped.
+#
+# The upload runs as a background job (see "Background jobs" below): the
+# request only spools the file and returns the job id, and the client polls
+# GET /mothers/import/{id} for progress and the final report.
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+
+# kind -> (validation schema, model)
+KINDS = {
+    "mothers": (schemas.MotherCreate, models.Mother),
+    "health_records": (schemas.HealthRecordCreate, models.HealthRecord),
+    "pregnancy_records": (schemas.PregnancyRecordCreate, models.PregnancyRecord),
+    "delivery_records": (schemas.DeliveryRecordCreate, models.DeliveryRecord),
+    "antenatal_plans": (schemas.AntenatalPlanCreate, models.AntenatalPlan),
+}
+
+
+class RowError(Exception):
+    pass
+
+
+# The whole upload is unusable (rejected before any row is inserted)
+class FileError(Exception):
+    pass
+
+
+# Decodes the upload once, block by block, so a file that isn't UTF-8 (e.g. a
+# cp1252 "CSV" saved by Excel) is rejected up front instead of failing halfway
+# through with earlier chunks already committed. Rewinds it for iter_rows.
+def check_encoding(fileobj):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    offset = 0
+    try:
+        for block in iter(lambda: fileobj.read(64 * 1024), b""):
+            decoder.decode(block)
+            offset += len(block)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        raise FileError(
+            f"File is not UTF-8 (invalid byte at offset {offset + e.start}); "
+            "save it as \"CSV UTF-8\" and upload it again"
+        )
+    finally:
+        fileobj.seek(0)
+
+
+# --- Parsing: yields (line_number, dict) or (line_number, RowError) ---
+def iter_rows(fileobj, fmt: str):
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                # e.g. a NUL byte or an oversized field; the reader carries on with the next line
+                yield reader.line_num, RowError(f"Invalid CSV: {e}")
+                continue
+            # Empty CSV cells mean "not provided"
+            yield reader.line_num, {key: (value if value != "" else None) for key, value in row.items() if key}
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield line_number, RowError(f"Invalid JSON: {e}")
+                continue
+            if not isinstance(data, dict):
+                yield line_number, RowError("Each line must be a JSON object")
+                continue
+            yield line_number, data
+
+
+def detect_format(filename: str, content_type: str):
+    name = (filename or "").lower()
+    if name.endswith((".jsonl", ".ndjson")) or "ndjson" in (content_type or "") or "jsonl" in (content_type or ""):
+        return "jsonl"
+    return "csv"
+
+
+def _describe(error: ValidationError):
+    return "; ".join(f"{'.'.join(str(p) for p in e['loc']) or 'row'}: {e['msg']}" for e in error.errors())
+
+
+# --- Per-kind preparation: turns validated rows into INSERT parameter dicts ---
+def _prepare_mothers(db: Session, midwife_id: int, rows, seen_nics, report):
+    nics = [data.nic for _, data, _ in rows if data.nic]
+    existing = set()
+    if nics:
+        existing = {
+            nic for (nic,) in db.query(models.Mother.nic).filter(models.Mother.nic.in_(nics))
+        }
+
+    accepted = []
+    for line, data, _ in rows:
+        if data.nic and (data.nic in existing or data.nic in seen_nics):
+            report.add_error(line, f"Mother with NIC {data.nic} already registered")
+            continue
+        if data.nic:
+            seen_nics.add(data.nic)
+        accepted.append((line, data))
+
+    # bcrypt the whole chunk in parallel on the hashing pool
+    hashes = crud.get_password_hashes([data.password for _, data in accepted])
+    return [
+        (line, {
+            "full_name": data.full_name,
+            "nic": data.nic,
+            "address": data.address,
+            "contact_number": data.contact_number,
+            "hashed_password": hashed,
+            "midwife_id": midwife_id,
+        })
+        for (line, data), hashed in zip(accepted, hashes)
+    ]
+
+
+def _mother_ref(raw):
+    # -> ("id", int) / ("nic", str); CSV cells arrive as strings
+    if raw.get("mother_id") not in (None, ""):
+        try:
+            return "id", int(raw["mother_id"])
+        except (TypeError, ValueError):
+            raise RowError("mother_id must be an integer")
+    if raw.get("mother_nic"):
+        return "nic", str(raw["mother_nic"])
+    raise RowError("mother_id or mother_nic is required")
+
+
+def _prepare_records(db: Session, midwife_id: int, rows, report):
+    refs = []
+    for line, data, raw in rows:
+        try:
+            refs.append((line, data, _mother_ref(raw)))
+        except RowError as e:
+            report.add_error(line, str(e))
+
+    # Resolve every referenced mother (and check ownership) with one query per chunk
+    ids = {value for _, _, (field, value) in refs if field == "id"}
+    nics = {value for _, _, (field, value) in refs if field == "nic"}
+    owned = {}
+    if ids or nics:
+        clauses = []
+        if ids:
+            clauses.append(models.Mother.id.in_(ids))
+        if nics:
+            clauses.append(models.Mother.nic.in_(nics))
+        found = (
+            db.query(models.Mother.id, models.Mother.nic)
+            .filter(models.Mother.midwife_id == midwife_id, or_(*clauses))
+            .all()
+        )
+        for mother_id, nic in found:
+            owned[("id", mother_id)] = mother_id
+            if nic:
+                owned[("nic", nic)] = mother_id
+
+    prepared = []
+    for line, data, ref in refs:
+        mother_id = owned.get(ref)
+        if mother_id is None:
+            report.add_error(line, "Mother not found among your registered mothers")
+            continue
+        prepared.append((line, {**data.model_dump(), "mother_id": mother_id}))
+    return prepared
+
+
+class _Report:
+    def __init__(self, kind):
+        self.kind = kind
+        self.total_rows = 0
+        self.inserted = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.errors.append(schemas.ImportRowError(row=line, error=message))
+
+    def result(self):
+        return schemas.ImportReport(
+            kind=self.kind,
+            total_rows=self.total_rows,
+            inserted=self.inserted,
+            failed=len(self.errors),
+            errors=self.errors,
+        )
+
+
+def _insert_chunk(db: Session, model, kind: str, prepared, report):
+    params = [params for _, params in prepared]
+    if "created_at" in model.__table__.c:
+        now = datetime.utcnow()
+        for row in params:
+            row.setdefault("created_at", now)
+    try:
+        # Core INSERTs skip the ORM flush hooks: stamp the sync columns and
+        # update the analytics counters explicitly
+        db.execute(insert(model), sync.stamp_rows(db, params))
+        analytics.rows_inserted(db, model, params)
+        db.commit()
+        report.inserted += len(prepared)
+        if kind != "mothers":
+            record_cache.invalidate_many((row["mother_id"], kind) for row in params)
+    except SQLAlchemyError as e:
+        db.rollback()
+        message = f"Chunk rejected by database: {e.__class__.__name__}"
+        for line, _ in prepared:
+            report.add_error(line, message)
+
+
+# progress(report) is called after each chunk (the job runner records the counts)
+def import_rows(db: Session, midwife_id: int, kind: str, rows, progress=None) -> schemas.ImportReport:
+    create_schema, model = KINDS[kind]
+    report = _Report(kind)
+    seen_nics = set()
+
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, IMPORT_CHUNK_SIZE))
+        if not chunk:
+            break
+        report.total_rows += len(chunk)
+
+        valid = []
+        for line, raw in chunk:
+            if isinstance(raw, RowError):
+                report.add_error(line, str(raw))
+                continue
+            try:
+                valid.append((line, create_schema.model_validate(raw), raw))
+            except ValidationError as e:
+                report.add_error(line, _describe(e))
+
+        if kind == "mothers":
+            prepared = _prepare_mothers(db, midwife_id, valid, seen_nics, report)
+        else:
+            prepared = _prepare_records(db, midwife_id, valid, report)
+        if prepared:
+            _insert_chunk(db, model, kind, prepared, report)
+        if progress is not None:
+            progress(report)
+
+    report.errors.sort(key=lambda e: e.row)
+    return report.result()
+
+
+# --- Background jobs ---
+# Hashing a chunk of mothers takes ~250 ms of CPU per row, far too long to hold
+# a request open. start_job() spools the upload to a temp file, checks its
+# encoding and records an import_jobs row; the import itself runs on this
+# worker's job thread(s) and hashes on the import pool in hashing.py, never
+# the login pool. At most IMPORT_MAX_PENDING jobs (queued + running) are
+# accepted per worker; past that start_job raises Busy (503 + Retry-After).
+# A job cut off by a killed worker stays "running": upload the file again
+# (rows already imported are reported as duplicates / rejected by NIC).
+
+IMPORT_JOB_WORKERS = int(os.getenv("IMPORT_JOB_WORKERS", "1"))
+IMPORT_MAX_PENDING = int(os.getenv("IMPORT_MAX_PENDING", "4"))
+IMPORT_RETRY_AFTER = 30
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+_jobs = None
+_jobs_lock = threading.Lock()
+_pending = 0
+
+
+class Busy(Exception):
+    pass
+
+
+def _start():
+    global _jobs
+    with _jobs_lock:
+        if _jobs is None:
+            _jobs = ThreadPoolExecutor(max_workers=IMPORT_JOB_WORKERS, thread_name_prefix="bulk-import")
+
+
+def _release():
+    global _pending
+    with _jobs_lock:
+        _pending -= 1
+
+
+def start_job(db: Session, midwife_id: int, kind: str, upload, fmt: str) -> models.ImportJob:
+    global _pending
+    with _jobs_lock:
+        if _pending >= IMPORT_MAX_PENDING:
+            raise Busy()
+        _pending += 1
+
+    spooled = None
+    try:
+        # The request's UploadFile is closed once the response is sent
+        spooled = tempfile.TemporaryFile()
+        shutil.copyfileobj(upload, spooled)
+        spooled.seek(0)
+        check_encoding(spooled)
+
+        job = models.ImportJob(
+            midwife_id=midwife_id,
+            kind=kind,
+            status=JOB_QUEUED,
+            total_rows=0,
+            inserted=0,
+            failed=0,
+            created_at=datetime.utcnow(),
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        _start()
+        _jobs.submit(_run_job, job.id, midwife_id, kind, spooled, fmt)
+    except BaseException:
+        if spooled is not None:
+            spooled.close()
+        _release()
+        raise
+    return job
+
+
+def _run_job(job_id: int, midwife_id: int, kind: str, fileobj, fmt: str):
+    try:
+        with SessionLocal() as db:
+            job = db.get(models.ImportJob, job_id)
+            job.status = JOB_RUNNING
+            job.started_at = datetime.utcnow()
+            db.commit()
+
+            def progress(report):
+                job.total_rows = report.total_rows
+                job.inserted = report.inserted
+                job.failed = len(report.errors)
+                db.commit()
+
+            try:
+                report = import_rows(db, midwife_id, kind, iter_rows(fileobj, fmt), progress=progress)
+            except Exception as e:
+                db.rollback()
+                print(f"Import job {job_id} failed: {e!r}")
+                job.status = JOB_FAILED
+                job.error = f"{e.__class__.__name__}: {e}"[:1000]
+            else:
+                job.status = JOB_DONE
+                job.total_rows = report.total_rows
+                job.inserted = report.inserted
+                job.failed = report.failed
+                job.report = report.model_dump_json()
+            job.finished_at = datetime.utcnow()
+            db.commit()
+    finally:
+        fileobj.close()
+        _release()
+
+
+def get_job(db: Session, midwife_id: int, job_id: int):
+    return (
+        db.query(models.ImportJob)
+        .filter(models.ImportJob.id == job_id, models.ImportJob.midwife_id == midwife_id)
+        .first()
+    )
+
+
+def job_view(job: models.ImportJob) -> schemas.ImportJob:
+    return schemas.ImportJob(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        total_rows=job.total_rows,
+        inserted=job.inserted,
+        failed=job.failed,
+        report=schemas.ImportReport.model_validate_json(job.report) if job.report else None,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+# Lets accepted jobs finish (called at shutdown)
+def stop():
+    global _jobs
+    with _jobs_lock:
+        jobs, _jobs = _jobs, None
+    if jobs is not None:
+        jobs.shutdown(wait=True)
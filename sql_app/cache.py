@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# --- Key/value cache backends ---
+# Values are always bytes so the same caller code works with the in-process
+# backend (per worker) and with a shared store that keeps all gunicorn
+# workers coherent.
+
+
+class MemoryBackend:
+    # Thread-safe LRU with per-entry TTL, bounded by entry count and/or total bytes
+    def __init__(self, max_entries: int = 10000, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict() # key -> (expires_at, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if self.max_bytes is not None and len(value) > self.max_bytes:
+                return
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._bytes += len(value)
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._data)))
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, value = self._data.pop(key)
+        self._bytes -= len(value)
+
+
+class RedisBackend:
+    # Works with any redis-py compatible client (a local fake in tests)
+    def __init__(self, client, prefix: str = "midwife:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.client.set(self.prefix + key, value, px=max(int(ttl * 1000), 1))
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+# No URL -> in-process cache; redis://... -> shared store (needs the `redis` package)
+def backend_from_url(url: Optional[str], prefix: str, **memory_options):
+    if not url:
+        return MemoryBackend(**memory_options)
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError(f"Cache URL {url!r} needs the 'redis' package (pip install redis)")
+    return RedisBackend(redis.Redis.from_url(url), prefix=prefix)
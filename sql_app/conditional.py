@@ -0,0 +1,133 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+
+from . import models
+
+# --- Conditional GETs (ETag / If-None-Match, Last-Modified / If-Modified-Since) ---
+# A read endpoint first runs a cheap "version probe" (row count, highest
+# change_seq, latest updated_at of the rows it would return), hashes it into
+# an ETag together with the path, query string and caller, and answers
+# 304 Not Modified when the client already has that version. The full query
+# and the serialization only run on a 200.
+#
+#     version = conditional.probe(db, *conditional.rows_version(models.HealthRecord, models.HealthRecord.mother_id == mother_id))
+#     not_modified = conditional.check(request, response, version, current_midwife.id)
+#     if not_modified:
+#         return not_modified
+
+# Bump when a response schema changes shape, so old ETags stop matching
+ETAG_SCHEMA_VERSION = "1"
+
+CACHE_CONTROL = "private, no-cache"
+
+
+# count / max(change_seq) / max(updated_at) of a change-tracked model's rows matching `where`.
+# The count catches deletes, change_seq catches inserts and edits.
+def rows_version(model, *where):
+    def scalar(column):
+        return select(column).select_from(model).where(*where).scalar_subquery()
+    return [scalar(func.count()), scalar(func.max(model.change_seq)), scalar(func.max(model.updated_at))]
+
+
+# Same for the midwives table (no change_seq; updated_at is set on every ORM update)
+def midwives_version():
+    return [
+        select(func.count()).select_from(models.Midwife).scalar_subquery(),
+        select(func.max(models.Midwife.updated_at)).scalar_subquery(),
+    ]
+
+
+# Moves on with any insert/update/delete of any change-tracked row anywhere (see sync.py)
+def global_change_version():
+    counter = models.SyncCounter.__table__
+    return [select(counter.c.value).where(counter.c.id == 1).scalar_subquery()]
+
+
+# All the probes go out as one SELECT of scalar subqueries
+def probe(db, *expressions):
+    return tuple(db.execute(select(*expressions)).one())
+
+
+async def probe_async(db, *expressions):
+    return tuple((await db.execute(select(*expressions))).one())
+
+
+# Probe result as JSON-safe values (datetimes -> ISO strings), e.g. to cache it
+# with a response; check() gives the same ETag for either form.
+def plain_version(version):
+    return [value.isoformat() if isinstance(value, datetime) else value for value in version]
+
+
+def _etag(request: Request, version, parts):
+    hasher = hashlib.sha1()
+    for part in (ETAG_SCHEMA_VERSION, request.url.path, str(request.query_params), *parts, *plain_version(version)):
+        hasher.update(repr(part).encode("utf-8"))
+        hasher.update(b"\0")
+    return f'W/"{hasher.hexdigest()}"'
+
+
+def _last_modified(version) -> Optional[datetime]:
+    # Strings in a version are the ISO datetimes from plain_version()
+    stamps = [
+        value if isinstance(value, datetime) else datetime.fromisoformat(value)
+        for value in version if isinstance(value, (datetime, str))
+    ]
+    if not stamps:
+        return None
+    # Stored as naive UTC; HTTP dates have whole seconds
+    return max(stamps).replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def _etag_matches(header: str, etag: str):
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"x" matches "x"
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, last_modified: Optional[datetime]):
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
+
+
+# Sets ETag / Last-Modified / Cache-Control on `response` and returns a 304
+# response if the client's copy is current, else None.
+# `parts`: anything else the body depends on (usually the caller's id).
+def check(request: Request, response: Response, version, *parts) -> Optional[Response]:
+    etag = _etag(request, version, parts)
+    last_modified = _last_modified(version)
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    response.headers.update(headers)
+
+    # If-None-Match wins over If-Modified-Since when both are sent (RFC 9110)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = if_modified_since is not None and _not_modified_since(if_modified_since, last_modified)
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    return None
@@ -1,48 +1,103 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import os
 import secrets
 import string
-from sqlalchemy.orm import Session
+from functools import lru_cache
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only, noload, selectinload
 from sqlalchemy import or_
-from . import models, schemas
-from passlib.context import CryptContext
-
-# --- CONFIGURATION (Replace with your details) ---
-# For development, using Gmail App Password is easiest.
-# 1. Turn on 2-Step Verification in Google Account.
-# 2. Search for "App Passwords" and create one.
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
-SENDER_EMAIL = "akithaperera6@gmail.com" # <--- REPLACE THIS
-SENDER_PASSWORD = "yorzrasoojnanqpd"   # <--- REPLACE THIS (16 chars)
-
-# Setup password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from . import hashing, mailer, models, principals, record_cache, schemas, search as mother_search
+from . import analytics, sync  # noqa: F401  (register the change-tracking / analytics flush hooks)
+from .pagination import PageParams, paginate
+
+# Setup password hashing. Built on first use rather than at import, so workers
+# boot without loading passlib (see bench/startup.py).
+#
+# New hashes use PASSWORD_HASH_SCHEME ("bcrypt" or "argon2", i.e. argon2id,
+# which needs argon2-cffi) with the cost settings below. Stored hashes of the
+# other scheme, or with other cost settings, still verify and are rehashed on
+# the next successful login (verify_and_update_password_async). Measure the
+# cost with bench/hash_cost.py before changing it.
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "19456")) # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
+
+PASSWORD_HASH_SCHEMES = ("argon2", "bcrypt")
+
+def make_pwd_context(scheme=PASSWORD_HASH_SCHEME, bcrypt_rounds=BCRYPT_ROUNDS, argon2_time_cost=ARGON2_TIME_COST,
+                     argon2_memory_cost=ARGON2_MEMORY_COST, argon2_parallelism=ARGON2_PARALLELISM):
+    from passlib.context import CryptContext
+
+    if scheme not in PASSWORD_HASH_SCHEMES:
+        raise ValueError(f"Unknown password hash scheme {scheme!r} (expected one of {PASSWORD_HASH_SCHEMES})")
+    # The first scheme hashes; "auto" deprecates the rest
+    schemes = [scheme] + [other for other in PASSWORD_HASH_SCHEMES if other != scheme]
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        argon2__type="ID",
+        argon2__time_cost=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
 
+@lru_cache(maxsize=None)
+def _pwd_context():
+    return make_pwd_context()
+
+def _hash_password(password):
+    # bcrypt only looks at the first 72 bytes; argon2 takes the whole password
+    if PASSWORD_HASH_SCHEME == "bcrypt":
+        password_bytes = password.encode('utf-8')
+        if len(password_bytes) > 72:
+            password = password_bytes[:72]
+    return _pwd_context().hash(password)
+
+def _verify_password(plain_password, hashed_password):
+    return _pwd_context().verify(plain_password, hashed_password)
+
+# (ok, new_hash): new_hash is set when the stored hash is outdated and should be replaced
+def _verify_and_update_password(plain_password, hashed_password):
+    context = _pwd_context()
+    if not context.verify(plain_password, hashed_password):
+        return False, None
+    return True, _hash_password(plain_password) if context.needs_update(hashed_password) else None
+
+# Hashing and verification always run on the bounded pool in hashing.py
 def get_password_hash(password):
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    return pwd_context.hash(password_bytes)
+    return hashing.run(_hash_password, password)
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return hashing.run(_verify_password, plain_password, hashed_password)
+
+# Hashes many passwords on the import pool (bulk import jobs; blocks while its queue is full)
+def get_password_hashes(passwords):
+    futures = [hashing.submit_import(_hash_password, password) for password in passwords]
+    return [future.result() for future in futures]
+
+# Use these from `async def` endpoints so bcrypt never blocks the event loop
+async def get_password_hash_async(password):
+    return await hashing.run_async(_hash_password, password)
+
+async def verify_password_async(plain_password, hashed_password):
+    return await hashing.run_async(_verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password, hashed_password):
+    return await hashing.run_async(_verify_and_update_password, plain_password, hashed_password)
 
 # --- Helper: Generate Random Password ---
 def generate_secure_password(length=10):
     alphabet = string.ascii_letters + string.digits + "!@#$%"
     return ''.join(secrets.choice(alphabet) for i in range(length))
 
-# --- Helper: Send Email ---
-def send_credentials_email(to_email, username, password, name):
-    try:
-        message = MIMEMultipart()
-        message["From"] = SENDER_EMAIL
-        message["To"] = to_email
-        message["Subject"] = "Welcome to Rakawaranaya - Your Credentials"
-
-        body = f"""
+# --- Helper: Queue Credentials Email ---
+# Only adds a row to the outbox; the caller's commit makes it durable and
+# mailer.py delivers it in the background.
+def queue_credentials_email(db: Session, to_email, username, password, name):
+    body = f"""
         Dear {name},
 
         Welcome to the Rakawaranaya National Midwife System.
@@ -59,21 +114,26 @@ def send_credentials_email(to_email, username, password, name):
         Best regards,
         Ministry of Health (MOH)
         """
-        
-        message.attach(MIMEText(body, "plain"))
-
-        # Connect to Server
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls() # Secure the connection
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
-        server.sendmail(SENDER_EMAIL, to_email, message.as_string())
-        server.quit()
-        
-        print(f"Email sent successfully to {to_email}")
-        return True
-    except Exception as e:
-        print(f"Failed to send email: {e}")
-        return False
+    return mailer.enqueue(db, to_email, "Welcome to Rakawaranaya - Your Credentials", body)
+
+# ---------------------------------------------------------
+# ------------------- LOADER STRATEGIES -------------------
+# ---------------------------------------------------------
+# schemas.Mother nests four record lists. Any query whose rows are serialized
+# through it must batch-load them (one SELECT ... IN per relationship),
+# otherwise every mother fires four lazy SELECTs during serialization.
+
+MOTHER_RECORD_LOADERS = (
+    selectinload(models.Mother.health_records),
+    selectinload(models.Mother.pregnancy_records),
+    selectinload(models.Mother.delivery_records),
+    selectinload(models.Mother.antenatal_plans),
+)
+
+# Same thing one level up, for schemas.Midwife (mothers -> records)
+MIDWIFE_TREE_LOADERS = (
+    selectinload(models.Midwife.mothers).options(*MOTHER_RECORD_LOADERS),
+)
 
 # ---------------------------------------------------------
 # ------------------- MOH OFFICER CRUD --------------------
@@ -100,12 +160,53 @@ def create_moh_officer(db: Session, moh: schemas.MOHOfficerCreate):
 # --------------------- MIDWIFE CRUD ----------------------
 # ---------------------------------------------------------
 
-def get_midwife(db: Session, midwife_id: int):
-    return db.query(models.Midwife).filter(models.Midwife.id == midwife_id).first()
+def get_midwife(db: Session, midwife_id: int, with_mothers: bool = False):
+    query = db.query(models.Midwife).filter(models.Midwife.id == midwife_id)
+    if with_mothers:
+        query = query.options(*MIDWIFE_TREE_LOADERS)
+    return query.first()
 
 def get_midwife_by_username(db: Session, username: str):
     return db.query(models.Midwife).filter(models.Midwife.username == username).first()
 
+# Columns needed by the MOH directory (schemas.MidwifeSummary)
+MIDWIFE_SUMMARY_COLUMNS = (
+    models.Midwife.id,
+    models.Midwife.username,
+    models.Midwife.full_name,
+    models.Midwife.nic,
+    models.Midwife.phone_number,
+    models.Midwife.email,
+    models.Midwife.slmc_reg_no,
+    models.Midwife.service_grade,
+    models.Midwife.assigned_moh_area,
+    models.Midwife.is_active,
+)
+
+# --- MOH Directory: summary rows by default, full tree only when expanded ---
+def get_midwives(db: Session, expand: bool = False, page: PageParams = None):
+    query = db.query(models.Midwife)
+    if expand:
+        # Fixed number of queries (midwives + mothers + one per record type), however big the district
+        query = query.options(*MIDWIFE_TREE_LOADERS)
+    else:
+        query = query.options(load_only(*MIDWIFE_SUMMARY_COLUMNS), noload(models.Midwife.mothers))
+    return paginate(query, page, keys=(models.Midwife.id,))
+
+# Suspend / reinstate a midwife (PUT /midwives/{id}/status). Drops the cached
+# principal so it takes effect immediately in this worker (every worker with
+# PRINCIPAL_CACHE_URL). A change made any other way, directly in the DB
+# included, is only seen once the cached entry expires (PRINCIPAL_CACHE_TTL).
+def set_midwife_active(db: Session, midwife_id: int, is_active: bool):
+    db_midwife = get_midwife(db, midwife_id)
+    if not db_midwife:
+        return None
+    db_midwife.is_active = is_active
+    db.commit()
+    db.refresh(db_midwife)
+    principals.invalidate("midwife", db_midwife.username)
+    return db_midwife
+
 # Legacy function (Mobile App Registration - if needed)
 def create_midwife(db: Session, midwife: schemas.MidwifeCreate):
     hashed_password = get_password_hash(midwife.password)
@@ -159,38 +260,39 @@ def register_full_midwife(db: Session, midwife_data: schemas.MidwifeRegistration
     )
     
     db.add(db_midwife)
+
+    # 5. Queue Email (committed together with the midwife, sent in the background)
+    print(f"\n[CREDENTIALS GENERATED] ...") 
+    if midwife_data.email:
+        queue_credentials_email(db, midwife_data.email, final_username, generated_password, midwife_data.full_name)
+
     db.commit()
     db.refresh(db_midwife)
-    
-    # 5. Send Email
-    print(f"\n[CREDENTIALS GENERATED] ...") 
     if midwife_data.email:
-        send_credentials_email(midwife_data.email, final_username, generated_password, midwife_data.full_name)
+        mailer.wake()
     
     return db_midwife
 # ---------------------------------------------------------
 # ---------------------- MOTHER CRUD ----------------------
 # ---------------------------------------------------------
 
-def get_mother_by_nic(db: Session, nic: str):
-    return db.query(models.Mother).filter(models.Mother.nic == nic).first()
+def get_mother_by_nic(db: Session, nic: str, with_records: bool = False):
+    query = db.query(models.Mother).filter(models.Mother.nic == nic)
+    if with_records:
+        query = query.options(*MOTHER_RECORD_LOADERS)
+    return query.first()
 
 def get_mother(db: Session, mother_id: int):
     return db.query(models.Mother).filter(models.Mother.id == mother_id).first()
 
-def get_mothers_by_midwife(db: Session, midwife_id: int, skip: int = 0, limit: int = 100, search: str = None):
-    query = db.query(models.Mother).filter(models.Mother.midwife_id == midwife_id)
+def get_mothers_by_midwife(db: Session, midwife_id: int, page: PageParams = None, search: str = None):
+    query = db.query(models.Mother).filter(models.Mother.midwife_id == midwife_id).options(*MOTHER_RECORD_LOADERS)
     
     if search:
-        search_format = f"%{search}%"
-        query = query.filter(
-            or_(
-                models.Mother.full_name.like(search_format),
-                models.Mother.nic.like(search_format)
-            )
-        )
+        # Indexed NIC-prefix / full-text name match (see search.py)
+        query = query.filter(mother_search.mother_filter(db, search))
         
-    return query.offset(skip).limit(limit).all()
+    return paginate(query, page, keys=(models.Mother.id,))
 
 def create_mother(db: Session, mother: schemas.MotherCreate, midwife_id: int):
     hashed_password = get_password_hash(mother.password)
@@ -219,6 +321,8 @@ def update_mother(db: Session, mother_id: int, mother_update: schemas.MotherUpda
     db.add(db_mother)
     db.commit()
     db.refresh(db_mother)
+    principals.invalidate("mother", db_mother.nic)
+    record_cache.invalidate(db_mother.id)
     return db_mother
 
 def update_mother_password(db: Session, mother_id: int, password_data: schemas.PasswordChange):
@@ -234,6 +338,7 @@ def update_mother_password(db: Session, mother_id: int, password_data: schemas.P
     db.add(db_mother)
     db.commit()
     db.refresh(db_mother)
+    principals.invalidate("mother", db_mother.nic)
     return True
 
 # ---------------------------------------------------------
@@ -245,10 +350,12 @@ def create_health_record(db: Session, record: schemas.HealthRecordCreate, mother
     db.add(db_record)
     db.commit()
     db.refresh(db_record)
+    record_cache.invalidate(mother_id, "health_records")
     return db_record
 
-def get_health_records_for_mother(db: Session, mother_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.HealthRecord).filter(models.HealthRecord.mother_id == mother_id).offset(skip).limit(limit).all()
+def get_health_records_for_mother(db: Session, mother_id: int, page: PageParams = None):
+    query = db.query(models.HealthRecord).filter(models.HealthRecord.mother_id == mother_id)
+    return paginate(query, page, keys=(models.HealthRecord.visit_date, models.HealthRecord.id))
 
 # ---------------------------------------------------------
 # ----------------- PREGNANCY RECORDS CRUD ----------------
@@ -259,10 +366,12 @@ def create_pregnancy_record(db: Session, record: schemas.PregnancyRecordCreate,
     db.add(db_record)
     db.commit()
     db.refresh(db_record)
+    record_cache.invalidate(mother_id, "pregnancy_records")
     return db_record
 
-def get_pregnancy_records_for_mother(db: Session, mother_id: int):
-    return db.query(models.PregnancyRecord).filter(models.PregnancyRecord.mother_id == mother_id).all()
+def get_pregnancy_records_for_mother(db: Session, mother_id: int, page: PageParams = None):
+    query = db.query(models.PregnancyRecord).filter(models.PregnancyRecord.mother_id == mother_id)
+    return paginate(query, page, keys=(models.PregnancyRecord.id,))
 
 # ---------------------------------------------------------
 # ----------------- DELIVERY RECORDS CRUD -----------------
@@ -273,10 +382,12 @@ def create_delivery_record(db: Session, record: schemas.DeliveryRecordCreate, mo
     db.add(db_record)
     db.commit()
     db.refresh(db_record)
+    record_cache.invalidate(mother_id, "delivery_records")
     return db_record
 
-def get_delivery_records_for_mother(db: Session, mother_id: int):
-    return db.query(models.DeliveryRecord).filter(models.DeliveryRecord.mother_id == mother_id).all()
+def get_delivery_records_for_mother(db: Session, mother_id: int, page: PageParams = None):
+    query = db.query(models.DeliveryRecord).filter(models.DeliveryRecord.mother_id == mother_id)
+    return paginate(query, page, keys=(models.DeliveryRecord.id,))
 
 # ---------------------------------------------------------
 # ------------------ ANTENATAL PLAN CRUD ------------------
@@ -287,8 +398,88 @@ def create_antenatal_plan(db: Session, plan: schemas.AntenatalPlanCreate, mother
     db.add(db_plan)
     db.commit()
     db.refresh(db_plan)
+    record_cache.invalidate(mother_id, "antenatal_plans")
     return db_plan
 
-def get_antenatal_plans_for_mother(db: Session, mother_id: int):
-    return db.query(models.AntenatalPlan).filter(models.AntenatalPlan.mother_id == mother_id).all()
-            
\ No newline at end of file
+def get_antenatal_plans_for_mother(db: Session, mother_id: int, page: PageParams = None):
+    query = db.query(models.AntenatalPlan).filter(models.AntenatalPlan.mother_id == mother_id)
+    return paginate(query, page, keys=(models.AntenatalPlan.id,))
+            
+
+# ---------------------------------------------------------
+# ------------------- BATCH RECORD SYNC -------------------
+# ---------------------------------------------------------
+# A whole clinic day of records from the mobile app in one request and one
+# transaction, instead of one POST (and one commit) per record.
+
+BATCH_RECORD_MODELS = {
+    "health_record": models.HealthRecord,
+    "pregnancy_record": models.PregnancyRecord,
+    "delivery_record": models.DeliveryRecord,
+    "antenatal_plan": models.AntenatalPlan,
+}
+
+# Keys older than this are purged; a retry after that inserts again
+IDEMPOTENCY_KEY_TTL = timedelta(days=7)
+
+# Which of these mother ids belong to the midwife (one query for the whole batch)
+def get_owned_mother_ids(db: Session, midwife_id: int, mother_ids):
+    if not mother_ids:
+        return set()
+    rows = db.query(models.Mother.id).filter(
+        models.Mother.midwife_id == midwife_id,
+        models.Mother.id.in_(mother_ids)
+    )
+    return {mother_id for (mother_id,) in rows}
+
+def get_idempotent_response(db: Session, midwife_id: int, key: str):
+    row = db.query(models.IdempotencyKey.response).filter(
+        models.IdempotencyKey.midwife_id == midwife_id,
+        models.IdempotencyKey.key == key,
+        models.IdempotencyKey.created_at >= datetime.utcnow() - IDEMPOTENCY_KEY_TTL
+    ).first()
+    if row is None:
+        return None
+    return schemas.RecordBatchResult.model_validate_json(row.response)
+
+# Inserts every operation in one transaction. Ownership must already be checked.
+# Returns None if another request committed the same idempotency key first.
+def create_records_batch(db: Session, midwife_id: int, operations, idempotency_key: str = None):
+    db_records = [
+        BATCH_RECORD_MODELS[op.type](**op.data.model_dump(), mother_id=op.mother_id)
+        for op in operations
+    ]
+    db.add_all(db_records)
+    # One flush for the whole batch: the ORM groups the INSERTs per table
+    # (multi-row where the driver can hand back the generated ids)
+    db.flush()
+
+    result = schemas.RecordBatchResult(results=[
+        schemas.RecordOpResult(index=i, type=op.type, mother_id=op.mother_id, id=db_record.id)
+        for i, (op, db_record) in enumerate(zip(operations, db_records))
+    ])
+
+    if idempotency_key:
+        now = datetime.utcnow()
+        # Expired key with the same name: drop it so the unique constraint lets this one in
+        db.query(models.IdempotencyKey).filter(
+            models.IdempotencyKey.midwife_id == midwife_id,
+            models.IdempotencyKey.created_at < now - IDEMPOTENCY_KEY_TTL
+        ).delete(synchronize_session=False)
+        db.add(models.IdempotencyKey(
+            midwife_id=midwife_id,
+            key=idempotency_key,
+            response=result.model_dump_json(),
+            created_at=now
+        ))
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost the race on the idempotency key: nothing from this batch was kept
+        db.rollback()
+        if idempotency_key:
+            return None
+        raise
+    record_cache.invalidate_many((op.mother_id, BATCH_RECORD_MODELS[op.type].__tablename__) for op in operations)
+    return result
@@ -0,0 +1,94 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .crud import MIDWIFE_TREE_LOADERS, MOTHER_RECORD_LOADERS
+from .pagination import PageParams, paginate_async
+
+# --- Async versions of the read paths in crud.py ---
+# Same queries, written as select() statements for an AsyncSession, for the
+# `async def` endpoints. Writes (and anything scripts use) stay in crud.py.
+# Relationships are never lazy-loaded on an AsyncSession (that would need IO
+# outside an await), so anything serialized nested must be in the loader options.
+
+# ---------------------------------------------------------
+# ------------------------ USERS --------------------------
+# ---------------------------------------------------------
+
+async def get_moh_officer_by_username(db: AsyncSession, username: str):
+    stmt = select(models.MOHOfficer).where(models.MOHOfficer.username == username)
+    return (await db.scalars(stmt)).first()
+
+async def get_midwife(db: AsyncSession, midwife_id: int, with_mothers: bool = False):
+    stmt = select(models.Midwife).where(models.Midwife.id == midwife_id)
+    if with_mothers:
+        stmt = stmt.options(*MIDWIFE_TREE_LOADERS)
+    return (await db.scalars(stmt)).first()
+
+async def get_midwife_by_username(db: AsyncSession, username: str):
+    stmt = select(models.Midwife).where(models.Midwife.username == username)
+    return (await db.scalars(stmt)).first()
+
+async def get_mother(db: AsyncSession, mother_id: int, with_records: bool = False):
+    stmt = select(models.Mother).where(models.Mother.id == mother_id)
+    if with_records:
+        stmt = stmt.options(*MOTHER_RECORD_LOADERS)
+    return (await db.scalars(stmt)).first()
+
+async def get_mother_by_nic(db: AsyncSession, nic: str, with_records: bool = False):
+    stmt = select(models.Mother).where(models.Mother.nic == nic)
+    if with_records:
+        stmt = stmt.options(*MOTHER_RECORD_LOADERS)
+    return (await db.scalars(stmt)).first()
+
+# Stores a login's rehashed password (crud.verify_and_update_password_async).
+# A Core UPDATE, so it doesn't go through the change tracking in sync.py: the
+# hash isn't part of any synced or cached document.
+async def update_password_hash(db: AsyncSession, user, new_hash: str):
+    model = type(user)
+    await db.execute(update(model).where(model.id == user.id).values(hashed_password=new_hash))
+    await db.commit()
+
+# ---------------------------------------------------------
+# ----------------------- RECORDS -------------------------
+# ---------------------------------------------------------
+
+async def get_health_records_for_mother(db: AsyncSession, mother_id: int, page: PageParams = None):
+    stmt = select(models.HealthRecord).where(models.HealthRecord.mother_id == mother_id)
+    return await paginate_async(db, stmt, page, keys=(models.HealthRecord.visit_date, models.HealthRecord.id))
+
+async def get_pregnancy_records_for_mother(db: AsyncSession, mother_id: int, page: PageParams = None):
+    stmt = select(models.PregnancyRecord).where(models.PregnancyRecord.mother_id == mother_id)
+    return await paginate_async(db, stmt, page, keys=(models.PregnancyRecord.id,))
+
+async def get_delivery_records_for_mother(db: AsyncSession, mother_id: int, page: PageParams = None):
+    stmt = select(models.DeliveryRecord).where(models.DeliveryRecord.mother_id == mother_id)
+    return await paginate_async(db, stmt, page, keys=(models.DeliveryRecord.id,))
+
+async def get_antenatal_plans_for_mother(db: AsyncSession, mother_id: int, page: PageParams = None):
+    stmt = select(models.AntenatalPlan).where(models.AntenatalPlan.mother_id == mother_id)
+    return await paginate_async(db, stmt, page, keys=(models.AntenatalPlan.id,))
+
+# ---------------------------------------------------------
+# ------------------------ PORTAL -------------------------
+# ---------------------------------------------------------
+
+# record list -> (model, order). Same order as the paged lists.
+PORTAL_RECORDS = {
+    "health_records": (models.HealthRecord, (models.HealthRecord.visit_date, models.HealthRecord.id)),
+    "pregnancy_records": (models.PregnancyRecord, (models.PregnancyRecord.id,)),
+    "delivery_records": (models.DeliveryRecord, (models.DeliveryRecord.id,)),
+    "antenatal_plans": (models.AntenatalPlan, (models.AntenatalPlan.id,)),
+}
+
+# Everything the mother app shows, for schemas.PortalSnapshot: the mother row
+# plus one query per record type, whatever the number of records.
+async def get_portal_snapshot(db: AsyncSession, mother_id: int):
+    mother = (await db.scalars(select(models.Mother).where(models.Mother.id == mother_id))).first()
+    if mother is None:
+        return None
+    snapshot = {"mother": mother}
+    for name, (model, order) in PORTAL_RECORDS.items():
+        stmt = select(model).where(model.mother_id == mother_id).order_by(*order)
+        snapshot[name] = (await db.scalars(stmt)).all()
+    return snapshot
@@ -0,0 +1,173 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import Boolean, Date, DATETIME, DECIMAL, Integer, select
+
+from . import models
+from .database import ReadSessionLocal
+
+# --- Streaming caseload export (NDJSON / CSV / Parquet) ---
+# Each table is read with plain Core SELECTs (rows never enter the ORM
+# identity map) in keyset batches, `WHERE id > :last ORDER BY id LIMIT :n`,
+# and written out batch by batch, so memory stays flat whatever the area size.
+# Keyset paging rather than a server-side cursor (yield_per): mysqlconnector
+# has no server-side cursors, and SQLAlchemy silently buffers the whole result
+# instead. This works the same on every driver. The batches share one
+# transaction, so on MySQL (InnoDB, REPEATABLE READ) they read one snapshot.
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# table name -> model; mothers first so a consumer can build parents before children
+TABLES = {
+    "mothers": models.Mother,
+    "health_records": models.HealthRecord,
+    "pregnancy_records": models.PregnancyRecord,
+    "delivery_records": models.DeliveryRecord,
+    "antenatal_plans": models.AntenatalPlan,
+}
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+_EXCLUDED_COLUMNS = {"hashed_password"}
+
+
+def columns(table: str):
+    return [c for c in TABLES[table].__table__.columns if c.name not in _EXCLUDED_COLUMNS]
+
+
+# Who is exporting: a midwife gets her own mothers, an MOH officer the whole area
+class Scope:
+    def __init__(self, midwife_id: int = None, moh_area: str = None):
+        self.midwife_id = midwife_id
+        self.moh_area = moh_area
+
+    def apply(self, stmt, model):
+        if model is not models.Mother:
+            stmt = stmt.join(models.Mother, models.Mother.id == model.mother_id)
+        if self.midwife_id is not None:
+            return stmt.where(models.Mother.midwife_id == self.midwife_id)
+        return stmt.join(models.Midwife, models.Midwife.id == models.Mother.midwife_id).where(
+            models.Midwife.assigned_moh_area == self.moh_area
+        )
+
+
+def _batches(scope: Scope, table: str):
+    model = TABLES[table]
+    stmt = scope.apply(select(*columns(table)), model).order_by(model.id).limit(EXPORT_BATCH_SIZE)
+    id_index = [c.name for c in columns(table)].index("id")
+    last_id = None
+    with ReadSessionLocal() as db:
+        while True:
+            page = stmt if last_id is None else stmt.where(model.id > last_id)
+            batch = db.execute(page).all()
+            if batch:
+                yield batch
+            if len(batch) < EXPORT_BATCH_SIZE:
+                return
+            last_id = batch[-1][id_index]
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+# --- Writers: each yields encoded chunks, one per batch ---
+def ndjson_stream(scope: Scope, tables):
+    for table in tables:
+        names = [c.name for c in columns(table)]
+        for batch in _batches(scope, table):
+            lines = []
+            for row in batch:
+                record = {"type": table}
+                record.update((name, _plain(value)) for name, value in zip(names, row))
+                lines.append(json.dumps(record, separators=(",", ":")))
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def csv_stream(scope: Scope, table: str):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([c.name for c in columns(table)])
+    for batch in _batches(scope, table):
+        writer.writerows([[_plain(value) for value in row] for row in batch])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _ChunkSink(io.RawIOBase):
+    # Write-only file object that hands back whatever was written since the last drain
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_type(pa, column):
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, DECIMAL):
+        return pa.float64()
+    if isinstance(column.type, DATETIME):
+        return pa.timestamp("us")
+    if isinstance(column.type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+def parquet_stream(scope: Scope, table: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    cols = columns(table)
+    schema = pa.schema([(c.name, _arrow_type(pa, c)) for c in cols])
+    sink = _ChunkSink()
+    # One row group per batch, flushed to the client as soon as it is written
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in _batches(scope, table):
+            arrays = [
+                pa.array([float(row[i]) if isinstance(row[i], Decimal) else row[i] for row in batch], type=field.type)
+                for i, field in enumerate(schema)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
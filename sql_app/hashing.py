@@ -0,0 +1,113 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from . import metrics
+
+# --- Bounded worker pool for password hashing ---
+# bcrypt costs ~250 ms of CPU per call. Running it inline in an `async def`
+# handler stalls the whole event loop, and running it on the AnyIO threadpool
+# lets a login burst take every thread. Instead all hashing/verification goes
+# through this small dedicated pool: bcrypt releases the GIL, so the pool gives
+# real parallelism, and its size (plus the import pool below) is the per-worker
+# cap on concurrent bcrypt work.
+
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+# Bulk imports hash on a separate pool, so a 1000-row chunk never sits in
+# front of a login. Its queue is bounded too: a producer submitting more than
+# IMPORT_HASH_WORKERS + IMPORT_HASH_QUEUE jobs blocks until one finishes, so
+# an import runs at the pace of its own worker(s) instead of piling up work.
+IMPORT_HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS", "1"))
+IMPORT_HASH_QUEUE = int(os.getenv("IMPORT_HASH_QUEUE", str(IMPORT_HASH_WORKERS * 2)))
+
+
+class _Pool:
+    def __init__(self, workers: int, thread_name_prefix: str, max_queued=None, observe=False):
+        self.workers = workers
+        self.observe = observe # login latency histograms; import waits would swamp them
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix)
+        self._slots = threading.BoundedSemaphore(workers + max_queued) if max_queued is not None else None
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "queued": 0,
+            "running": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "run_seconds_total": 0.0,
+        }
+
+    def _call(self, fn, args, enqueued_at):
+        started = time.perf_counter()
+        waited = started - enqueued_at
+        if self.observe:
+            metrics.HASH_WAIT.observe(waited)
+        with self._lock:
+            self._stats["queued"] -= 1
+            self._stats["running"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+        ok = False
+        try:
+            result = fn(*args)
+            ok = True
+            return result
+        finally:
+            ran = time.perf_counter() - started
+            if self.observe:
+                metrics.HASH_RUN.observe(ran)
+            with self._lock:
+                self._stats["running"] -= 1
+                self._stats["run_seconds_total"] += ran
+                self._stats["completed" if ok else "failed"] += 1
+            if self._slots is not None:
+                self._slots.release()
+
+    def submit(self, fn, *args) -> Future:
+        if self._slots is not None:
+            self._slots.acquire()
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._stats["queued"] += 1
+        return self._executor.submit(self._call, fn, args, time.perf_counter())
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["workers"] = self.workers
+        return snapshot
+
+
+_pool = _Pool(HASH_WORKERS, "password-hash", observe=True)
+_import_pool = _Pool(IMPORT_HASH_WORKERS, "import-hash", max_queued=IMPORT_HASH_QUEUE)
+
+
+def submit(fn, *args) -> Future:
+    return _pool.submit(fn, *args)
+
+
+# Import pool: blocks while the queue is full, so only call it from a
+# background thread (bulk_import's job runner), never from the event loop
+def submit_import(fn, *args) -> Future:
+    return _import_pool.submit(fn, *args)
+
+
+# Blocking call, for sync code paths (def endpoints, scripts)
+def run(fn, *args):
+    return submit(fn, *args).result()
+
+
+# Awaitable call, for async endpoints: the event loop keeps serving while bcrypt runs
+async def run_async(fn, *args):
+    return await asyncio.wrap_future(submit(fn, *args))
+
+
+def stats():
+    snapshot = _pool.stats()
+    snapshot.update({f"import_{name}": value for name, value in _import_pool.stats().items()})
+    return snapshot
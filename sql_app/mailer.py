@@ -0,0 +1,202 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+# --- CONFIGURATION (Replace with your details, or set the env vars) ---
+# For development, using Gmail App Password is easiest.
+# 1. Turn on 2-Step Verification in Google Account.
+# 2. Search for "App Passwords" and create one.
+# For local testing point SMTP_SERVER/SMTP_PORT at a debugging server
+# (e.g. `python -m aiosmtpd -n -l localhost:8025`) with SMTP_STARTTLS=0.
+SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+SENDER_EMAIL = os.getenv("SENDER_EMAIL", "akithaperera6@gmail.com") # <--- REPLACE THIS
+SENDER_PASSWORD = os.getenv("SENDER_PASSWORD", "yorzrasoojnanqpd")   # <--- REPLACE THIS (16 chars)
+
+# --- Sender tuning ---
+EMAIL_SENDER_ENABLED = os.getenv("EMAIL_SENDER_ENABLED", "1") == "1"
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+EMAIL_POLL_SECONDS = float(os.getenv("EMAIL_POLL_SECONDS", "30"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "8"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", "3600"))
+
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+
+# --- Queueing (called inside the caller's transaction, no network I/O) ---
+def enqueue(db: Session, to_email: str, subject: str, body: str):
+    now = datetime.utcnow()
+    row = models.EmailOutbox(
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        status=STATUS_PENDING,
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now,
+    )
+    db.add(row)
+    return row
+
+
+# --- Delivery ---
+# smtplib / email.mime are imported where they're used: only the sender thread
+# needs them, and they'd otherwise load in every worker at boot.
+def _connect():
+    import smtplib
+
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT)
+    if SMTP_STARTTLS:
+        server.starttls() # Secure the connection
+    if SENDER_PASSWORD:
+        server.login(SENDER_EMAIL, SENDER_PASSWORD)
+    return server
+
+
+def _build_message(row: models.EmailOutbox):
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    message = MIMEMultipart()
+    message["From"] = SENDER_EMAIL
+    message["To"] = row.to_email
+    message["Subject"] = row.subject
+    message.attach(MIMEText(row.body or "", "plain"))
+    return message.as_string()
+
+
+def _retry_delay(attempts: int):
+    return min(EMAIL_RETRY_BASE_SECONDS * (2 ** (attempts - 1)), EMAIL_RETRY_MAX_SECONDS)
+
+
+# A 5xx reply about the message or its recipients won't change on retry: give
+# up straight away so the body (it can hold credentials) isn't kept. 4xx
+# replies, dropped connections and refusals of our own sender address (quota,
+# account problems) are retried.
+def _is_permanent(error: Exception):
+    import smtplib
+
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPSenderRefused):
+        return False
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def _mark_failed_attempt(row: models.EmailOutbox, error: Exception, permanent: bool = False):
+    row.attempts += 1
+    row.last_error = str(error)[:1000]
+    if permanent or row.attempts >= EMAIL_MAX_ATTEMPTS:
+        row.status = STATUS_FAILED
+        row.body = None
+        print(f"Giving up on email {row.id} to {row.to_email}: {error}")
+    else:
+        row.next_attempt_at = datetime.utcnow() + timedelta(seconds=_retry_delay(row.attempts))
+        print(f"Failed to send email {row.id} to {row.to_email} (attempt {row.attempts}): {error}")
+
+
+def _claim_due(db: Session, limit: int):
+    # SKIP LOCKED lets every gunicorn worker run a sender without double-sending
+    return (
+        db.query(models.EmailOutbox)
+        .filter(
+            models.EmailOutbox.status == STATUS_PENDING,
+            models.EmailOutbox.next_attempt_at <= datetime.utcnow(),
+        )
+        .order_by(models.EmailOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+# Sends one batch of due messages over a single authenticated SMTP connection.
+# Returns how many rows were claimed (0 means the queue is drained).
+def send_pending(db: Session, batch_size: int = EMAIL_BATCH_SIZE):
+    rows = _claim_due(db, batch_size)
+    if not rows:
+        db.commit()
+        return 0
+
+    import smtplib
+
+    server = None
+    try:
+        for i, row in enumerate(rows):
+            if server is None:
+                try:
+                    server = _connect()
+                except (smtplib.SMTPException, OSError) as e:
+                    # Server unreachable: back off the rest of the batch too
+                    for queued in rows[i:]:
+                        _mark_failed_attempt(queued, e)
+                    break
+            try:
+                server.sendmail(SENDER_EMAIL, row.to_email, _build_message(row))
+            except (smtplib.SMTPException, OSError) as e:
+                _mark_failed_attempt(row, e, permanent=_is_permanent(e))
+                if isinstance(e, (smtplib.SMTPServerDisconnected, OSError)):
+                    # Connection is gone; reconnect for the next message
+                    server = None
+                continue
+            row.status = STATUS_SENT
+            row.sent_at = datetime.utcnow()
+            row.body = None
+            print(f"Email sent successfully to {row.to_email}")
+    finally:
+        db.commit()
+        if server is not None:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+    return len(rows)
+
+
+# --- Background sender (one daemon thread per worker process) ---
+_wake = threading.Event()
+_stop = threading.Event()
+_thread = None
+
+
+def _run():
+    while not _stop.is_set():
+        _wake.clear()
+        try:
+            with SessionLocal() as db:
+                while not _stop.is_set() and send_pending(db):
+                    pass
+        except Exception as e:
+            print(f"Email sender error: {e}")
+        _wake.wait(EMAIL_POLL_SECONDS)
+
+
+def start():
+    global _thread
+    if not EMAIL_SENDER_ENABLED or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="email-outbox", daemon=True)
+    _thread.start()
+
+
+def stop(timeout: float = 5.0):
+    _stop.set()
+    _wake.set()
+    if _thread is not None:
+        _thread.join(timeout)
+
+
+# Nudge the sender after committing new rows instead of waiting for the next poll
+def wake():
+    _wake.set()
@@ -1,12 +1,19 @@
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, File, Header, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+import hmac
+import os
 
-from . import crud, models, schemas
-from .database import SessionLocal, engine
+from . import analytics, bulk_import, conditional, crud, crud_async, export, mailer, models, pagination
+from . import metrics, principals, ratelimit, record_cache, schedule, schemas, search, serialization, sync
+from . import database
+from .database import AsyncReadSessionLocal, AsyncSessionLocal, ReadSessionLocal, SessionLocal, engine
 
 from datetime import date 
 
@@ -18,9 +25,25 @@ SECRET_KEY = "YOUR_VERY_SECRET_KEY_GOES_HERE" # Change this!
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 
 
-models.Base.metadata.create_all(bind=engine)
-
-app = FastAPI()
+# --- Startup / shutdown ---
+# Importing this module does no I/O (it is imported once in the gunicorn master
+# with --preload); per-worker work happens here instead.
+#
+# The schema is owned by the Alembic migrations in migrations/ and applied once
+# per deploy (`alembic upgrade head`, the Procfile's release step), not by every
+# worker at boot. DB_CREATE_ALL=1 creates missing tables here instead, for
+# throwaway local / SQLite databases.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if os.getenv("DB_CREATE_ALL") == "1":
+        models.Base.metadata.create_all(bind=engine)
+    mailer.start()
+    yield
+    mailer.stop()
+    bulk_import.stop()
+    await database.dispose_async_engines()
+
+app = FastAPI(lifespan=lifespan)
 
 from fastapi.middleware.cors import CORSMiddleware
 app.add_middleware(
@@ -29,8 +52,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[pagination.NEXT_CURSOR_HEADER, pagination.TOTAL_COUNT_HEADER, "ETag", "Last-Modified"],
 )
 
+# --- Metrics (see metrics.py) ---
+# Outermost middleware, so the latency covers CORS and everything below it
+app.add_middleware(metrics.MetricsMiddleware)
+for _engine in {engine, database.read_engine, database.async_engine, database.async_read_engine}:
+    metrics.instrument_engine(_engine)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -38,6 +68,23 @@ def get_db():
     finally:
         db.close()
 
+# Read-only endpoints: routed to DATABASE_REPLICA_URL when one is configured
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Async sessions for the `async def` endpoints (see crud_async.py)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 oauth2_scheme_mother = OAuth2PasswordBearer(tokenUrl="mother/token")
 oauth2_scheme_moh = OAuth2PasswordBearer(tokenUrl="moh/token") # MOH Web Portal (NEW)
@@ -55,7 +102,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 # --- Dependency Functions (Updated) ---
 
-async def get_current_midwife(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+# The get_current_* dependencies return cached principal snapshots
+# (schemas.*Principal / schemas.MOHOfficer), not ORM rows. On a cache hit no
+# DB query is made; endpoints that need the full row re-read it by id.
+
+# On a cache miss they open a short-lived async session of their own, so a
+# cache hit never checks out a connection.
+
+async def get_current_midwife(token: str = Depends(oauth2_scheme)):
     # ... (Keep existing code) ...
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -70,12 +124,18 @@ async def get_current_midwife(db: Session = Depends(get_db), token: str = Depend
         token_data = schemas.TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    midwife = crud.get_midwife_by_username(db, username=token_data.username)
+    midwife = principals.get("midwife", token_data.username)
     if midwife is None:
+        async with AsyncSessionLocal() as db:
+            db_midwife = await crud_async.get_midwife_by_username(db, username=token_data.username)
+        if db_midwife is None:
+            raise credentials_exception
+        midwife = principals.put("midwife", token_data.username, db_midwife)
+    if midwife.is_active is False:
         raise credentials_exception
     return midwife
 
-async def get_current_mother(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme_mother)):
+async def get_current_mother(token: str = Depends(oauth2_scheme_mother)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -89,13 +149,17 @@ async def get_current_mother(db: Session = Depends(get_db), token: str = Depends
         token_data = schemas.TokenData(sub_id=nic)
     except JWTError:
         raise credentials_exception
-    mother = crud.get_mother_by_nic(db, nic=token_data.sub_id)
+    mother = principals.get("mother", token_data.sub_id)
     if mother is None:
-        raise credentials_exception
+        async with AsyncSessionLocal() as db:
+            db_mother = await crud_async.get_mother_by_nic(db, nic=token_data.sub_id)
+        if db_mother is None:
+            raise credentials_exception
+        mother = principals.put("mother", token_data.sub_id, db_mother)
     return mother
 
 # --- NEW: MOH Auth Dependency ---
-async def get_current_moh(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme_moh)):
+async def get_current_moh(token: str = Depends(oauth2_scheme_moh)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials (MOH)",
@@ -109,32 +173,63 @@ async def get_current_moh(db: Session = Depends(get_db), token: str = Depends(oa
         token_data = schemas.TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    moh = crud.get_moh_officer_by_username(db, username=token_data.username)
+    moh = principals.get("moh", token_data.username)
     if moh is None:
-        raise credentials_exception
+        async with AsyncSessionLocal() as db:
+            db_moh = await crud_async.get_moh_officer_by_username(db, username=token_data.username)
+        if db_moh is None:
+            raise credentials_exception
+        moh = principals.put("moh", token_data.username, db_moh)
     return moh
 
 
+# --- OPS: Connection pool health, Prometheus metrics ---
+# These expose pool, route and query internals, so they answer 404 unless
+# OPS_TOKEN is set and the request carries "Authorization: Bearer <OPS_TOKEN>"
+# (Prometheus: `authorization: {credentials: ...}` in the scrape config).
+OPS_TOKEN = os.getenv("OPS_TOKEN")
+
+def require_ops_token(authorization: Optional[str] = Header(None)):
+    expected = f"Bearer {OPS_TOKEN}".encode()
+    if not OPS_TOKEN or not hmac.compare_digest((authorization or "").encode(), expected):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@app.get("/health/pool", dependencies=[Depends(require_ops_token)])
+def read_pool_stats():
+    return database.pool_stats()
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_ops_token)])
+def read_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
 # --- API ENDPOINTS ---
 
 # 1. MOH Self-Registration (For System Admin to create the first MOH account)
-@app.post("/moh/register", response_model=schemas.MOHOfficer)
-def register_moh(moh: schemas.MOHOfficerCreate, db: Session = Depends(get_db)):
+@app.post("/moh/register", response_model=schemas.MOHOfficer, dependencies=[Depends(ratelimit.shed)])
+def register_moh(request: Request, moh: schemas.MOHOfficerCreate, db: Session = Depends(get_db)):
+    ratelimit.limit(request, "register", moh.username)
     db_moh = crud.get_moh_officer_by_username(db, username=moh.username)
     if db_moh:
         raise HTTPException(status_code=400, detail="MOH Username already registered")
     return crud.create_moh_officer(db=db, moh=moh)
 
 # 2. MOH Login (Web Login)
-@app.post("/moh/token", response_model=schemas.Token)
-async def login_for_moh(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
-    moh = crud.get_moh_officer_by_username(db, username=form_data.username)
-    if not moh or not crud.verify_password(form_data.password, moh.hashed_password):
+@app.post("/moh/token", response_model=schemas.Token, dependencies=[Depends(ratelimit.shed)])
+async def login_for_moh(request: Request, db: AsyncSession = Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()):
+    ratelimit.limit(request, "login", form_data.username)
+    moh = await crud_async.get_moh_officer_by_username(db, username=form_data.username)
+    verified, new_hash = False, None
+    if moh:
+        verified, new_hash = await crud.verify_and_update_password_async(form_data.password, moh.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        await crud_async.update_password_hash(db, moh, new_hash)
     access_token = create_access_token(data={"sub": moh.username})
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -153,56 +248,182 @@ def register_new_midwife_from_web(
         
     return db_midwife
 
+# 3b. Suspend / reactivate a midwife (MOH of her area only). Suspension takes
+# effect at once in this worker; other workers keep a cached principal for up to
+# PRINCIPAL_CACHE_TTL seconds unless PRINCIPAL_CACHE_URL shares the cache.
+@app.put("/midwives/{midwife_id}/status", response_model=schemas.MidwifeSummary)
+def update_midwife_status(
+    midwife_id: int,
+    status_update: schemas.MidwifeStatusUpdate,
+    db: Session = Depends(get_db),
+    current_moh: schemas.MOHOfficer = Depends(get_current_moh)
+):
+    db_midwife = crud.get_midwife(db, midwife_id=midwife_id)
+    if not db_midwife:
+        raise HTTPException(status_code=404, detail="Midwife not found")
+    if current_moh.moh_area and db_midwife.assigned_moh_area != current_moh.moh_area:
+        raise HTTPException(status_code=403, detail="Not authorized to manage this midwife")
+    return crud.set_midwife_active(db, midwife_id=midwife_id, is_active=status_update.is_active)
+
 # 4. View All Midwives (For MOH Directory/Management)
-@app.get("/midwives/", response_model=List[schemas.Midwife])
+# Returns flat directory rows. Pass ?expand=mothers to get the full nested
+# schemas.Midwife tree (mothers + all their records), batch-loaded.
+@app.get("/midwives/", response_model=List[schemas.MidwifeSummary])
 def get_all_midwives_for_moh(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    expand: Optional[str] = Query(None, pattern="^mothers$"),
+    page: pagination.PageParams = Depends(pagination.page_params),
+    db: Session = Depends(get_read_db),
     current_moh: schemas.MOHOfficer = Depends(get_current_moh)
 ):
+    # The expanded tree also changes with any mother/record change
+    version = conditional.midwives_version() + (conditional.global_change_version() if expand else [])
+    not_modified = conditional.check(request, response, conditional.probe(db, *version), current_moh.id)
+    if not_modified:
+        return not_modified
+
     # Currently returns all midwives; can be filtered by moh_area if needed later
-    return db.query(models.Midwife).all()
+    if expand:
+        result = crud.get_midwives(db, expand=True, page=page)
+        return serialization.respond(List[schemas.Midwife], pagination.respond(response, result), response)
+    return pagination.respond(response, crud.get_midwives(db, page=page))
 
 
 
 # ... (Register and Login endpoints stay the same) ...
-@app.post("/register/", response_model=schemas.Midwife)
-def register_midwife(midwife: schemas.MidwifeCreate, db: Session = Depends(get_db)):
+@app.post("/register/", response_model=schemas.Midwife, dependencies=[Depends(ratelimit.shed)])
+def register_midwife(request: Request, midwife: schemas.MidwifeCreate, db: Session = Depends(get_db)):
+    ratelimit.limit(request, "register", midwife.username)
     db_midwife = crud.get_midwife_by_username(db, username=midwife.username)
     if db_midwife:
         raise HTTPException(status_code=400, detail="Username already registered")
     return crud.create_midwife(db=db, midwife=midwife)
 
-@app.post("/token", response_model=schemas.Token)
-async def login_for_midwife(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
-    midwife = crud.get_midwife_by_username(db, username=form_data.username)
-    if not midwife or not crud.verify_password(form_data.password, midwife.hashed_password):
+@app.post("/token", response_model=schemas.Token, dependencies=[Depends(ratelimit.shed)])
+async def login_for_midwife(request: Request, db: AsyncSession = Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()):
+    ratelimit.limit(request, "login", form_data.username)
+    midwife = await crud_async.get_midwife_by_username(db, username=form_data.username)
+    verified, new_hash = False, None
+    if midwife:
+        verified, new_hash = await crud.verify_and_update_password_async(form_data.password, midwife.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        await crud_async.update_password_hash(db, midwife, new_hash)
+    if midwife.is_active is False:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account is suspended")
     access_token = create_access_token(data={"sub": midwife.username})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/midwives/me/", response_model=schemas.Midwife)
-async def read_midwives_me(current_midwife: schemas.Midwife = Depends(get_current_midwife)):
-    return current_midwife
-
-@app.post("/mother/token", response_model=schemas.Token)
-async def login_for_mother(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
-    mother = crud.get_mother_by_nic(db, nic=form_data.username)
-    if not mother or not crud.verify_password(form_data.password, mother.hashed_password):
+async def read_midwives_me(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
+):
+    # Re-read with the mothers tree batch-loaded instead of lazy-loading it per mother
+    midwife = await crud_async.get_midwife(db, midwife_id=current_midwife.id, with_mothers=True)
+    return serialization.respond(schemas.Midwife, midwife)
+
+@app.post("/mother/token", response_model=schemas.Token, dependencies=[Depends(ratelimit.shed)])
+async def login_for_mother(request: Request, db: AsyncSession = Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()):
+    ratelimit.limit(request, "login", form_data.username)
+    mother = await crud_async.get_mother_by_nic(db, nic=form_data.username)
+    verified, new_hash = False, None
+    if mother:
+        verified, new_hash = await crud.verify_and_update_password_async(form_data.password, mother.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect NIC or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        await crud_async.update_password_hash(db, mother, new_hash)
     access_token = create_access_token(data={"sub": mother.nic})
     return {"access_token": access_token, "token_type": "bearer"}
 
+# Version of a mother's row and all her records, as one probe SELECT
+async def _mother_version(db: AsyncSession, mother_id: int):
+    version = conditional.rows_version(models.Mother, models.Mother.id == mother_id)
+    for model in (models.HealthRecord, models.PregnancyRecord, models.DeliveryRecord, models.AntenatalPlan):
+        version += conditional.rows_version(model, model.mother_id == mother_id)
+    return await conditional.probe_async(db, *version)
+
 @app.get("/mothers/me/", response_model=schemas.Mother)
-async def read_mothers_me(current_mother: schemas.Mother = Depends(get_current_mother)):
-    return current_mother
+async def read_mothers_me(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_mother: schemas.MotherPrincipal = Depends(get_current_mother)
+):
+    version = await _mother_version(db, current_mother.id)
+    not_modified = conditional.check(request, response, version, current_mother.id)
+    if not_modified:
+        return not_modified
+    mother = await crud_async.get_mother(db, mother_id=current_mother.id, with_records=True)
+    if mother is None:
+        raise HTTPException(status_code=404, detail="Mother not found")
+    return serialization.respond(schemas.Mother, mother, response)
+
+# NEW: Everything the mother app shows on open, in one request: the profile and
+# all four record lists (it used to call /mothers/me/ and the three /my-*
+# lists). One version probe for the ETag, then one query per table.
+@app.get("/mothers/me/portal", response_model=schemas.PortalSnapshot, response_model_exclude_none=True)
+async def read_mothers_me_portal(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_mother: schemas.MotherPrincipal = Depends(get_current_mother)
+):
+    version = await _mother_version(db, current_mother.id)
+    not_modified = conditional.check(request, response, version, current_mother.id)
+    if not_modified:
+        return not_modified
+    snapshot = await crud_async.get_portal_snapshot(db, mother_id=current_mother.id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Mother not found")
+    return serialization.respond(schemas.PortalSnapshot, snapshot, response, exclude_none=True)
+
+# --- Per-mother record lists (midwife and mother portal) ---
+# ETag/304 via the version probe, and the first page served from record_cache
+# as ready-made JSON bytes when it was built from that same version: a cache
+# hit costs the probe only, no list query and no serialization.
+
+# record_type -> (model, response schema, async loader)
+RECORD_LISTS = {
+    "health_records": (models.HealthRecord, schemas.HealthRecord, crud_async.get_health_records_for_mother),
+    "pregnancy_records": (models.PregnancyRecord, schemas.PregnancyRecord, crud_async.get_pregnancy_records_for_mother),
+    "delivery_records": (models.DeliveryRecord, schemas.DeliveryRecord, crud_async.get_delivery_records_for_mother),
+    "antenatal_plans": (models.AntenatalPlan, schemas.AntenatalPlan, crud_async.get_antenatal_plans_for_mother),
+}
+
+async def _record_list(request: Request, response: Response, db: AsyncSession, mother_id: int,
+                       record_type: str, page: pagination.PageParams, caller_id: int):
+    model, schema, load = RECORD_LISTS[record_type]
+    probe = conditional.rows_version(model, model.mother_id == mother_id)
+    version = conditional.plain_version(await conditional.probe_async(db, *probe))
+    not_modified = conditional.check(request, response, version, caller_id)
+    if not_modified:
+        return not_modified
+
+    use_cache = record_cache.cacheable(page)
+    entry = record_cache.get(mother_id, record_type, version) if use_cache else None
+    total = None
+    if entry is None:
+        records = await load(db, mother_id=mother_id, page=page)
+        body = serialization.dump(List[schema], records.items)
+        entry = record_cache.Entry(version=version, next_cursor=records.next_cursor, body=body)
+        total = records.total
+        if use_cache:
+            record_cache.put(mother_id, record_type, *entry)
+
+    pagination.respond(response, pagination.Page(items=[], next_cursor=entry.next_cursor, total=total))
+    return serialization.json_response(entry.body, response)
 
 # --- MIDWIFE ACTIONS (UPDATED) ---
 
@@ -210,24 +431,132 @@ async def read_mothers_me(current_mother: schemas.Mother = Depends(get_current_m
 def create_mother_for_midwife(
     mother: schemas.MotherCreate, 
     db: Session = Depends(get_db), 
-    current_midwife: schemas.Midwife = Depends(get_current_midwife)
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
 ):
     db_mother = crud.get_mother_by_nic(db, nic=mother.nic)
     if db_mother:
         raise HTTPException(status_code=400, detail="Mother with this NIC already registered")
     return crud.create_mother(db=db, mother=mother, midwife_id=current_midwife.id)
 
+# NEW: Bulk import (onboarding a whole area from a CSV / JSON-lines file)
+# kind=mothers rows need full_name, nic, password, ...; record kinds need
+# mother_nic (or mother_id) plus the usual record fields. Runs in the
+# background: the 202 response is the job, poll its Location for the report.
+@app.post("/mothers/import", response_model=schemas.ImportJob, status_code=status.HTTP_202_ACCEPTED)
+def import_mothers_and_records(
+    response: Response,
+    kind: str = Query(..., pattern="^(" + "|".join(bulk_import.KINDS) + ")$"),
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
+):
+    fmt = format or bulk_import.detect_format(file.filename, file.content_type)
+    try:
+        job = bulk_import.start_job(db, midwife_id=current_midwife.id, kind=kind, upload=file.file, fmt=fmt)
+    except bulk_import.FileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except bulk_import.Busy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many imports in progress, try again shortly",
+            headers={"Retry-After": str(bulk_import.IMPORT_RETRY_AFTER)},
+        )
+    response.headers["Location"] = f"/mothers/import/{job.id}"
+    return bulk_import.job_view(job)
+
+# Progress of an import; "report" holds the per-row results once status is "done"
+@app.get("/mothers/import/{job_id}", response_model=schemas.ImportJob)
+def read_import_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
+):
+    job = bulk_import.get_job(db, midwife_id=current_midwife.id, job_id=job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return bulk_import.job_view(job)
+
+# NEW: Batch record sync (a whole clinic day in one request / one transaction)
+# Send an Idempotency-Key header (unique per batch) so a retry after a dropped
+# connection returns the original ids instead of inserting the records again.
+@app.post("/mothers/records/batch", response_model=schemas.RecordBatchResult)
+def sync_record_batch(
+    batch: schemas.RecordBatch,
+    idempotency_key: Optional[str] = Header(None, max_length=100),
+    db: Session = Depends(get_db),
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
+):
+    if idempotency_key:
+        replay = crud.get_idempotent_response(db, midwife_id=current_midwife.id, key=idempotency_key)
+        if replay:
+            replay.replayed = True
+            return replay
+
+    # Ownership is checked once per mother, for the whole batch
+    mother_ids = {op.mother_id for op in batch.operations}
+    missing = mother_ids - crud.get_owned_mother_ids(db, midwife_id=current_midwife.id, mother_ids=mother_ids)
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail={"message": "Mother not found among your registered mothers", "mother_ids": sorted(missing)}
+        )
+
+    result = crud.create_records_batch(
+        db, midwife_id=current_midwife.id, operations=batch.operations, idempotency_key=idempotency_key
+    )
+    if result is None:
+        # A concurrent retry with the same key got there first
+        replay = crud.get_idempotent_response(db, midwife_id=current_midwife.id, key=idempotency_key)
+        if replay is None:
+            raise HTTPException(status_code=409, detail="Batch conflicts with another request; retry it")
+        replay.replayed = True
+        return replay
+    return result
+
+# NEW: Delta sync for the mobile app. First call without ?since= (full copy,
+# paged); afterwards pass the last next_token to get only what changed or was
+# deleted since. Keep calling while has_more is true.
+@app.get("/sync", response_model=schemas.SyncFeed)
+def sync_caseload(
+    since: Optional[str] = None,
+    limit: int = Query(sync.SYNC_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
+):
+    since_seq = sync.decode_token(since)
+    if since_seq is None:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    feed = sync.changes_for_midwife(db, midwife_id=current_midwife.id, since=since_seq, limit=limit)
+    return serialization.respond(schemas.SyncFeed, feed)
+
+# NEW: Ranked mother search (NIC prefix + full-text name). mode=typeahead treats
+# every word as a prefix and returns at most 10 hits, for search-as-you-type.
+@app.get("/mothers/search", response_model=List[schemas.MotherSearchHit])
+def search_my_mothers(
+    q: str = Query(..., min_length=1, max_length=100),
+    mode: str = Query("full", pattern="^(full|typeahead)$"),
+    limit: int = Query(search.DEFAULT_SEARCH_LIMIT, ge=1, le=search.MAX_SEARCH_LIMIT),
+    db: Session = Depends(get_read_db),
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
+):
+    typeahead = mode == "typeahead"
+    return search.search_mothers(
+        db, q, midwife_id=current_midwife.id, typeahead=typeahead,
+        limit=min(limit, search.TYPEAHEAD_LIMIT) if typeahead else limit,
+    )
+
 # UPDATED: Accepts 'search' parameter
 @app.get("/mothers/", response_model=List[schemas.Mother])
 def read_mothers_for_midwife(
-    skip: int = 0, 
-    limit: int = 100, 
+    response: Response,
     search: Optional[str] = None, # New parameter
-    db: Session = Depends(get_db),
-    current_midwife: schemas.Midwife = Depends(get_current_midwife)
+    page: pagination.PageParams = Depends(pagination.page_params),
+    db: Session = Depends(get_read_db),
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
 ):
-    mothers = crud.get_mothers_by_midwife(db, midwife_id=current_midwife.id, skip=skip, limit=limit, search=search)
-    return mothers
+    mothers = crud.get_mothers_by_midwife(db, midwife_id=current_midwife.id, page=page, search=search)
+    return serialization.respond(List[schemas.Mother], pagination.respond(response, mothers), response)
 
 # NEW: Update Mother Details
 @app.put("/mothers/{mother_id}", response_model=schemas.Mother)
@@ -235,7 +564,7 @@ def update_mother_details(
     mother_id: int,
     mother_update: schemas.MotherUpdate,
     db: Session = Depends(get_db),
-    current_midwife: schemas.Midwife = Depends(get_current_midwife)
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
 ):
     # 1. Check if mother exists
     db_mother = crud.get_mother(db, mother_id=mother_id)
@@ -254,18 +583,23 @@ def create_record_for_mother(
     mother_id: int,
     record: schemas.HealthRecordCreate,
     db: Session = Depends(get_db),
-    current_midwife: schemas.Midwife = Depends(get_current_midwife)
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
 ):
     return crud.create_health_record(db=db, record=record, mother_id=mother_id)
 
 @app.get("/mothers/{mother_id}/records/", response_model=List[schemas.HealthRecord])
-def read_records_for_mother(
+async def read_records_for_mother(
     mother_id: int,
-    db: Session = Depends(get_db),
-    current_midwife: schemas.Midwife = Depends(get_current_midwife)
+    request: Request,
+    response: Response,
+    page: pagination.PageParams = Depends(pagination.page_params),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
 ):
-    records = crud.get_health_records_for_mother(db, mother_id=mother_id)
-    return records
+    return await _record_list(
+        request, response, db, mother_id=mother_id, record_type="health_records",
+        page=page, caller_id=current_midwife.id
+    )
             
 # --- PREGNANCY RECORD ENDPOINTS ---
 
@@ -274,7 +608,7 @@ def create_pregnancy_record_for_mother(
     mother_id: int,
     record: schemas.PregnancyRecordCreate,
     db: Session = Depends(get_db),
-    current_midwife: schemas.Midwife = Depends(get_current_midwife)
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
 ):
     # Check if mother exists
     db_mother = crud.get_mother(db, mother_id=mother_id)
@@ -284,12 +618,18 @@ def create_pregnancy_record_for_mother(
     return crud.create_pregnancy_record(db=db, record=record, mother_id=mother_id)
 
 @app.get("/mothers/{mother_id}/pregnancy-records/", response_model=List[schemas.PregnancyRecord])
-def read_pregnancy_records_for_mother(
+async def read_pregnancy_records_for_mother(
     mother_id: int,
-    db: Session = Depends(get_db),
-    current_midwife: schemas.Midwife = Depends(get_current_midwife)
+    request: Request,
+    response: Response,
+    page: pagination.PageParams = Depends(pagination.page_params),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
 ):
-    return crud.get_pregnancy_records_for_mother(db, mother_id=mother_id)
+    return await _record_list(
+        request, response, db, mother_id=mother_id, record_type="pregnancy_records",
+        page=page, caller_id=current_midwife.id
+    )
 
 # --- DELIVERY RECORD ENDPOINTS ---
 
@@ -298,7 +638,7 @@ def create_delivery_record_for_mother(
     mother_id: int,
     record: schemas.DeliveryRecordCreate,
     db: Session = Depends(get_db),
-    current_midwife: schemas.Midwife = Depends(get_current_midwife)
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
 ):
     # Check if mother exists
     db_mother = crud.get_mother(db, mother_id=mother_id)
@@ -308,12 +648,18 @@ def create_delivery_record_for_mother(
     return crud.create_delivery_record(db=db, record=record, mother_id=mother_id)
 
 @app.get("/mothers/{mother_id}/delivery-records/", response_model=List[schemas.DeliveryRecord])
-def read_delivery_records_for_mother(
+async def read_delivery_records_for_mother(
     mother_id: int,
-    db: Session = Depends(get_db),
-    current_midwife: schemas.Midwife = Depends(get_current_midwife)
+    request: Request,
+    response: Response,
+    page: pagination.PageParams = Depends(pagination.page_params),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
 ):
-    return crud.get_delivery_records_for_mother(db, mother_id=mother_id)
+    return await _record_list(
+        request, response, db, mother_id=mother_id, record_type="delivery_records",
+        page=page, caller_id=current_midwife.id
+    )
 
 # --- ANTENATAL PLAN ENDPOINTS ---
 
@@ -322,7 +668,7 @@ def create_antenatal_plan_for_mother(
     mother_id: int,
     plan: schemas.AntenatalPlanCreate,
     db: Session = Depends(get_db),
-    current_midwife: schemas.Midwife = Depends(get_current_midwife)
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
 ):
     # Check if mother exists
     db_mother = crud.get_mother(db, mother_id=mother_id)
@@ -332,44 +678,194 @@ def create_antenatal_plan_for_mother(
     return crud.create_antenatal_plan(db=db, plan=plan, mother_id=mother_id)
 
 @app.get("/mothers/{mother_id}/antenatal-plans/", response_model=List[schemas.AntenatalPlan])
-def read_antenatal_plans_for_mother(
+async def read_antenatal_plans_for_mother(
     mother_id: int,
-    db: Session = Depends(get_db),
-    current_midwife: schemas.Midwife = Depends(get_current_midwife)
+    request: Request,
+    response: Response,
+    page: pagination.PageParams = Depends(pagination.page_params),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
 ):
-    return crud.get_antenatal_plans_for_mother(db, mother_id=mother_id)
+    return await _record_list(
+        request, response, db, mother_id=mother_id, record_type="antenatal_plans",
+        page=page, caller_id=current_midwife.id
+    )
 
 # --- MOTHER PORTAL ENDPOINTS (READ-ONLY) ---
 
 @app.get("/my-pregnancy-records/", response_model=List[schemas.PregnancyRecord])
-def read_my_pregnancy_records(
-    db: Session = Depends(get_db),
-    current_mother: schemas.Mother = Depends(get_current_mother)
+async def read_my_pregnancy_records(
+    request: Request,
+    response: Response,
+    page: pagination.PageParams = Depends(pagination.page_params),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_mother: schemas.MotherPrincipal = Depends(get_current_mother)
 ):
     # The 'current_mother' dependency ensures this is a valid mother login
-    return crud.get_pregnancy_records_for_mother(db, mother_id=current_mother.id)
+    return await _record_list(
+        request, response, db, mother_id=current_mother.id, record_type="pregnancy_records",
+        page=page, caller_id=current_mother.id
+    )
 
 @app.get("/my-delivery-records/", response_model=List[schemas.DeliveryRecord])
-def read_my_delivery_records(
-    db: Session = Depends(get_db),
-    current_mother: schemas.Mother = Depends(get_current_mother)
+async def read_my_delivery_records(
+    request: Request,
+    response: Response,
+    page: pagination.PageParams = Depends(pagination.page_params),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_mother: schemas.MotherPrincipal = Depends(get_current_mother)
 ):
-    return crud.get_delivery_records_for_mother(db, mother_id=current_mother.id)
+    return await _record_list(
+        request, response, db, mother_id=current_mother.id, record_type="delivery_records",
+        page=page, caller_id=current_mother.id
+    )
 
 @app.get("/my-antenatal-plans/", response_model=List[schemas.AntenatalPlan])
-def read_my_antenatal_plans(
-    db: Session = Depends(get_db),
-    current_mother: schemas.Mother = Depends(get_current_mother)
+async def read_my_antenatal_plans(
+    request: Request,
+    response: Response,
+    page: pagination.PageParams = Depends(pagination.page_params),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_mother: schemas.MotherPrincipal = Depends(get_current_mother)
 ):
-    return crud.get_antenatal_plans_for_mother(db, mother_id=current_mother.id)
+    return await _record_list(
+        request, response, db, mother_id=current_mother.id, record_type="antenatal_plans",
+        page=page, caller_id=current_mother.id
+    )
             
+# --- MOH: Search mothers across every midwife in the area ---
+@app.get("/moh/mothers/search", response_model=List[schemas.MotherSearchHit])
+def search_area_mothers(
+    q: str = Query(..., min_length=1, max_length=100),
+    mode: str = Query("full", pattern="^(full|typeahead)$"),
+    limit: int = Query(search.DEFAULT_SEARCH_LIMIT, ge=1, le=search.MAX_SEARCH_LIMIT),
+    db: Session = Depends(get_read_db),
+    current_moh: schemas.MOHOfficer = Depends(get_current_moh)
+):
+    if not current_moh.moh_area:
+        raise HTTPException(status_code=400, detail="No MOH area assigned to this account")
+    typeahead = mode == "typeahead"
+    return search.search_mothers(
+        db, q, moh_area=current_moh.moh_area, typeahead=typeahead,
+        limit=min(limit, search.TYPEAHEAD_LIMIT) if typeahead else limit,
+    )
+
+# --- MOH: Area dashboard (pre-aggregated monthly counters, see analytics.py) ---
+# Defaults to the past year plus the next 9 months (so edd_due shows what is coming).
+@app.get("/moh/analytics", response_model=List[schemas.AreaStat])
+def read_area_analytics(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    metric: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_read_db),
+    current_moh: schemas.MOHOfficer = Depends(get_current_moh)
+):
+    if not current_moh.moh_area:
+        raise HTTPException(status_code=400, detail="No MOH area assigned to this account")
+    today = date.today()
+    start = start or date(today.year - 1, today.month, 1)
+    end = end or date(today.year + (today.month + 8) // 12, (today.month + 8) % 12 + 1, 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return analytics.area_stats(db, current_moh.moh_area, start, end, metrics=metric)
+
+# --- CLINIC SCHEDULE ---
+# Upcoming clinic visits, class dates and EDDs between start and end (inclusive,
+# default: the next 7 days), sorted by date and cursor-paginated.
+def _schedule_window(start: Optional[date], end: Optional[date], kinds: Optional[List[str]]):
+    unknown = set(kinds or []) - set(schedule.EVENTS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown kind: {', '.join(sorted(unknown))}")
+    start = start or date.today()
+    end = end or start + timedelta(days=schedule.DEFAULT_WINDOW_DAYS - 1)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days >= schedule.MAX_WINDOW_DAYS:
+        raise HTTPException(status_code=400, detail=f"Window is limited to {schedule.MAX_WINDOW_DAYS} days")
+    return start, end
+
+@app.get("/schedule", response_model=List[schemas.ScheduleEntry])
+def read_my_schedule(
+    response: Response,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    kind: Optional[List[str]] = Query(None),
+    page: pagination.PageParams = Depends(pagination.page_params),
+    db: Session = Depends(get_read_db),
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
+):
+    start, end = _schedule_window(start, end, kind)
+    entries = schedule.upcoming(db, start, end, midwife_id=current_midwife.id, kinds=kind, page=page)
+    return serialization.respond(List[schemas.ScheduleEntry], pagination.respond(response, entries), response)
+
+@app.get("/moh/schedule", response_model=List[schemas.ScheduleEntry])
+def read_area_schedule(
+    response: Response,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    kind: Optional[List[str]] = Query(None),
+    page: pagination.PageParams = Depends(pagination.page_params),
+    db: Session = Depends(get_read_db),
+    current_moh: schemas.MOHOfficer = Depends(get_current_moh)
+):
+    if not current_moh.moh_area:
+        raise HTTPException(status_code=400, detail="No MOH area assigned to this account")
+    start, end = _schedule_window(start, end, kind)
+    entries = schedule.upcoming(db, start, end, moh_area=current_moh.moh_area, kinds=kind, page=page)
+    return serialization.respond(List[schemas.ScheduleEntry], pagination.respond(response, entries), response)
+
+# --- CASELOAD EXPORT (STREAMED) ---
+# ndjson: every table (or ?table=...), one JSON object per line tagged with "type".
+# csv / parquet: one table per download (?table=, default mothers).
+
+def _export_response(scope: export.Scope, format: str, table: Optional[str], name: str):
+    if format == "ndjson":
+        body = export.ndjson_stream(scope, [table] if table else list(export.TABLES))
+    else:
+        table = table or "mothers"
+        if format == "csv":
+            body = export.csv_stream(scope, table)
+        else:
+            if not export.parquet_available():
+                raise HTTPException(status_code=400, detail="Parquet export is not available on this server (pyarrow not installed)")
+            body = export.parquet_stream(scope, table)
+        name = f"{name}-{table}"
+    extension = "ndjson" if format == "ndjson" else format
+    return StreamingResponse(
+        body,
+        media_type=export.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{extension}"'},
+    )
+
+EXPORT_TABLE_PATTERN = "^(" + "|".join(export.TABLES) + ")$"
+
+@app.get("/export")
+def export_my_caseload(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$"),
+    table: Optional[str] = Query(None, pattern=EXPORT_TABLE_PATTERN),
+    current_midwife: schemas.MidwifePrincipal = Depends(get_current_midwife)
+):
+    scope = export.Scope(midwife_id=current_midwife.id)
+    return _export_response(scope, format, table, name=f"caseload-{current_midwife.id}")
+
+@app.get("/moh/export")
+def export_moh_area(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$"),
+    table: Optional[str] = Query(None, pattern=EXPORT_TABLE_PATTERN),
+    current_moh: schemas.MOHOfficer = Depends(get_current_moh)
+):
+    if not current_moh.moh_area:
+        raise HTTPException(status_code=400, detail="No MOH area assigned to this account")
+    scope = export.Scope(moh_area=current_moh.moh_area)
+    return _export_response(scope, format, table, name="moh-area")
+
 # --- MOTHER PASSWORD CHANGE ---
 
 @app.put("/mothers/me/password", response_model=dict)
 def change_mother_password(
     password_data: schemas.PasswordChange,
     db: Session = Depends(get_db),
-    current_mother: schemas.Mother = Depends(get_current_mother)
+    current_mother: schemas.MotherPrincipal = Depends(get_current_mother)
 ):
     success = crud.update_mother_password(db, mother_id=current_mother.id, password_data=password_data)
     if not success:
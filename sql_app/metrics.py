@@ -0,0 +1,170 @@
+import os
+import time
+from contextvars import ContextVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client import generate_latest, multiprocess
+from sqlalchemy import event
+
+# --- Prometheus metrics ---
+# Per-route latency, SQL statements / SQL time per request, slow-query log,
+# pool and bcrypt waits, cache counters. Served at GET /metrics.
+#
+# Under gunicorn every worker has its own counters. With PROMETHEUS_MULTIPROC_DIR
+# set (gunicorn.conf.py does it) prometheus_client keeps them in mmap'ed files
+# in that directory and /metrics adds up all workers, whichever one answers
+# the scrape.
+
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", "0.5"))
+# How often a worker copies pool / hashing / cache stats into its gauges
+METRICS_REFRESH_SECONDS = float(os.getenv("METRICS_REFRESH_SECONDS", "5"))
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being served", multiprocess_mode="livesum",
+)
+REQUEST_SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements", "SQL statements issued per request",
+    ["route"], buckets=STATEMENT_BUCKETS,
+)
+REQUEST_SQL_SECONDS = Histogram(
+    "http_request_sql_seconds", "Time spent in SQL per request",
+    ["route"], buckets=LATENCY_BUCKETS,
+)
+SLOW_QUERIES = Counter("sql_slow_queries_total", "Statements slower than SLOW_QUERY_SECONDS", ["route"])
+
+POOL_WAIT = Histogram("db_pool_wait_seconds", "Time to get a connection from the pool", buckets=LATENCY_BUCKETS)
+HASH_WAIT = Histogram("password_hash_wait_seconds", "Time a hash/verify call queued for a worker",
+                      buckets=LATENCY_BUCKETS)
+HASH_RUN = Histogram("password_hash_run_seconds", "Time a hash/verify call ran", buckets=LATENCY_BUCKETS)
+
+# Snapshots of the stats() dicts the modules already keep (summed over live workers)
+DB_POOL = Gauge("db_pool", "Connection pool state", ["engine", "stat"], multiprocess_mode="livesum")
+HASH_POOL = Gauge("password_hash_pool", "Password hashing pool state", ["stat"], multiprocess_mode="livesum")
+CACHE = Gauge("cache_events", "Cache hits / misses / invalidations", ["cache", "event"],
+              multiprocess_mode="livesum")
+RATE_LIMIT = Gauge("rate_limit", "Login / registration requests allowed, limited (429) and shed (503)", ["stat"],
+                   multiprocess_mode="livesum")
+
+
+# --- Per-request SQL accounting ---
+class _RequestStats:
+    __slots__ = ("scope", "statements", "sql_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.statements = 0
+        self.sql_seconds = 0.0
+
+
+# Set by the middleware. The object is shared with the threadpool (sync
+# endpoints) and with SQLAlchemy's async greenlets, which copy the context.
+_current = ContextVar("metrics_request", default=None)
+
+
+def _route_name(scope):
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    request = _current.get()
+    route = _route_name(request.scope) if request is not None else "<background>"
+    if request is not None:
+        request.statements += 1
+        request.sql_seconds += elapsed
+    if elapsed >= SLOW_QUERY_SECONDS:
+        SLOW_QUERIES.labels(route).inc()
+        print(f"[SLOW SQL] {elapsed * 1000:.0f} ms on {route}: {' '.join(statement.split())[:500]}")
+
+
+def instrument_engine(engine):
+    # Accepts sync engines and AsyncEngine (events live on its sync_engine)
+    engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(engine, "before_cursor_execute", _before_execute):
+        event.listen(engine, "before_cursor_execute", _before_execute)
+        event.listen(engine, "after_cursor_execute", _after_execute)
+
+
+# --- Stats snapshots ---
+_last_refresh = 0.0
+
+
+def refresh_gauges():
+    global _last_refresh
+    _last_refresh = time.monotonic()
+    from . import database, hashing, principals, ratelimit, record_cache
+
+    for engine_name, pool in database.pool_stats().items():
+        for stat, value in pool.items():
+            if isinstance(value, (int, float)):
+                DB_POOL.labels(engine_name, stat).set(value)
+    for stat, value in hashing.stats().items():
+        HASH_POOL.labels(stat).set(value)
+    for cache_name, module in (("principals", principals), ("records", record_cache)):
+        for name, value in module.stats().items():
+            CACHE.labels(cache_name, name).set(value)
+    for stat, value in ratelimit.stats().items():
+        RATE_LIMIT.labels(stat).set(value)
+
+
+def _maybe_refresh():
+    if time.monotonic() - _last_refresh >= METRICS_REFRESH_SECONDS:
+        refresh_gauges()
+
+
+# --- ASGI middleware ---
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request = _RequestStats(scope)
+        token = _current.set(request)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_PROGRESS.dec()
+            _current.reset(token)
+            route = _route_name(scope)
+            REQUEST_LATENCY.labels(scope["method"], route, str(status[0])).observe(elapsed)
+            REQUEST_SQL_STATEMENTS.labels(route).observe(request.statements)
+            REQUEST_SQL_SECONDS.labels(route).observe(request.sql_seconds)
+            _maybe_refresh()
+
+
+# --- Exposition ---
+def render():
+    refresh_gauges()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
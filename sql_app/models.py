@@ -1,7 +1,20 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, TEXT, DECIMAL, DATETIME, Boolean, Date
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, TEXT, DECIMAL, DATETIME, Boolean, Date, Index, UniqueConstraint, DDL, event
+from datetime import datetime
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 from .database import Base
 
+# DATETIME with microseconds on MySQL too (plain DATETIME there is whole seconds)
+PRECISE_DATETIME = DATETIME().with_variant(mysql.DATETIME(fsp=6), "mysql")
+
+# --- Change tracking for delta sync (see sync.py) ---
+# updated_at / change_seq are stamped on every insert and update by the
+# before_flush hook in sync.py; change_seq comes from one global counter, so
+# "everything with change_seq > N" is exactly what changed after sync token N.
+class ChangeTracked:
+    updated_at = Column(DATETIME)
+    change_seq = Column(BigInteger, index=True)
+
 # --- UPDATED MODEL: Midwife ---
 class Midwife(Base):
     __tablename__ = "midwives"
@@ -11,19 +24,20 @@ class Midwife(Base):
     full_name = Column(String(255))
     
     # NEW FIELDS FROM WEB FORM
-    nic = Column(String(20))
+    nic = Column(String(20), index=True)
     date_of_birth = Column(Date)
-    phone_number = Column(String(20))
-    email = Column(String(255))
+    phone_number = Column(String(20), index=True)
+    email = Column(String(255), index=True)
     residential_address = Column(TEXT)
     slmc_reg_no = Column(String(50))
     service_grade = Column(String(50))
-    assigned_moh_area = Column(String(100))
+    assigned_moh_area = Column(String(100), index=True)
     is_active = Column(Boolean, default=True) # For suspension
+    updated_at = Column(PRECISE_DATETIME, default=datetime.utcnow, onupdate=datetime.utcnow) # ETag / Last-Modified
     
     mothers = relationship("Mother", back_populates="owner")
 
-class Mother(Base):
+class Mother(ChangeTracked, Base):
     __tablename__ = "mothers"
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String(255), nullable=False)
@@ -31,7 +45,8 @@ class Mother(Base):
     address = Column(TEXT)
     contact_number = Column(String(20))
     hashed_password = Column(String(255), nullable=False)
-    midwife_id = Column(Integer, ForeignKey("midwives.id"), nullable=False)
+    midwife_id = Column(Integer, ForeignKey("midwives.id"), nullable=False, index=True)
+    created_at = Column(DATETIME, default=datetime.utcnow) # registration date (analytics)
     
     owner = relationship("Midwife", back_populates="mothers")
     health_records = relationship("HealthRecord", back_populates="mother")
@@ -39,7 +54,30 @@ class Mother(Base):
     delivery_records = relationship("DeliveryRecord", back_populates="mother")
     antenatal_plans = relationship("AntenatalPlan", back_populates="mother")
 
-class HealthRecord(Base):
+    __table_args__ = (
+        # A midwife's mothers in delta-sync order (see sync.py)
+        Index("ix_mothers_midwife_id_change_seq", "midwife_id", "change_seq"),
+        # Name search (see search.py). MySQL: n-gram FULLTEXT index so partial
+        # names match; SQLite uses the mothers_fts table below instead.
+        Index("ix_mothers_full_name_fulltext", "full_name", mysql_prefix="FULLTEXT", mysql_with_parser="ngram").ddl_if(dialect="mysql"),
+    )
+
+# SQLite fallback for name search: external-content FTS5 index kept in sync by triggers
+MOTHERS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS mothers_fts USING fts5("
+    "full_name, content='mothers', content_rowid='id', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS mothers_fts_ai AFTER INSERT ON mothers BEGIN "
+    "INSERT INTO mothers_fts(rowid, full_name) VALUES (new.id, new.full_name); END",
+    "CREATE TRIGGER IF NOT EXISTS mothers_fts_ad AFTER DELETE ON mothers BEGIN "
+    "INSERT INTO mothers_fts(mothers_fts, rowid, full_name) VALUES ('delete', old.id, old.full_name); END",
+    "CREATE TRIGGER IF NOT EXISTS mothers_fts_au AFTER UPDATE OF full_name ON mothers BEGIN "
+    "INSERT INTO mothers_fts(mothers_fts, rowid, full_name) VALUES ('delete', old.id, old.full_name); "
+    "INSERT INTO mothers_fts(rowid, full_name) VALUES (new.id, new.full_name); END",
+)
+for _statement in MOTHERS_FTS_DDL:
+    event.listen(Mother.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+class HealthRecord(ChangeTracked, Base):
     __tablename__ = "health_records"
     id = Column(Integer, primary_key=True, index=True)
     visit_date = Column(DATETIME, nullable=False)
@@ -49,11 +87,16 @@ class HealthRecord(Base):
     mother_id = Column(Integer, ForeignKey("mothers.id"), nullable=False)
     mother = relationship("Mother", back_populates="health_records")
 
-class PregnancyRecord(Base):
+    __table_args__ = (
+        # A mother's visits, in the (visit_date, id) order they are paged in
+        Index("ix_health_records_mother_id_visit_date", "mother_id", "visit_date"),
+    )
+
+class PregnancyRecord(ChangeTracked, Base):
     __tablename__ = "pregnancy_records"
     id = Column(Integer, primary_key=True, index=True)
-    mother_id = Column(Integer, ForeignKey("mothers.id"), nullable=False)
-    created_at = Column(DATETIME)
+    mother_id = Column(Integer, ForeignKey("mothers.id"), nullable=False, index=True)
+    created_at = Column(DATETIME, default=datetime.utcnow)
     
     # Vitals
     blood_group = Column(String(10))
@@ -84,11 +127,17 @@ class PregnancyRecord(Base):
     # Relationship
     mother = relationship("Mother", back_populates="pregnancy_records")
 
-class DeliveryRecord(Base):
+    __table_args__ = (
+        # Date-range scans for the schedule (see schedule.py)
+        Index("ix_pregnancy_records_edd_mother_id", "edd", "mother_id"),
+        Index("ix_pregnancy_records_us_corrected_edd_mother_id", "us_corrected_edd", "mother_id"),
+    )
+
+class DeliveryRecord(ChangeTracked, Base):
     __tablename__ = "delivery_records"
     id = Column(Integer, primary_key=True, index=True)
-    mother_id = Column(Integer, ForeignKey("mothers.id"), nullable=False)
-    created_at = Column(DATETIME)
+    mother_id = Column(Integer, ForeignKey("mothers.id"), nullable=False, index=True)
+    created_at = Column(DATETIME, default=datetime.utcnow)
     
     # Delivery
     delivery_date = Column(DATETIME)
@@ -121,11 +170,11 @@ class DeliveryRecord(Base):
     
     mother = relationship("Mother", back_populates="delivery_records")
 
-class AntenatalPlan(Base):
+class AntenatalPlan(ChangeTracked, Base):
     __tablename__ = "antenatal_plans"
     id = Column(Integer, primary_key=True, index=True)
-    mother_id = Column(Integer, ForeignKey("mothers.id"), nullable=False)
-    created_at = Column(DATETIME)
+    mother_id = Column(Integer, ForeignKey("mothers.id"), nullable=False, index=True)
+    created_at = Column(DATETIME, default=datetime.utcnow)
     
     next_clinic_date = Column(DATETIME)
     
@@ -162,6 +211,14 @@ class AntenatalPlan(Base):
     
     mother = relationship("Mother", back_populates="antenatal_plans")
 
+    __table_args__ = (
+        # Date-range scans for the schedule (see schedule.py)
+        Index("ix_antenatal_plans_next_clinic_date_mother_id", "next_clinic_date", "mother_id"),
+        Index("ix_antenatal_plans_class_1st_date_mother_id", "class_1st_date", "mother_id"),
+        Index("ix_antenatal_plans_class_2nd_date_mother_id", "class_2nd_date", "mother_id"),
+        Index("ix_antenatal_plans_class_3rd_date_mother_id", "class_3rd_date", "mother_id"),
+    )
+
 # --- NEW MODEL: MOH Officer ---
 class MOHOfficer(Base):
     __tablename__ = "moh_officers"
@@ -170,4 +227,103 @@ class MOHOfficer(Base):
     hashed_password = Column(String(255), nullable=False)
     full_name = Column(String(255))
     moh_area = Column(String(100))
-    email = Column(String(255))
\ No newline at end of file
+    email = Column(String(255))
+
+# --- NEW MODEL: Outbound email queue ---
+# Rows are written in the same transaction as the data they announce and
+# delivered later by the background sender in mailer.py.
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(TEXT) # Cleared once sent (it can contain credentials)
+    status = Column(String(20), nullable=False, default="pending") # pending / sent / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DATETIME, nullable=False)
+    last_error = Column(TEXT)
+    created_at = Column(DATETIME)
+    sent_at = Column(DATETIME)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+# --- NEW MODEL: Idempotency keys for batch record sync ---
+# One row per (midwife, Idempotency-Key) holding the JSON response that was
+# returned, written in the same transaction as the records it created, so a
+# retried request replays the answer instead of inserting twice.
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    id = Column(Integer, primary_key=True, index=True)
+    midwife_id = Column(Integer, ForeignKey("midwives.id"), nullable=False)
+    key = Column(String(100), nullable=False)
+    response = Column(TEXT, nullable=False)
+    created_at = Column(DATETIME, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("midwife_id", "key", name="uq_idempotency_keys_midwife_key"),
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
+
+# --- NEW MODELS: Delta sync bookkeeping ---
+# Single-row counter handing out change_seq values. Taking the next values
+# locks the row until commit, so sequence order is also commit order.
+class SyncCounter(Base):
+    __tablename__ = "sync_counter"
+    id = Column(Integer, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+event.listen(SyncCounter.__table__, "after_create", DDL("INSERT INTO sync_counter (id, value) VALUES (1, 0)"))
+
+# Deleted rows, so clients can drop them from their local copy
+class SyncTombstone(Base):
+    __tablename__ = "sync_tombstones"
+    id = Column(Integer, primary_key=True, index=True)
+    table_name = Column(String(50), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    midwife_id = Column(Integer, ForeignKey("midwives.id"), nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DATETIME, nullable=False)
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_midwife_id_change_seq", "midwife_id", "change_seq"),
+    )
+
+# --- NEW MODEL: Pre-aggregated MOH-area statistics (see analytics.py) ---
+# One counter per (area, month, metric, dimension), kept up to date by +/- deltas
+# in the same transaction as the records they count.
+class AreaMonthlyStat(Base):
+    __tablename__ = "area_monthly_stats"
+    id = Column(Integer, primary_key=True, index=True)
+    moh_area = Column(String(100), nullable=False)
+    month = Column(Date, nullable=False) # first day of the month
+    metric = Column(String(50), nullable=False)
+    dimension = Column(String(50), nullable=False, default="") # e.g. delivery mode
+    value = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("moh_area", "month", "metric", "dimension", name="uq_area_monthly_stats_key"),
+    )
+
+# --- NEW MODEL: Bulk import jobs (see bulk_import.py) ---
+# An upload is imported in the background; the row carries its progress and,
+# once finished, the JSON import report.
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    midwife_id = Column(Integer, ForeignKey("midwives.id"), nullable=False)
+    kind = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="queued") # queued / running / done / failed
+    total_rows = Column(Integer, nullable=False, default=0)
+    inserted = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    report = Column(TEXT)
+    error = Column(TEXT)
+    created_at = Column(DATETIME, nullable=False)
+    started_at = Column(DATETIME)
+    finished_at = Column(DATETIME)
+
+    __table_args__ = (
+        Index("ix_import_jobs_midwife_id", "midwife_id"),
+    )
@@ -0,0 +1,147 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, List, Optional
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, func, or_, select
+
+# --- Keyset (cursor) pagination shared by every list endpoint ---
+# A page is "rows strictly after the last key of the previous page", so page N
+# costs the same index range scan as page 1 (no OFFSET). Keys must be non-null
+# and end with the primary key so they are unique.
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+@dataclass
+class PageParams:
+    cursor: Optional[List[Any]] = None
+    limit: int = DEFAULT_PAGE_SIZE
+    include_total: bool = False
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+def encode_cursor(values):
+    plain = [v.isoformat() if isinstance(v, (datetime, date)) else v for v in values]
+    raw = json.dumps(plain, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or not values:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Only scalars can be compared against the key columns (bool is an int subclass)
+    if any(isinstance(v, bool) or not isinstance(v, (str, int, float)) for v in values):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+# Dependency: ?cursor=<opaque>&limit=<n>&include_total=true
+def page_params(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
+) -> PageParams:
+    return PageParams(
+        cursor=decode_cursor(cursor) if cursor else None,
+        limit=limit,
+        include_total=include_total,
+    )
+
+
+def _coerce(column, value):
+    # Cursor values travel as JSON; turn ISO strings back into dates for date keys
+    if not isinstance(value, str):
+        return value
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value
+
+
+def _after(keys, values):
+    # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y), spelled out so MySQL can use the index
+    clauses = []
+    for i, column in enumerate(keys):
+        equal_prefix = [keys[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, column > values[i]))
+    return or_(*clauses)
+
+
+def paginate(query, page: Optional[PageParams], keys) -> Page:
+    page = page or PageParams()
+    total = None
+    if page.include_total:
+        total = query.order_by(None).count()
+
+    if page.cursor is not None:
+        if len(page.cursor) != len(keys):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        values = [_coerce(column, value) for column, value in zip(keys, page.cursor)]
+        query = query.filter(_after(keys, values))
+
+    # Fetch one extra row to know whether another page exists
+    items = query.order_by(*keys).limit(page.limit + 1).all()
+    next_cursor = None
+    if len(items) > page.limit:
+        items = items[:page.limit]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in keys])
+    return Page(items=items, next_cursor=next_cursor, total=total)
+
+
+# Same as paginate(), for a select() statement on an AsyncSession
+async def paginate_async(db, stmt, page: Optional[PageParams], keys) -> Page:
+    page = page or PageParams()
+    total = None
+    if page.include_total:
+        total = await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+
+    if page.cursor is not None:
+        if len(page.cursor) != len(keys):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        values = [_coerce(column, value) for column, value in zip(keys, page.cursor)]
+        stmt = stmt.where(_after(keys, values))
+
+    items = (await db.scalars(stmt.order_by(*keys).limit(page.limit + 1))).all()
+    next_cursor = None
+    if len(items) > page.limit:
+        items = items[:page.limit]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in keys])
+    return Page(items=list(items), next_cursor=next_cursor, total=total)
+
+
+# Moves the paging metadata into headers so list bodies stay plain JSON arrays
+def respond(response: Response, page: Page):
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(page.total)
+    return page.items
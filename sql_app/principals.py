@@ -0,0 +1,70 @@
+import os
+import threading
+
+from . import cache, schemas
+
+# --- Authenticated-principal cache ---
+# get_current_midwife / get_current_mother / get_current_moh resolve the JWT
+# subject to a user row on every request. This caches a small snapshot of that
+# row (never the password hash) keyed by token subject, so repeat requests
+# skip the DB round trip.
+#
+# Set PRINCIPAL_CACHE_URL=redis://... to share one cache between all gunicorn
+# workers; otherwise each worker keeps its own, and a change made through
+# another worker is picked up after at most PRINCIPAL_CACHE_TTL seconds.
+
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+_SCHEMAS = {
+    "midwife": schemas.MidwifePrincipal,
+    "mother": schemas.MotherPrincipal,
+    "moh": schemas.MOHOfficer,
+}
+
+_backend = cache.backend_from_url(
+    os.getenv("PRINCIPAL_CACHE_URL"),
+    prefix="principal:",
+    max_entries=PRINCIPAL_CACHE_SIZE,
+)
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _key(kind: str, subject: str):
+    return f"{kind}:{subject}"
+
+
+def _count(name: str):
+    with _lock:
+        _stats[name] += 1
+
+
+def get(kind: str, subject: str):
+    raw = _backend.get(_key(kind, subject)) if PRINCIPAL_CACHE_TTL > 0 else None
+    if raw is None:
+        _count("misses")
+        return None
+    _count("hits")
+    return _SCHEMAS[kind].model_validate_json(raw)
+
+
+# Snapshots the ORM row into its principal schema, caches it and returns the snapshot
+def put(kind: str, subject: str, row):
+    principal = _SCHEMAS[kind].model_validate(row)
+    if PRINCIPAL_CACHE_TTL > 0:
+        _backend.set(_key(kind, subject), principal.model_dump_json().encode("utf-8"), PRINCIPAL_CACHE_TTL)
+    return principal
+
+
+# Call whenever a cached field, credentials or account status change
+def invalidate(kind: str, subject: str):
+    if subject is None:
+        return
+    _backend.delete(_key(kind, subject))
+    _count("invalidations")
+
+
+def stats():
+    with _lock:
+        return dict(_stats)
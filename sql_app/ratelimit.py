@@ -0,0 +1,196 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+
+from . import hashing
+
+# --- Rate limiting and load shedding for the bcrypt-bound routes ---
+# Logins (/token, /mother/token, /moh/token) and registrations (/register/,
+# /moh/register) each cost a full bcrypt call, so a few clients retrying in a
+# loop can take every worker's CPU away from the clinical endpoints. Two guards
+# run before any of that work:
+#
+#   limit(request, "login", username)  token buckets per client IP and per
+#                                      username / NIC -> 429 + Retry-After
+#   Depends(shed)                      this worker already has AUTH_MAX_IN_FLIGHT
+#                                      logins / registrations being served
+#                                      -> 503 + Retry-After
+#
+# Rules are "<requests>/<second|minute|hour>": a bucket holds that many
+# tokens, refilled evenly over the period, and each request takes one.
+# Buckets are per worker unless RATE_LIMIT_URL=redis://... points all gunicorn
+# workers (and instances) at one shared store.
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_SIZE = int(os.getenv("RATE_LIMIT_SIZE", "100000"))
+# Behind a proxy (Railway, nginx...) the client is the last X-Forwarded-For hop
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "0") == "1"
+
+RULES = {
+    "login": {
+        "ip": os.getenv("RATE_LIMIT_LOGIN_IP", "30/minute"),
+        "user": os.getenv("RATE_LIMIT_LOGIN_USER", "10/minute"),
+    },
+    "register": {
+        "ip": os.getenv("RATE_LIMIT_REGISTER_IP", "10/minute"),
+        "user": os.getenv("RATE_LIMIT_REGISTER_USER", "5/minute"),
+    },
+}
+
+# Logins / registrations one worker serves at once. Each holds a hashing.py
+# pool worker for ~250 ms, so more than a few per pool thread only queue up.
+AUTH_MAX_IN_FLIGHT = int(os.getenv("AUTH_MAX_IN_FLIGHT", str(hashing.HASH_WORKERS * 4)))
+SHED_RETRY_AFTER = 1
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+# "30/minute" -> (capacity, tokens per second)
+def parse_rule(rule: str):
+    count, _, period = rule.partition("/")
+    capacity = int(count)
+    return capacity, capacity / _PERIODS[period.strip()]
+
+
+# --- Bucket stores ---
+# take(key, capacity, rate, now) spends one token and returns 0, or returns
+# the seconds until a token is available (nothing spent).
+
+class MemoryBuckets:
+    # Thread-safe, least recently used buckets dropped past max_entries
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict() # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, rate: float, now: float) -> float:
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RedisBuckets:
+    # One hash per bucket, updated atomically by a Lua script. Works with any
+    # redis-py compatible client.
+    SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.prefix = prefix
+        self._take = client.register_script(self.SCRIPT)
+
+    def take(self, key: str, capacity: int, rate: float, now: float) -> float:
+        return float(self._take(keys=[self.prefix + key], args=[capacity, rate, now]))
+
+    def __len__(self):
+        return 0 # not tracked in Redis
+
+
+# No URL -> per-worker buckets; redis://... -> shared (needs the `redis` package)
+def buckets_from_url(url: Optional[str], prefix: str, **memory_options):
+    if not url:
+        return MemoryBuckets(**memory_options)
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError(f"Rate limit URL {url!r} needs the 'redis' package (pip install redis)")
+    return RedisBuckets(redis.Redis.from_url(url), prefix=prefix)
+
+
+_buckets = buckets_from_url(os.getenv("RATE_LIMIT_URL"), prefix="ratelimit:", max_entries=RATE_LIMIT_SIZE)
+_rules = {group: {scope: parse_rule(rule) for scope, rule in rules.items()} for group, rules in RULES.items()}
+_lock = threading.Lock()
+_stats = {"allowed": 0, "limited_ip": 0, "limited_user": 0, "shed": 0, "in_flight": 0}
+
+
+def _count(name: str):
+    with _lock:
+        _stats[name] += 1
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.rsplit(",", 1)[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
+# Raises 429 if the client IP or the username has no tokens left in `group`
+def limit(request: Request, group: str, username: Optional[str]):
+    if not RATE_LIMIT_ENABLED:
+        return
+    now = time.time()
+    keys = [("ip", client_ip(request))]
+    if username:
+        keys.append(("user", username.strip().lower()))
+    for scope, subject in keys:
+        capacity, rate = _rules[group][scope]
+        wait = _buckets.take(f"{group}:{scope}:{subject}", capacity, rate, now)
+        if wait > 0:
+            _count(f"limited_{scope}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, try again later",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+    _count("allowed")
+
+
+# Route dependency: holds one of AUTH_MAX_IN_FLIGHT slots for the request, or
+# raises 503 straight away when they're all taken
+async def shed():
+    with _lock:
+        admitted = _stats["in_flight"] < AUTH_MAX_IN_FLIGHT
+        _stats["in_flight" if admitted else "shed"] += 1
+    if not admitted:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, try again shortly",
+            headers={"Retry-After": str(SHED_RETRY_AFTER)},
+        )
+    try:
+        yield
+    finally:
+        with _lock:
+            _stats["in_flight"] -= 1
+
+
+def stats():
+    with _lock:
+        snapshot = dict(_stats)
+    snapshot["buckets"] = len(_buckets)
+    return snapshot
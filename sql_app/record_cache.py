@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+from typing import NamedTuple, Optional
+
+from . import cache
+from .pagination import DEFAULT_PAGE_SIZE, PageParams
+
+# --- Per-mother record list cache ---
+# The record lists (/my-*-records/, /mothers/{id}/*-records/) are read many
+# times between clinic visits. This keeps the serialized JSON of the first,
+# default-sized page per (mother_id, record_type), together with the version
+# probe it was built from (so the ETag stays the same on hits) and the next
+# page cursor.
+#
+# An entry is only served while the version probe still matches the one it
+# was built from, so a write made through another gunicorn worker (whose
+# invalidate() only reached its own in-process cache), or straight in the DB,
+# is never served stale: the hit still costs the one probe SELECT, but skips
+# the list query and the serialization. Write paths for a mother (crud.create_*,
+# update_mother, the batch endpoint, bulk import) also drop her entries, and
+# the TTL bounds how long unused ones stay around.
+#
+# RECORD_CACHE_URL=redis://... shares the cache between gunicorn workers.
+
+RECORD_CACHE_TTL = float(os.getenv("RECORD_CACHE_TTL", "300"))
+RECORD_CACHE_SIZE = int(os.getenv("RECORD_CACHE_SIZE", "20000"))
+RECORD_CACHE_BYTES = int(os.getenv("RECORD_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+RECORD_TYPES = ("health_records", "pregnancy_records", "delivery_records", "antenatal_plans")
+
+_backend = cache.backend_from_url(
+    os.getenv("RECORD_CACHE_URL"),
+    prefix="records:",
+    max_entries=RECORD_CACHE_SIZE,
+    max_bytes=RECORD_CACHE_BYTES,
+)
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stale": 0, "invalidations": 0}
+
+
+class Entry(NamedTuple):
+    version: list
+    next_cursor: Optional[str]
+    body: bytes
+
+
+def _key(mother_id: int, record_type: str):
+    return f"{mother_id}:{record_type}"
+
+
+def _count(name: str):
+    with _lock:
+        _stats[name] += 1
+
+
+# Only the first page at the default size is cached
+def cacheable(page: Optional[PageParams]):
+    return page is None or (page.cursor is None and page.limit == DEFAULT_PAGE_SIZE and not page.include_total)
+
+
+# The cached entry if it was built from `version` (conditional.plain_version of
+# a fresh probe), else None
+def get(mother_id: int, record_type: str, version) -> Optional[Entry]:
+    raw = _backend.get(_key(mother_id, record_type)) if RECORD_CACHE_TTL > 0 else None
+    if raw is None:
+        _count("misses")
+        return None
+    # "<json header>\n<body>"
+    header, body = raw.split(b"\n", 1)
+    meta = json.loads(header)
+    if meta["version"] != list(version):
+        _count("stale")
+        return None
+    _count("hits")
+    return Entry(version=meta["version"], next_cursor=meta["next"], body=body)
+
+
+def put(mother_id: int, record_type: str, version, next_cursor: Optional[str], body: bytes):
+    if RECORD_CACHE_TTL <= 0:
+        return
+    # version as returned by conditional.plain_version (JSON-safe)
+    header = json.dumps({"version": list(version), "next": next_cursor}, separators=(",", ":"))
+    _backend.set(_key(mother_id, record_type), header.encode("utf-8") + b"\n" + body, RECORD_CACHE_TTL)
+
+
+# Call after the write has committed; no record_type drops every list for the mother
+def invalidate(mother_id: int, *record_types: str):
+    keys = [_key(mother_id, record_type) for record_type in (record_types or RECORD_TYPES)]
+    _backend.delete(*keys)
+    _count("invalidations")
+
+
+def invalidate_many(pairs):
+    # pairs: iterable of (mother_id, record_type)
+    keys = [_key(mother_id, record_type) for mother_id, record_type in set(pairs)]
+    if keys:
+        _backend.delete(*keys)
+        _count("invalidations")
+
+
+def stats():
+    with _lock:
+        return dict(_stats)
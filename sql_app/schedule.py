@@ -0,0 +1,63 @@
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.orm import Session
+
+from . import models
+from .pagination import PageParams, paginate
+
+# --- Clinic schedule: who is due, and when ---
+# Every schedulable date column has a (date, mother_id) index, so each branch
+# below is a range scan over just the window; the branches are UNION ALLed and
+# keyset-paginated on (date, kind, source_id).
+
+DEFAULT_WINDOW_DAYS = 7
+MAX_WINDOW_DAYS = 92
+
+# kind -> date column; source_id is the id of the row the date came from
+EVENTS = {
+    "clinic": models.AntenatalPlan.next_clinic_date,
+    "class_1": models.AntenatalPlan.class_1st_date,
+    "class_2": models.AntenatalPlan.class_2nd_date,
+    "class_3": models.AntenatalPlan.class_3rd_date,
+    "edd": models.PregnancyRecord.edd,
+    "us_corrected_edd": models.PregnancyRecord.us_corrected_edd,
+}
+
+
+def _branch(kind, column, start, end, midwife_id=None, moh_area=None):
+    model = column.class_
+    stmt = (
+        select(
+            column.label("date"),
+            literal(kind).label("kind"),
+            model.id.label("source_id"),
+            model.mother_id.label("mother_id"),
+            models.Mother.full_name.label("mother_name"),
+            models.Mother.nic.label("nic"),
+            models.Mother.contact_number.label("contact_number"),
+            models.Mother.midwife_id.label("midwife_id"),
+        )
+        .join(models.Mother, models.Mother.id == model.mother_id)
+        .where(column >= start, column < end)
+    )
+    if midwife_id is not None:
+        return stmt.where(models.Mother.midwife_id == midwife_id)
+    return stmt.join(models.Midwife, models.Midwife.id == models.Mother.midwife_id).where(
+        models.Midwife.assigned_moh_area == moh_area
+    )
+
+
+# Events on the days start..end, both included, for one midwife or a whole MOH area
+def upcoming(db: Session, start: date, end: date, midwife_id: int = None, moh_area: str = None,
+             kinds=None, page: PageParams = None):
+    start_at = datetime.combine(start, time.min)
+    end_at = datetime.combine(end + timedelta(days=1), time.min)
+    branches = [
+        _branch(kind, column, start_at, end_at, midwife_id, moh_area)
+        for kind, column in EVENTS.items()
+        if not kinds or kind in kinds
+    ]
+    events = union_all(*branches).subquery("schedule")
+    query = db.query(events)
+    return paginate(query, page, keys=(events.c.date, events.c.kind, events.c.source_id))
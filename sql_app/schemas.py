@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime, date
-from typing import List, Optional
+from typing import Annotated, List, Literal, Optional, Union
 
 # --- HealthRecord Schemas ---
 class HealthRecordBase(BaseModel):
@@ -15,6 +15,7 @@ class HealthRecordCreate(HealthRecordBase):
 class HealthRecord(HealthRecordBase):
     id: int
     mother_id: int
+    updated_at: Optional[datetime] = None
     class Config:
         from_attributes = True
 
@@ -46,6 +47,7 @@ class PregnancyRecord(PregnancyRecordBase):
     id: int
     mother_id: int
     created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
     class Config:
         from_attributes = True
 
@@ -82,6 +84,7 @@ class DeliveryRecord(DeliveryRecordBase):
     id: int
     mother_id: int
     created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
     class Config:
         from_attributes = True
 
@@ -122,6 +125,7 @@ class AntenatalPlan(AntenatalPlanBase):
     id: int
     mother_id: int
     created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
     class Config:
         from_attributes = True
 
@@ -143,6 +147,7 @@ class MotherUpdate(BaseModel):
 class Mother(MotherBase):
     id: int
     midwife_id: int
+    updated_at: Optional[datetime] = None
     health_records: List[HealthRecord] = []
     pregnancy_records: List[PregnancyRecord] = []
     delivery_records: List[DeliveryRecord] = []
@@ -150,6 +155,39 @@ class Mother(MotherBase):
     class Config:
         from_attributes = True
 
+# Mother without nested records (delta sync sends records separately)
+class MotherSummary(MotherBase):
+    id: int
+    midwife_id: int
+    updated_at: Optional[datetime] = None
+    class Config:
+        from_attributes = True
+
+# Mother app's home screen in one call (GET /mothers/me/portal). Records are
+# flat lists next to the mother rather than nested in it; unset fields are
+# left out of the JSON.
+class PortalSnapshot(BaseModel):
+    mother: MotherSummary
+    health_records: List[HealthRecord] = []
+    pregnancy_records: List[PregnancyRecord] = []
+    delivery_records: List[DeliveryRecord] = []
+    antenatal_plans: List[AntenatalPlan] = []
+
+# Search result row (GET /mothers/search, /moh/mothers/search)
+class MotherSearchHit(BaseModel):
+    id: int
+    full_name: str
+    nic: Optional[str] = None
+    midwife_id: int
+    score: float
+
+# Logged-in mother as returned by get_current_mother (cached, no records)
+class MotherPrincipal(MotherBase):
+    id: int
+    midwife_id: int
+    class Config:
+        from_attributes = True
+
 # ------------------------------
 # MOH & MIDWIFE MANAGEMENT SCHEMAS
 # ------------------------------
@@ -211,6 +249,133 @@ class Midwife(MidwifeBase):
     class Config:
         from_attributes = True
 
+# 5. Logged-in midwife as returned by get_current_midwife (cached, no mothers)
+class MidwifePrincipal(MidwifeBase):
+    id: int
+    is_active: Optional[bool] = True # NULL on rows that predate the column counts as active
+    class Config:
+        from_attributes = True
+
+# 6. Midwife Directory Entry (flat row for the MOH directory, no nested mothers)
+class MidwifeSummary(BaseModel):
+    id: int
+    username: str
+    full_name: Optional[str] = None
+    nic: Optional[str] = None
+    phone_number: Optional[str] = None
+    email: Optional[str] = None
+    slmc_reg_no: Optional[str] = None
+    service_grade: Optional[str] = None
+    assigned_moh_area: Optional[str] = None
+    is_active: bool = True
+    class Config:
+        from_attributes = True
+
+# 7. Suspend / reactivate a midwife (PUT /midwives/{id}/status)
+class MidwifeStatusUpdate(BaseModel):
+    is_active: bool
+
+# --- Bulk Import Schemas ---
+class ImportRowError(BaseModel):
+    row: int # line number in the uploaded file
+    error: str
+
+class ImportReport(BaseModel):
+    kind: str
+    total_rows: int
+    inserted: int
+    failed: int
+    errors: List[ImportRowError] = []
+
+# Background import job; report is set once status is "done"
+class ImportJob(BaseModel):
+    id: int
+    kind: str
+    status: str # queued / running / done / failed
+    total_rows: int
+    inserted: int
+    failed: int
+    report: Optional[ImportReport] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+# --- Batch Record Sync Schemas (clinic-day sync from the mobile app) ---
+# One operation per record; "type" picks the record schema for "data".
+class HealthRecordOp(BaseModel):
+    type: Literal["health_record"]
+    mother_id: int
+    data: HealthRecordCreate
+
+class PregnancyRecordOp(BaseModel):
+    type: Literal["pregnancy_record"]
+    mother_id: int
+    data: PregnancyRecordCreate
+
+class DeliveryRecordOp(BaseModel):
+    type: Literal["delivery_record"]
+    mother_id: int
+    data: DeliveryRecordCreate
+
+class AntenatalPlanOp(BaseModel):
+    type: Literal["antenatal_plan"]
+    mother_id: int
+    data: AntenatalPlanCreate
+
+RecordOp = Annotated[
+    Union[HealthRecordOp, PregnancyRecordOp, DeliveryRecordOp, AntenatalPlanOp],
+    Field(discriminator="type"),
+]
+
+class RecordBatch(BaseModel):
+    operations: List[RecordOp] = Field(..., min_length=1, max_length=500)
+
+class RecordOpResult(BaseModel):
+    index: int # position in the request's operations list
+    type: str
+    mother_id: int
+    id: int
+
+class RecordBatchResult(BaseModel):
+    results: List[RecordOpResult]
+    replayed: bool = False # True when answered from an earlier request with the same Idempotency-Key
+
+# --- Delta Sync Schemas (GET /sync) ---
+class SyncDeletion(BaseModel):
+    table: str
+    id: int
+
+class SyncFeed(BaseModel):
+    mothers: List[MotherSummary] = []
+    health_records: List[HealthRecord] = []
+    pregnancy_records: List[PregnancyRecord] = []
+    delivery_records: List[DeliveryRecord] = []
+    antenatal_plans: List[AntenatalPlan] = []
+    deleted: List[SyncDeletion] = []
+    next_token: str # pass as ?since= on the next call
+    has_more: bool # call again straight away with next_token
+
+# --- MOH Area Analytics Schemas ---
+class AreaStat(BaseModel):
+    month: date # first day of the month
+    metric: str # mothers_registered, pregnancies_registered, high_risk_pregnancies, edd_due, deliveries, low_birth_weight, low_apgar_score
+    dimension: str = "" # delivery mode for "deliveries"
+    value: int
+
+# --- Clinic Schedule Schemas ---
+class ScheduleEntry(BaseModel):
+    date: datetime
+    kind: str # clinic, class_1, class_2, class_3, edd, us_corrected_edd
+    source_id: int # antenatal plan / pregnancy record id
+    mother_id: int
+    mother_name: str
+    nic: Optional[str] = None
+    contact_number: Optional[str] = None
+    midwife_id: int
+    class Config:
+        from_attributes = True
+
 # --- Token Schemas ---
 class Token(BaseModel):
     access_token: str
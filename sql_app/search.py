@@ -0,0 +1,161 @@
+import os
+import re
+
+from sqlalchemy import column, func, literal, literal_column, or_, select, table, text
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+
+from . import models
+
+# --- Mother search ---
+# NIC: prefix match on the unique nic index (a range scan, never a table scan).
+# Name: MySQL n-gram FULLTEXT index (MATCH ... AGAINST in boolean mode), or the
+# SQLite FTS5 table mothers_fts in dev/tests; results are ranked by relevance.
+# SEARCH_BACKEND=like forces the old LIKE '%term%' scan (e.g. before the
+# FULLTEXT index exists on an old database).
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+DEFAULT_SEARCH_LIMIT = 20
+TYPEAHEAD_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+
+# Exact NIC hits always rank above name hits
+_NIC_EXACT_SCORE = 1000.0
+_NIC_PREFIX_SCORE = 100.0
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Anything NIC-shaped: one alphanumeric word containing a digit (e.g. 199012345678, 901234567V)
+_NIC_LIKE = re.compile(r"^(?=.*\d)[0-9A-Za-z]{3,20}$")
+
+_HIT_COLUMNS = (models.Mother.id, models.Mother.full_name, models.Mother.nic, models.Mother.midwife_id)
+
+_mothers_fts = table("mothers_fts", column("rowid"), column("full_name"))
+_fts_available = {}
+
+
+def _tokens(q: str):
+    return _TOKEN.findall(q or "")
+
+
+def _escape_like(value: str):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _backend(db: Session):
+    if SEARCH_BACKEND == "like":
+        return "like"
+    bind = db.get_bind()
+    if bind.dialect.name == "mysql":
+        return "mysql"
+    if bind.dialect.name == "sqlite":
+        key = str(bind.url)
+        if key not in _fts_available:
+            found = db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'mothers_fts'")).first()
+            _fts_available[key] = found is not None
+        if _fts_available[key]:
+            return "sqlite"
+    return "like"
+
+
+def _nic_prefix(q: str):
+    q = (q or "").strip()
+    if not _NIC_LIKE.match(q):
+        return None
+    return models.Mother.nic.like(_escape_like(q) + "%", escape="\\")
+
+
+def _mysql_match(tokens):
+    # With the ngram parser every quoted token is matched as a run of n-grams,
+    # so partial words already match; '+' makes every token required.
+    against = " ".join(f'+"{token}"' for token in tokens)
+    return match(models.Mother.full_name, against=against, in_boolean_mode=True)
+
+
+# prefix_all: every token is a prefix (typeahead); otherwise only the last one
+def _fts_match(tokens, prefix_all: bool):
+    last = len(tokens) - 1
+    fts_query = " ".join(
+        f'"{token}"*' if prefix_all or i == last else f'"{token}"' for i, token in enumerate(tokens)
+    )
+    return _mothers_fts.c.full_name.op("MATCH")(fts_query)
+
+
+def _like_match(tokens):
+    return or_(*[models.Mother.full_name.like(f"%{_escape_like(token)}%", escape="\\") for token in tokens])
+
+
+def _name_filter(db: Session, tokens, prefix_all: bool):
+    backend = _backend(db)
+    if backend == "mysql":
+        return _mysql_match(tokens)
+    if backend == "sqlite":
+        return models.Mother.id.in_(select(_mothers_fts.c.rowid).where(_fts_match(tokens, prefix_all)))
+    return _like_match(tokens)
+
+
+# SELECT of hit columns plus a relevance "score" (higher is better)
+def _ranked_name_select(db: Session, tokens, prefix_all: bool):
+    backend = _backend(db)
+    if backend == "mysql":
+        score = _mysql_match(tokens)
+        return select(*_HIT_COLUMNS, score.label("score")).where(score)
+    if backend == "sqlite":
+        # bm25() needs the FTS table in the FROM clause; lower is better, so negate
+        score = -func.bm25(literal_column("mothers_fts"))
+        return (
+            select(*_HIT_COLUMNS, score.label("score"))
+            .join(_mothers_fts, _mothers_fts.c.rowid == models.Mother.id)
+            .where(_fts_match(tokens, prefix_all))
+        )
+    return select(*_HIT_COLUMNS, literal(0.0).label("score")).where(_like_match(tokens))
+
+
+# Clause for filtering a Mother query (used by GET /mothers/?search=)
+def mother_filter(db: Session, q: str):
+    clauses = []
+    nic = _nic_prefix(q)
+    if nic is not None:
+        clauses.append(nic)
+    tokens = _tokens(q)
+    if tokens:
+        clauses.append(_name_filter(db, tokens, prefix_all=False))
+    if not clauses:
+        return literal(False)
+    return or_(*clauses)
+
+
+def _scoped(stmt, midwife_id=None, moh_area=None):
+    if midwife_id is not None:
+        return stmt.where(models.Mother.midwife_id == midwife_id)
+    if moh_area is not None:
+        return stmt.join(models.Midwife, models.Midwife.id == models.Mother.midwife_id).where(
+            models.Midwife.assigned_moh_area == moh_area
+        )
+    return stmt
+
+
+# Ranked search within one midwife's mothers or a whole MOH area
+def search_mothers(db: Session, q: str, midwife_id: int = None, moh_area: str = None,
+                   typeahead: bool = False, limit: int = DEFAULT_SEARCH_LIMIT):
+    hits = {}
+
+    nic = _nic_prefix(q)
+    if nic is not None:
+        stmt = _scoped(select(*_HIT_COLUMNS).where(nic), midwife_id, moh_area).order_by(models.Mother.nic).limit(limit)
+        for row in db.execute(stmt):
+            score = _NIC_EXACT_SCORE if row.nic == q.strip() else _NIC_PREFIX_SCORE
+            hits[row.id] = (row, score)
+
+    tokens = _tokens(q)
+    if tokens:
+        stmt = _ranked_name_select(db, tokens, prefix_all=typeahead)
+        stmt = _scoped(stmt, midwife_id, moh_area).order_by(literal_column("score").desc()).limit(limit)
+        for row in db.execute(stmt):
+            if row.id not in hits:
+                hits[row.id] = (row, float(row.score or 0.0))
+
+    ranked = sorted(hits.values(), key=lambda hit: (-hit[1], hit[0].full_name or ""))[:limit]
+    return [
+        {"id": row.id, "full_name": row.full_name, "nic": row.nic, "midwife_id": row.midwife_id, "score": score}
+        for row, score in ranked
+    ]
@@ -0,0 +1,45 @@
+from functools import lru_cache
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+# --- Fast JSON path for big responses (opt-in per route) ---
+# FastAPI's default path turns the result into Python dicts/lists field by
+# field and then runs json.dumps over them. For long lists of 20-30 field
+# records that dominates the request's CPU. Here pydantic-core reads the ORM
+# objects (from_attributes) and writes the JSON bytes itself, with one
+# TypeAdapter per response type built once and reused.
+#
+#     return serialization.respond(List[schemas.DeliveryRecord], records, response)
+#
+# The route keeps its response_model for the OpenAPI docs; since a Response is
+# returned, FastAPI does not serialize it a second time.
+
+_SKIPPED_HEADERS = {b"content-length", b"content-type"}
+
+
+@lru_cache(maxsize=None)
+def adapter(type_) -> TypeAdapter:
+    return TypeAdapter(type_)
+
+
+def dump(type_, value, exclude_none: bool = False) -> bytes:
+    type_adapter = adapter(type_)
+    return type_adapter.dump_json(type_adapter.validate_python(value, from_attributes=True), exclude_none=exclude_none)
+
+
+# Wraps ready-made JSON bytes; carries over status and headers (pagination,
+# ETag...) already set on the route's injected `response`
+def json_response(body: bytes, response: Response = None) -> Response:
+    result = Response(content=body, media_type="application/json")
+    if response is not None:
+        if response.status_code:
+            result.status_code = response.status_code
+        result.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers if name not in _SKIPPED_HEADERS
+        )
+    return result
+
+
+def respond(type_, value, response: Response = None, exclude_none: bool = False) -> Response:
+    return json_response(dump(type_, value, exclude_none), response)
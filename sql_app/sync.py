@@ -0,0 +1,142 @@
+import os
+from datetime import datetime
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from . import models
+from .pagination import decode_cursor, encode_cursor
+
+# --- Incremental (delta) sync for the mobile app ---
+# Every insert/update of a tracked row takes the next value of the global
+# sync counter as its change_seq; deletes leave a tombstone with one. A sync
+# token is just the highest change_seq the client has seen, so GET /sync
+# returns "change_seq > token" from each table, merged in sequence order.
+#
+# The counter row stays locked from the flush that bumps it until commit, so
+# transactions that write tracked rows get their numbers in commit order and a
+# reader never sees seq N+1 committed while N is still in flight.
+#
+# That is deliberate, and it has a cost: every transaction that writes a
+# tracked row, in every worker, waits for the counter lock, so those writes
+# run one at a time (a bulk import holds it for one chunk's INSERT; hashing
+# happens before). A lock-free sequence would let a late commit land below a
+# token a client has already moved past, and that change would never be
+# synced. Keep tracked writes short: reserve late, no network I/O before commit.
+
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "500"))
+
+# feed key -> model, in the order parents before children
+TRACKED = {
+    "mothers": models.Mother,
+    "health_records": models.HealthRecord,
+    "pregnancy_records": models.PregnancyRecord,
+    "delivery_records": models.DeliveryRecord,
+    "antenatal_plans": models.AntenatalPlan,
+}
+_TRACKED_MODELS = tuple(TRACKED.values())
+_TABLE_NAMES = {model: name for name, model in TRACKED.items()}
+
+
+# Reserves n consecutive change_seq values; returns the first one
+def reserve(db: Session, n: int):
+    counter = models.SyncCounter.__table__
+    db.execute(update(counter).where(counter.c.id == 1).values(value=counter.c.value + n))
+    last = db.execute(select(counter.c.value).where(counter.c.id == 1)).scalar_one()
+    return last - n + 1
+
+
+# Extra values to put into Core INSERT parameter dicts (bulk import), which skip the flush hook
+def stamp_rows(db: Session, rows):
+    if not rows:
+        return rows
+    first = reserve(db, len(rows))
+    now = datetime.utcnow()
+    for offset, row in enumerate(rows):
+        row["updated_at"] = now
+        row["change_seq"] = first + offset
+    return rows
+
+
+def _midwife_for(session: Session, obj):
+    if isinstance(obj, models.Mother):
+        return obj.midwife_id
+    mother = session.get(models.Mother, obj.mother_id)
+    return mother.midwife_id if mother is not None else None
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_changes(session, flush_context, instances):
+    changed = [obj for obj in session.new if isinstance(obj, _TRACKED_MODELS)]
+    changed += [
+        obj for obj in session.dirty
+        if isinstance(obj, _TRACKED_MODELS) and session.is_modified(obj, include_collections=False)
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, _TRACKED_MODELS)]
+    if not changed and not deleted:
+        return
+
+    with session.no_autoflush:
+        seq = reserve(session, len(changed) + len(deleted))
+        now = datetime.utcnow()
+        for obj in changed:
+            obj.updated_at = now
+            obj.change_seq = seq
+            seq += 1
+        for obj in deleted:
+            midwife_id = _midwife_for(session, obj)
+            if midwife_id is not None:
+                session.add(models.SyncTombstone(
+                    table_name=_TABLE_NAMES[type(obj)],
+                    row_id=obj.id,
+                    midwife_id=midwife_id,
+                    change_seq=seq,
+                    deleted_at=now,
+                ))
+            seq += 1
+
+
+def decode_token(token: str):
+    value = decode_cursor(token)[0] if token else 0
+    return value if isinstance(value, int) and value >= 0 else None
+
+
+# One page of changes for a midwife's caseload after `since`
+def changes_for_midwife(db: Session, midwife_id: int, since: int, limit: int = SYNC_PAGE_SIZE):
+    # Fetch up to limit+1 from every table, then keep the lowest `limit` seqs overall
+    candidates = []
+    for name, model in TRACKED.items():
+        stmt = select(model).where(model.change_seq > since)
+        if model is models.Mother:
+            stmt = stmt.where(models.Mother.midwife_id == midwife_id)
+        else:
+            stmt = stmt.join(models.Mother, models.Mother.id == model.mother_id).where(
+                models.Mother.midwife_id == midwife_id
+            )
+        rows = db.scalars(stmt.order_by(model.change_seq).limit(limit + 1)).all()
+        candidates += [(row.change_seq, name, row) for row in rows]
+
+    tombstones = db.scalars(
+        select(models.SyncTombstone)
+        .where(models.SyncTombstone.midwife_id == midwife_id, models.SyncTombstone.change_seq > since)
+        .order_by(models.SyncTombstone.change_seq)
+        .limit(limit + 1)
+    ).all()
+    candidates += [(t.change_seq, "deleted", t) for t in tombstones]
+
+    candidates.sort(key=lambda candidate: candidate[0])
+    has_more = len(candidates) > limit
+    candidates = candidates[:limit]
+
+    feed = {name: [] for name in TRACKED}
+    feed["deleted"] = []
+    for _, name, row in candidates:
+        if name == "deleted":
+            feed["deleted"].append({"table": row.table_name, "id": row.row_id})
+        else:
+            feed[name].append(row)
+
+    last_seq = candidates[-1][0] if candidates else since
+    feed["next_token"] = encode_cursor([last_seq])
+    feed["has_more"] = has_more
+    return feed
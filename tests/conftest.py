@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway SQLite file before sql_app is imported
+_db_dir = tempfile.mkdtemp(prefix="midwife-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ["DB_CREATE_ALL"] = "1"
+os.environ["RATE_LIMIT_ENABLED"] = "0"
+os.environ["OPS_TOKEN"] = "test-ops-token"
+# Outbox tests run send_pending themselves, against a local SMTP server
+os.environ["EMAIL_SENDER_ENABLED"] = "0"
+os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+# The app mounts ./static relative to the working directory
+os.chdir(ROOT)
+
+
+@pytest.fixture(scope="module")
+def client():
+    from fastapi.testclient import TestClient
+
+    from sql_app import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
@@ -0,0 +1,88 @@
+import fnmatch
+import math
+import threading
+import time
+
+from sql_app import ratelimit
+
+
+# In-memory stand-in for the redis-py client calls the shared stores make
+# (cache.RedisBackend, ratelimit.RedisBuckets): bytes values with PX expiry,
+# hashes, SCAN, and the rate limiter's Lua script re-implemented in Python.
+class FakeRedis:
+    def __init__(self):
+        self._data = {} # key -> bytes, or a dict of bytes for hashes
+        self._expires = {} # key -> monotonic deadline
+        self._lock = threading.RLock()
+        self._scripts = {ratelimit.RedisBuckets.SCRIPT: self._token_bucket}
+
+    def _live(self, key):
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def get(self, key):
+        with self._lock:
+            return self._data[key] if self._live(key) else None
+
+    def set(self, key, value, px=None):
+        with self._lock:
+            self._data[key] = value.encode() if isinstance(value, str) else bytes(value)
+            self._expires.pop(key, None)
+            if px is not None:
+                self.pexpire(key, px)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._live(key):
+                    del self._data[key]
+                    self._expires.pop(key, None)
+                    removed += 1
+            return removed
+
+    def pexpire(self, key, milliseconds):
+        with self._lock:
+            if self._live(key):
+                self._expires[key] = time.monotonic() + milliseconds / 1000
+
+    def scan_iter(self, match=None):
+        with self._lock:
+            keys = [key for key in list(self._data) if self._live(key)]
+        return iter([key for key in keys if match is None or fnmatch.fnmatchcase(key, match)])
+
+    def hmget(self, key, *fields):
+        with self._lock:
+            values = self._data[key] if self._live(key) else {}
+            return [values.get(field) for field in fields]
+
+    def hset(self, key, mapping):
+        with self._lock:
+            values = self._data[key] if self._live(key) else {}
+            values.update({field: str(value).encode() for field, value in mapping.items()})
+            self._data[key] = values
+
+    def register_script(self, script):
+        run = self._scripts[script]
+        return lambda keys, args: run(keys, args)
+
+    # ratelimit.RedisBuckets.SCRIPT
+    def _token_bucket(self, keys, args):
+        capacity, rate, now = (float(arg) for arg in args)
+        with self._lock:
+            tokens, updated_at = self.hmget(keys[0], "tokens", "updated_at")
+            tokens = capacity if tokens is None else float(tokens)
+            updated_at = now if updated_at is None else float(updated_at)
+            tokens = min(capacity, tokens + max(0, now - updated_at) * rate)
+            wait = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self.hset(keys[0], {"tokens": tokens, "updated_at": now})
+            self.pexpire(keys[0], math.ceil(capacity / rate * 1000))
+            return str(wait).encode()
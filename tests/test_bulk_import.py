@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from sql_app import bulk_import, database, hashing, main, models
+
+URL = "/mothers/import"
+
+
+def _auth(subject):
+    return {"Authorization": f"Bearer {main.create_access_token(data={'sub': subject})}"}
+
+
+@pytest.fixture(scope="module")
+def midwives(client):
+    with database.SessionLocal() as db:
+        midwife = models.Midwife(username="import-mw", hashed_password="x", is_active=True)
+        other = models.Midwife(username="import-other", hashed_password="x", is_active=True)
+        db.add_all([midwife, other])
+        db.commit()
+        return {"headers": _auth(midwife.username), "other_headers": _auth(other.username)}
+
+
+def _upload(client, headers, body, kind="mothers"):
+    return client.post(URL, params={"kind": kind}, headers=headers,
+                       files={"file": ("mothers.csv", body, "text/csv")})
+
+
+def _wait(client, headers, location, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(location, headers=headers).json()
+        if job["status"] in (bulk_import.JOB_DONE, bulk_import.JOB_FAILED) or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def test_import_runs_as_background_job_on_import_pool(client, midwives):
+    body = (
+        "full_name,nic,password\n"
+        "Import One,IMP001,secret-1\n"
+        "Import Two,IMP002,secret-2\n"
+        "Import Dup,IMP001,secret-3\n"
+        ",IMP004,secret-4\n"
+    ).encode()
+    before = hashing.stats()
+    response = _upload(client, midwives["headers"], body)
+    assert response.status_code == 202
+    assert response.json()["status"] in (bulk_import.JOB_QUEUED, bulk_import.JOB_RUNNING, bulk_import.JOB_DONE)
+    location = response.headers["Location"]
+    assert location == f"{URL}/{response.json()['id']}"
+
+    job = _wait(client, midwives["headers"], location)
+    assert job["status"] == bulk_import.JOB_DONE
+    assert (job["total_rows"], job["inserted"], job["failed"]) == (4, 2, 2)
+    assert [error["row"] for error in job["report"]["errors"]] == [4, 5]
+
+    # Hashed on the import pool; the login pool saw none of it
+    after = hashing.stats()
+    assert after["import_submitted"] - before["import_submitted"] == 2
+    assert after["submitted"] == before["submitted"]
+
+
+def test_job_is_private_to_its_midwife(client, midwives):
+    response = _upload(client, midwives["headers"], b"full_name,nic,password\nPrivate,IMP010,secret\n")
+    location = response.headers["Location"]
+    _wait(client, midwives["headers"], location)
+    assert client.get(location, headers=midwives["other_headers"]).status_code == 404
+    assert client.get(f"{URL}/999999", headers=midwives["headers"]).status_code == 404
+
+
+def test_bad_encoding_rejected_up_front(client, midwives):
+    response = _upload(client, midwives["headers"], "full_name,nic,password\nCafé,IMP020,x\n".encode("cp1252"))
+    assert response.status_code == 400
+    assert bulk_import._pending == 0
+
+
+def test_busy_worker_sheds_new_imports(client, midwives, monkeypatch):
+    monkeypatch.setattr(bulk_import, "IMPORT_MAX_PENDING", 0)
+    response = _upload(client, midwives["headers"], b"full_name,nic,password\nShed,IMP030,secret\n")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(bulk_import.IMPORT_RETRY_AFTER)
+
+
+def test_import_pool_queue_is_bounded():
+    pool = hashing._Pool(1, "test-hash", max_queued=1)
+    release = threading.Event()
+    futures = [pool.submit(release.wait) for _ in range(2)]
+    blocked = threading.Thread(target=lambda: futures.append(pool.submit(lambda: None)))
+    blocked.start()
+    blocked.join(0.2)
+    assert blocked.is_alive() and pool.stats()["submitted"] == 2
+    release.set()
+    blocked.join(5)
+    assert len(futures) == 3 and futures[2].result(5) is None
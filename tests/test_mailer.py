@@ -0,0 +1,111 @@
+import socket
+from datetime import datetime
+
+import pytest
+
+from sql_app import database, mailer, models
+
+Controller = pytest.importorskip("aiosmtpd.controller").Controller
+
+
+# Accepts everything except the recipients it was told to refuse, and notes
+# which client connection each message came in on
+class Handler:
+    def __init__(self, refuse):
+        self.refuse = refuse
+        self.messages = []
+        self.connections = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refuse:
+            return self.refuse[address]
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.connections.add(session.peer)
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode()))
+        return "250 Message accepted"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    handler = Handler(refuse={
+        "busy@example.com": "451 Try again later",
+        "nobody@example.com": "550 No such user",
+    })
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    monkeypatch.setattr(mailer, "SMTP_SERVER", controller.hostname)
+    monkeypatch.setattr(mailer, "SMTP_PORT", controller.port)
+    monkeypatch.setattr(mailer, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(mailer, "SENDER_PASSWORD", "")
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture
+def db():
+    with database.SessionLocal() as session:
+        session.query(models.EmailOutbox).delete()
+        session.commit()
+        yield session
+
+
+def _queue(db, *addresses):
+    for address in addresses:
+        mailer.enqueue(db, address, "Your account", f"password for {address}")
+    db.commit()
+
+
+def _rows(db):
+    db.expire_all()
+    return {row.to_email: row for row in db.query(models.EmailOutbox)}
+
+
+def test_send_pending_one_connection(client, smtp, db):
+    _queue(db, "a@example.com", "b@example.com", "c@example.com")
+    assert mailer.send_pending(db) == 3
+    assert sorted(rcpt for rcpts, _ in smtp.messages for rcpt in rcpts) == [
+        "a@example.com", "b@example.com", "c@example.com"]
+    assert len(smtp.connections) == 1
+    for row in _rows(db).values():
+        assert row.status == mailer.STATUS_SENT
+        assert row.body is None
+    # Drained
+    assert mailer.send_pending(db) == 0
+
+
+def test_send_pending_records_retry(client, smtp, db):
+    _queue(db, "a@example.com", "busy@example.com")
+    started = datetime.utcnow()
+    assert mailer.send_pending(db) == 2
+    rows = _rows(db)
+    assert rows["a@example.com"].status == mailer.STATUS_SENT
+    busy = rows["busy@example.com"]
+    assert busy.status == mailer.STATUS_PENDING
+    assert busy.attempts == 1
+    assert "451" in busy.last_error
+    assert busy.next_attempt_at > started
+    assert busy.body is not None
+    # Not due yet, so the next pass leaves it alone
+    assert mailer.send_pending(db) == 0
+
+
+# A 5xx refusal is final: no retries, and the credentials are dropped at once
+def test_send_pending_permanent_failure(client, smtp, db):
+    _queue(db, "nobody@example.com", "a@example.com")
+    assert mailer.send_pending(db) == 2
+    rows = _rows(db)
+    nobody = rows["nobody@example.com"]
+    assert nobody.status == mailer.STATUS_FAILED
+    assert nobody.attempts == 1
+    assert "550" in nobody.last_error
+    assert nobody.body is None
+    assert rows["a@example.com"].status == mailer.STATUS_SENT
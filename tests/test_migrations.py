@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+# Each run gets its own database, so alembic (which uses the app's engine) runs
+# in a subprocess with its own DATABASE_URL
+CREATE_ALL = "from sql_app import database, models; models.Base.metadata.create_all(database.engine)"
+
+
+def _run(db_url, *command):
+    env = dict(os.environ, DATABASE_URL=db_url)
+    env.pop("DB_CREATE_ALL", None)
+    result = subprocess.run([sys.executable, *command], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return result
+
+
+def _alembic(db_url, *args):
+    return _run(db_url, "-m", "alembic", *args)
+
+
+@pytest.mark.parametrize("schema", ["empty", "baseline", "create_all"])
+def test_upgrade_head_adopts_existing_schema(tmp_path, schema):
+    db_url = f"sqlite:///{tmp_path}/migrations.db"
+    if schema == "baseline":
+        # What production has: the old create_all tables, no alembic_version
+        _alembic(db_url, "upgrade", "0001_baseline")
+        _run(db_url, "-c", "from sql_app import database; from sqlalchemy import text\n"
+                           "with database.engine.begin() as c: c.execute(text('DROP TABLE alembic_version'))")
+    elif schema == "create_all":
+        _run(db_url, "-c", CREATE_ALL)
+    _alembic(db_url, "upgrade", "head")
+    _alembic(db_url, "check")
@@ -0,0 +1,14 @@
+import pytest
+
+OPS_URLS = ["/health/pool", "/metrics"]
+
+
+@pytest.mark.parametrize("url", OPS_URLS)
+def test_ops_endpoint_hidden_without_token(client, url):
+    assert client.get(url).status_code == 404
+    assert client.get(url, headers={"Authorization": "Bearer wrong"}).status_code == 404
+
+
+@pytest.mark.parametrize("url", OPS_URLS)
+def test_ops_endpoint_with_token(client, url):
+    assert client.get(url, headers={"Authorization": "Bearer test-ops-token"}).status_code == 200
@@ -0,0 +1,52 @@
+import pytest
+
+from fake_redis import FakeRedis
+from sql_app import cache, database, main, models, principals
+
+
+# Two gunicorn workers sharing PRINCIPAL_CACHE_URL: two backends on one store
+@pytest.fixture
+def workers(monkeypatch):
+    store = FakeRedis()
+    backends = [cache.RedisBackend(store, prefix="principal:") for _ in range(2)]
+    monkeypatch.setattr(principals, "_backend", backends[0])
+    return backends
+
+
+@pytest.fixture(scope="module")
+def accounts(client):
+    with database.SessionLocal() as db:
+        moh = models.MOHOfficer(username="principals-moh", hashed_password="x", full_name="MOH",
+                                 moh_area="Principals")
+        midwife = models.Midwife(username="principals-mw", hashed_password="x", assigned_moh_area="Principals",
+                                 is_active=True)
+        db.add_all([moh, midwife])
+        db.commit()
+        return {"midwife_id": midwife.id, "midwife": midwife.username, "moh": moh.username}
+
+
+def _auth(subject):
+    return {"Authorization": f"Bearer {main.create_access_token(data={'sub': subject})}"}
+
+
+# The entry written through worker 0 is a hit for worker 1
+def test_principal_shared_between_workers(client, workers, accounts, monkeypatch):
+    assert client.get("/midwives/me/", headers=_auth(accounts["midwife"])).status_code == 200
+    monkeypatch.setattr(principals, "_backend", workers[1])
+    hits = principals.stats()["hits"]
+    assert principals.get("midwife", accounts["midwife"]).username == accounts["midwife"]
+    assert principals.stats()["hits"] == hits + 1
+
+
+# Suspending a midwife through one worker locks her out on every worker at
+# once, not after PRINCIPAL_CACHE_TTL
+def test_suspension_seen_by_other_worker(client, workers, accounts, monkeypatch):
+    midwife = _auth(accounts["midwife"])
+    assert client.get("/midwives/me/", headers=midwife).status_code == 200
+    monkeypatch.setattr(principals, "_backend", workers[1])
+    response = client.put(f"/midwives/{accounts['midwife_id']}/status", headers=_auth(accounts["moh"]),
+                          json={"is_active": False})
+    assert response.status_code == 200
+    monkeypatch.setattr(principals, "_backend", workers[0])
+    assert principals.get("midwife", accounts["midwife"]) is None
+    assert client.get("/midwives/me/", headers=midwife).status_code == 401
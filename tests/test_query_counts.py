@@ -0,0 +1,149 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from fake_redis import FakeRedis
+from sql_app import cache, database, main, models, principals, record_cache
+
+# Statements each list endpoint may issue, whatever the number of rows. A lazy
+# relationship slipping back into a response schema shows up as a count that
+# grows with the number of mothers.
+
+
+@pytest.fixture
+def count_statements():
+    engines = {database.engine, database.read_engine,
+               database.async_engine.sync_engine, database.async_read_engine.sync_engine}
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _seed(mothers_per_midwife):
+    with database.SessionLocal() as db:
+        moh = models.MOHOfficer(username=f"moh-{mothers_per_midwife}", hashed_password="x", full_name="MOH",
+                                moh_area="Area")
+        midwife = models.Midwife(username=f"mw-{mothers_per_midwife}", hashed_password="x", full_name="Midwife",
+                                 assigned_moh_area="Area", is_active=True)
+        db.add_all([moh, midwife])
+        db.flush()
+        for i in range(mothers_per_midwife):
+            mother = models.Mother(full_name=f"Mother {i}", nic=f"N{mothers_per_midwife}-{i}", hashed_password="x",
+                                   midwife_id=midwife.id)
+            db.add(mother)
+            db.flush()
+            db.add_all([
+                models.HealthRecord(mother_id=mother.id, visit_date=datetime(2026, 1, 1 + day), notes="visit")
+                for day in range(3)
+            ])
+            db.add(models.PregnancyRecord(mother_id=mother.id, blood_group="O+"))
+            db.add(models.AntenatalPlan(mother_id=mother.id, emergency_contact_name="Contact"))
+        db.commit()
+        return moh.username, midwife.username, mother.nic, mother.id
+
+
+def _auth(subject):
+    return {"Authorization": f"Bearer {main.create_access_token(data={'sub': subject})}"}
+
+
+@pytest.fixture(scope="module", params=[1, 5], ids=["1-mother", "5-mothers"])
+def dataset(request, client):
+    moh, midwife, mother, mother_id = _seed(request.param)
+    return {"moh": _auth(moh), "midwife": _auth(midwife), "mother": _auth(mother), "mother_id": mother_id}
+
+
+# Counts a call with the principal cache warm (the first call fills it) and the
+# record cache cold, i.e. the endpoint's own queries
+def _get(client, count_statements, url, headers):
+    principals._backend.clear()
+    assert client.get(url, headers=headers).status_code == 200
+    record_cache._backend.clear()
+    count_statements.clear()
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return len(count_statements)
+
+
+# url, token, expected statements
+CASES = [
+    # mothers page, 4 x selectinload
+    ("/mothers/", "midwife", 5),
+    # version probe, records page
+    ("/mothers/{mother_id}/records/", "midwife", 2),
+    # version probe, flat midwife rows
+    ("/midwives/", "moh", 2),
+    # version probe, midwives page, mothers, 4 x selectinload
+    ("/midwives/?expand=mothers", "moh", 7),
+    # midwife, mothers, 4 x selectinload
+    ("/midwives/me/", "midwife", 6),
+    # version probe, mother, 4 x selectinload
+    ("/mothers/me/", "mother", 6),
+    # version probe, mother, one query per record table
+    ("/mothers/me/portal", "mother", 6),
+    # version probe, records page
+    ("/mothers/{mother_id}/pregnancy-records/", "midwife", 2),
+    ("/mothers/{mother_id}/delivery-records/", "midwife", 2),
+    ("/mothers/{mother_id}/antenatal-plans/", "midwife", 2),
+    ("/my-pregnancy-records/", "mother", 2),
+    ("/my-delivery-records/", "mother", 2),
+    ("/my-antenatal-plans/", "mother", 2),
+]
+
+
+@pytest.mark.parametrize("url, token, expected", CASES, ids=[case[0] for case in CASES])
+def test_statement_count(client, count_statements, dataset, url, token, expected):
+    url = url.format(mother_id=dataset["mother_id"])
+    assert _get(client, count_statements, url, dataset[token]) == expected
+
+
+# The record cache tests run against the in-process LRU and against the
+# shared-store backend on a fake Redis client
+@pytest.fixture(params=["memory", "redis"])
+def record_backend(request, monkeypatch):
+    if request.param == "redis":
+        monkeypatch.setattr(record_cache, "_backend", cache.RedisBackend(FakeRedis(), prefix="records:"))
+    record_cache._backend.clear()
+    return record_cache._backend
+
+
+# A record list served from record_cache still runs its version probe, and
+# nothing else
+def test_record_list_cache_hit(client, count_statements, dataset, record_backend):
+    url = f"/mothers/{dataset['mother_id']}/records/"
+    assert client.get(url, headers=dataset["midwife"]).status_code == 200
+    count_statements.clear()
+    assert client.get(url, headers=dataset["midwife"]).status_code == 200
+    assert len(count_statements) == 1
+
+
+# A write that never reached this worker's cache (another gunicorn worker, or
+# the DB directly) must not be answered from it
+def test_record_list_not_stale_after_write_elsewhere(client, dataset, record_backend):
+    url = f"/mothers/{dataset['mother_id']}/records/"
+    before = client.get(url, headers=dataset["midwife"]).json()
+    with database.SessionLocal() as db:
+        db.add(models.HealthRecord(mother_id=dataset["mother_id"], visit_date=datetime(2026, 2, 1), notes="elsewhere"))
+        db.commit()
+    after = client.get(url, headers=dataset["midwife"]).json()
+    assert len(after) == len(before) + 1
+    assert after[-1]["notes"] == "elsewhere"
+
+
+# A write through the API drops the cached list straight away
+def test_record_list_invalidated_by_write(client, dataset, record_backend):
+    url = f"/mothers/{dataset['mother_id']}/records/"
+    key = record_cache._key(dataset["mother_id"], "health_records")
+    assert client.get(url, headers=dataset["midwife"]).status_code == 200
+    assert record_backend.get(key) is not None
+    response = client.post(url, headers=dataset["midwife"], json={"visit_date": "2026-03-01T09:00:00", "notes": "new"})
+    assert response.status_code == 200
+    assert record_backend.get(key) is None
+    assert client.get(url, headers=dataset["midwife"]).json()[-1]["notes"] == "new"
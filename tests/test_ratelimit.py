@@ -0,0 +1,37 @@
+import pytest
+
+from fake_redis import FakeRedis
+from sql_app import ratelimit
+
+
+# Two gunicorn workers sharing RATE_LIMIT_URL: two RedisBuckets on one store
+@pytest.fixture
+def workers(monkeypatch):
+    store = FakeRedis()
+    buckets = [ratelimit.RedisBuckets(store, prefix="ratelimit:") for _ in range(2)]
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(ratelimit, "_rules", {"login": {
+        "ip": ratelimit.parse_rule("100/minute"),
+        "user": ratelimit.parse_rule("2/minute"),
+    }})
+    return buckets
+
+
+def test_bucket_refills(workers):
+    buckets = workers[0]
+    assert buckets.take("k", 2, 1.0, now=100.0) == 0
+    assert buckets.take("k", 2, 1.0, now=100.0) == 0
+    assert buckets.take("k", 2, 1.0, now=100.0) == pytest.approx(1.0)
+    assert buckets.take("k", 2, 1.0, now=101.0) == 0
+
+
+# Attempts on one username through either worker spend the same bucket
+def test_login_limit_shared_between_workers(client, workers, monkeypatch):
+    form = {"username": "ratelimit-nobody", "password": "wrong"}
+    for buckets in workers:
+        monkeypatch.setattr(ratelimit, "_buckets", buckets)
+        assert client.post("/token", data=form).status_code == 401
+    monkeypatch.setattr(ratelimit, "_buckets", workers[0])
+    response = client.post("/token", data=form)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,120 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from sql_app import crud, database, main, models, schemas
+
+URL = "/mothers/records/batch"
+
+
+def _auth(subject):
+    return {"Authorization": f"Bearer {main.create_access_token(data={'sub': subject})}"}
+
+
+@pytest.fixture(scope="module")
+def caseload(client):
+    with database.SessionLocal() as db:
+        midwife = models.Midwife(username="batch-mw", hashed_password="x", is_active=True)
+        other = models.Midwife(username="batch-other", hashed_password="x", is_active=True)
+        db.add_all([midwife, other])
+        db.flush()
+        mine = models.Mother(full_name="Batch Mine", nic="BATCH1", hashed_password="x", midwife_id=midwife.id)
+        theirs = models.Mother(full_name="Batch Theirs", nic="BATCH2", hashed_password="x", midwife_id=other.id)
+        db.add_all([mine, theirs])
+        db.commit()
+        return {"midwife_id": midwife.id, "headers": _auth(midwife.username), "mother_id": mine.id,
+                "other_mother_id": theirs.id}
+
+
+def _visit(mother_id, day=1):
+    return {"type": "health_record", "mother_id": mother_id,
+            "data": {"visit_date": f"2026-04-{day:02d}T09:00:00", "weight_kg": 60}}
+
+
+def _record_count(mother_id):
+    with database.SessionLocal() as db:
+        return db.query(models.HealthRecord).filter_by(mother_id=mother_id).count()
+
+
+def test_idempotency_key_replay(client, caseload):
+    headers = dict(caseload["headers"], **{"Idempotency-Key": "replay-1"})
+    body = {"operations": [_visit(caseload["mother_id"], 1), _visit(caseload["mother_id"], 2)]}
+    before = _record_count(caseload["mother_id"])
+    first = client.post(URL, headers=headers, json=body)
+    assert first.status_code == 200
+    assert first.json()["replayed"] is False
+    retry = client.post(URL, headers=headers, json=body)
+    assert retry.status_code == 200
+    assert retry.json()["replayed"] is True
+    assert retry.json()["results"] == first.json()["results"]
+    assert _record_count(caseload["mother_id"]) == before + 2
+
+
+# Two requests with one key both miss the replay lookup; the one that commits
+# second gets None back and keeps nothing
+def test_concurrent_duplicate_keeps_one_batch(caseload):
+    operations = schemas.RecordBatch.model_validate({"operations": [_visit(caseload["mother_id"], 3)]}).operations
+    before = _record_count(caseload["mother_id"])
+    with database.SessionLocal() as first, database.SessionLocal() as second:
+        winner = crud.create_records_batch(first, caseload["midwife_id"], operations, idempotency_key="race-1")
+        loser = crud.create_records_batch(second, caseload["midwife_id"], operations, idempotency_key="race-1")
+    assert winner is not None
+    assert loser is None
+    assert _record_count(caseload["mother_id"]) == before + 1
+
+
+# The endpoint answers the losing request with the winner's result
+def test_concurrent_duplicate_endpoint_replays_winner(client, caseload, monkeypatch):
+    operations = schemas.RecordBatch.model_validate({"operations": [_visit(caseload["mother_id"], 4)]}).operations
+    with database.SessionLocal() as db:
+        winner = crud.create_records_batch(db, caseload["midwife_id"], operations, idempotency_key="race-2")
+    # The loser's replay lookup ran before the winner committed
+    lookup = crud.get_idempotent_response
+    calls = []
+
+    def late_lookup(db, midwife_id, key):
+        calls.append(key)
+        return None if len(calls) == 1 else lookup(db, midwife_id=midwife_id, key=key)
+
+    monkeypatch.setattr(crud, "get_idempotent_response", late_lookup)
+    before = _record_count(caseload["mother_id"])
+    response = client.post(URL, headers=dict(caseload["headers"], **{"Idempotency-Key": "race-2"}),
+                           json={"operations": [_visit(caseload["mother_id"], 4)]})
+    assert response.status_code == 200
+    assert response.json()["replayed"] is True
+    assert response.json()["results"] == winner.model_dump()["results"]
+    assert _record_count(caseload["mother_id"]) == before
+
+
+def test_invalid_operation_rejects_whole_batch(client, caseload):
+    before = _record_count(caseload["mother_id"])
+    bad = {"type": "health_record", "mother_id": caseload["mother_id"], "data": {"weight_kg": "heavy"}}
+    response = client.post(URL, headers=caseload["headers"],
+                           json={"operations": [_visit(caseload["mother_id"], 5), bad]})
+    assert response.status_code == 422
+    assert _record_count(caseload["mother_id"]) == before
+
+
+def test_unowned_mother_rejects_whole_batch(client, caseload):
+    before = _record_count(caseload["mother_id"])
+    response = client.post(URL, headers=caseload["headers"], json={"operations": [
+        _visit(caseload["mother_id"], 6), _visit(caseload["other_mother_id"], 6)]})
+    assert response.status_code == 404
+    assert response.json()["detail"]["mother_ids"] == [caseload["other_mother_id"]]
+    assert _record_count(caseload["mother_id"]) == before
+    assert _record_count(caseload["other_mother_id"]) == 0
+
+
+# A row the database refuses part-way through the flush takes the rest of the
+# batch (and its sync counter bump) down with it
+def test_database_error_rolls_back_batch(caseload):
+    good = schemas.HealthRecordOp.model_validate(_visit(caseload["mother_id"], 7))
+    bad = schemas.HealthRecordOp.model_construct(type="health_record", mother_id=None, data=good.data)
+    before = _record_count(caseload["mother_id"])
+    with database.SessionLocal() as db:
+        counter = db.get(models.SyncCounter, 1).value
+        with pytest.raises(IntegrityError):
+            crud.create_records_batch(db, caseload["midwife_id"], [good, bad], idempotency_key="broken-1")
+        db.rollback()
+        assert db.get(models.SyncCounter, 1).value == counter
+        assert crud.get_idempotent_response(db, caseload["midwife_id"], "broken-1") is None
+    assert _record_count(caseload["mother_id"]) == before
@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import pytest
+
+from sql_app import database, main, models
+
+
+def _auth(subject):
+    return {"Authorization": f"Bearer {main.create_access_token(data={'sub': subject})}"}
+
+
+@pytest.fixture(scope="module")
+def caseload(client):
+    with database.SessionLocal() as db:
+        midwife = models.Midwife(username="sync-mw", hashed_password="x", is_active=True)
+        other = models.Midwife(username="sync-other", hashed_password="x", is_active=True)
+        db.add_all([midwife, other])
+        db.flush()
+        mothers = [models.Mother(full_name=f"Sync {i}", nic=f"SYNC{i}", hashed_password="x", midwife_id=midwife.id)
+                   for i in range(2)]
+        db.add_all(mothers + [models.Mother(full_name="Other", nic="SYNC-OTHER", hashed_password="x",
+                                            midwife_id=other.id)])
+        db.flush()
+        db.add_all([models.HealthRecord(mother_id=mother.id, visit_date=datetime(2026, 1, 1 + day))
+                    for mother in mothers for day in range(3)])
+        db.commit()
+        return {"headers": _auth(midwife.username), "mother_ids": [m.id for m in mothers]}
+
+
+def _sync(client, caseload, since="", **params):
+    response = client.get("/sync", params={"since": since, **params}, headers=caseload["headers"])
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _changes(feed):
+    return [(name, row["id"]) for name in ("mothers", "health_records") for row in feed[name]]
+
+
+def test_full_sync(client, caseload):
+    feed = _sync(client, caseload)
+    assert sorted(m["id"] for m in feed["mothers"]) == caseload["mother_ids"]
+    assert len(feed["health_records"]) == 6
+    assert feed["deleted"] == []
+    assert feed["has_more"] is False
+    # Nothing new since the token
+    again = _sync(client, caseload, feed["next_token"])
+    assert _changes(again) == [] and again["deleted"] == []
+    assert again["next_token"] == feed["next_token"]
+
+
+def test_since_token_returns_only_later_changes(client, caseload):
+    token = _sync(client, caseload)["next_token"]
+    mother_id = caseload["mother_ids"][0]
+    response = client.post(f"/mothers/{mother_id}/records/", headers=caseload["headers"],
+                           json={"visit_date": "2026-02-01T09:00:00", "notes": "new"})
+    assert response.status_code == 200
+    feed = _sync(client, caseload, token)
+    assert [r["id"] for r in feed["health_records"]] == [response.json()["id"]]
+    assert feed["mothers"] == []
+    assert feed["next_token"] != token
+
+
+def test_delete_leaves_tombstone(client, caseload):
+    token = _sync(client, caseload)["next_token"]
+    with database.SessionLocal() as db:
+        record = db.query(models.HealthRecord).filter_by(mother_id=caseload["mother_ids"][1]).first()
+        record_id = record.id
+        db.delete(record)
+        db.commit()
+    feed = _sync(client, caseload, token)
+    assert feed["deleted"] == [{"table": "health_records", "id": record_id}]
+    assert _changes(feed) == []
+
+
+# Small pages: has_more until the last one, every change exactly once
+def test_has_more_pages_through_everything(client, caseload):
+    expected = sorted(_changes(_sync(client, caseload)))
+    seen, token, pages = [], "", 0
+    while True:
+        feed = _sync(client, caseload, token, limit=2)
+        pages += 1
+        changes = _changes(feed)
+        assert len(changes) + len(feed["deleted"]) <= 2
+        seen += changes
+        token = feed["next_token"]
+        if not feed["has_more"]:
+            break
+    assert pages > 1
+    assert sorted(seen) == expected
+
+
+def test_invalid_token(client, caseload):
+    response = client.get("/sync", params={"since": "not-a-token"}, headers=caseload["headers"])
+    assert response.status_code == 400